@@ -4,165 +4,402 @@ Flask API server for LeadGeneratorAI
 Wraps the lead_finder.py functionality as REST endpoints
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import threading
 import uuid
+import json
 import time
 from datetime import datetime
 import os
 import sys
+from dotenv import load_dotenv
+
+# Settings in .env apply to every module imported below
+load_dotenv()
 
 # Import our lead finder functions
-from lead_finder import google_search, scrape_text, is_good_lead, is_similar_content, SEARCH_TERMS, LOCATION
+from lead_finder import (google_search, qualify_result, is_repost, build_queries, expand_locations,
+                         SERVICE_PHRASES, PLATFORM_TEMPLATES)
+from lead_finder import get_config as finder_config
+from pipeline import LeadPipeline, PipelineConfig
+from query_planner import QUERY_MAX_RESULTS
+from term_stats import schedule_search, yield_report
+from rate_limiter import limiter
+from verdict_cache import get_verdict_cache
+from dedup_index import get_dedup_index
+from lead_filters import get_lead_filter
+from http_client import get_http_client
+from search_cache import get_search_cache
+from singleflight import singleflight_stats
+from job_scheduler import JobScheduler, PRIORITIES, job_key
+from job_queue import get_job_queue, REPORTED_FIELDS
+from lead_store import get_lead_store, MAX_PAGE_SIZE
+from metrics import CONTENT_TYPE, Counter, Gauge, render as render_metrics
+from monitor import MONITOR_SEARCH_ID, MONITOR_SUBREDDITS, cursor_key, parse_subreddits
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
-# Store active searches and results in memory
-# In production, you'd use a database like Redis or PostgreSQL
+# Active searches live in memory; every checked result is persisted in lead_store
 active_searches = {}
 search_results = {}
-lead_history = []
+
+# "async" runs search/scrape/qualify as concurrent stages (see pipeline.py),
+# "sequential" keeps the original one-at-a-time loop
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "async")
+# "threads" runs searches on this process's scheduler; "queue" leaves them in the
+# durable job queue for worker.py processes and follows their progress
+JOB_BACKEND = os.getenv("JOB_BACKEND", "threads")
+JOB_SYNC_SECONDS = float(os.getenv("JOB_SYNC_SECONDS", "0.5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+FINISHED_STATUSES = ("completed", "error", "cancelled")
 
 class SearchJob:
-    def __init__(self, search_id, search_terms, location):
+    def __init__(self, search_id, search_terms, location, mode=None, priority="normal"):
         self.search_id = search_id
         self.search_terms = search_terms
-        self.location = location
-        self.status = "running"
-        self.results = []
+        self.location = location  # one location, or several joined by "; "
+        self.locations = expand_locations(location)
+        self.mode = mode or PIPELINE_MODE
+        self.priority = priority
+        self.status = "queued"
+        self.attempt = 1  # job queue attempt whose leads these are
+        self.results = []  # a result's seq is its 1-based position here
+        self.qualified_count = 0
+        self.scrapes_avoided = 0  # results judged from the provider's post body alone
+        self.pages_fetched = 0
+        self.tally = None  # term_stats.RunTally while the search runs
         self.progress = 0
         self.total_queries = 0
         self.current_query = ""
         self.start_time = datetime.now()
+        self.progress_seq = 0  # bumped on every status/progress change
+        self.version = 0  # bumped on every mutation; used as the ETag
+        self.changed = threading.Condition()
+
+    def add_result(self, lead_data, tier=None):
+        with self.changed:
+            self.results.append(lead_data)
+            if lead_data["is_qualified"]:
+                self.qualified_count += 1
+            if tier == "snippet":
+                self.scrapes_avoided += 1
+            elif tier:
+                self.pages_fetched += 1
+            self.version += 1
+            self.changed.notify_all()
+
+    def clear_results(self, attempt):
+        """Forget the results of an earlier attempt; a retry reruns the search from scratch.
+        Clients holding a seq from the old attempt see the new attempt and start over."""
+        with self.changed:
+            self.attempt = attempt
+            self.results = []
+            self.qualified_count = 0
+            self.version += 1
+            self.changed.notify_all()
+
+    def update(self, **fields):
+        """Set status/progress/current_query and wake any event streams"""
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.progress_seq += 1
+            self.version += 1
+            self.changed.notify_all()
+
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def results_since(self, since=0, attempt=None):
+        """(version, status, results after seq `since`, total, qualified, attempt, reset) read together;
+        only the new slice is copied. A `since` from another attempt is reset to 0."""
+        with self.changed:
+            reset = attempt is not None and attempt != self.attempt
+            if reset:
+                since = 0
+            return (self.version, self.status, self.results[max(since, 0):],
+                    len(self.results), self.qualified_count, self.attempt, reset)
+
+    def snapshot(self):
+        with self.changed:
+            return {
+                "search_id": self.search_id,
+                "status": self.status,
+                "attempt": self.attempt,
+                "progress": self.progress,
+                "current_query": self.current_query,
+                "results_count": len(self.results),
+                "qualified_count": self.qualified_count,
+                "locations": self.locations,
+                "scrapes_avoided": self.scrapes_avoided,
+                "pages_fetched": self.pages_fetched,
+                "start_time": self.start_time.isoformat(),
+                "version": self.version
+            }
+
+def job_phrases(search_terms):
+    """The user's own terms take the place of the generic painting and remodeling phrases"""
+    if not search_terms:
+        return SERVICE_PHRASES
+    return [search_terms] + SERVICE_PHRASES[2:]
+
+def build_job_queries(search_job):
+    """(site, full_query) pairs for every location of this job"""
+    return build_queries(search_job.locations, job_phrases(search_job.search_terms))
+
+def make_result_filter():
+    """Return accept(site, result) applying blacklist, duplicate and keyword checks"""
+    seen_urls = set()  # Track URLs to avoid duplicates
+    seen_titles = set()  # Track similar titles
+    lead_filter = get_lead_filter()
+
+    def accept(site, result):
+        title = result.get("title", "")
+        link = result.get("link", "")
+        snippet = result.get("snippet", "")
+
+        # Skip blacklisted domains
+        if lead_filter.is_blocked_url(link):
+            print(f"🚫 Skipping blacklisted site: {link}")
+            return False
+
+        # Skip duplicates by URL
+        if link in seen_urls:
+            print(f"🚫 Skipping duplicate URL: {link}")
+            return False
+
+        # Skip duplicates by similar title (normalize and compare)
+        normalized_title = title.lower().strip()
+        if normalized_title in seen_titles:
+            print(f"🚫 Skipping duplicate title: {title}")
+            return False
+
+        # Pre-filter irrelevant content by keywords
+        if lead_filter.matching_keyword(f"{title} {snippet}"):
+            print(f"🚫 Skipping irrelevant content: {title[:50]}...")
+            return False
+
+        # Skip reposts and cross-posts seen in any job or run
+        if is_repost(result):
+            return False
+
+        # Add to tracking sets
+        seen_urls.add(link)
+        seen_titles.add(normalized_title)
+        return True
+
+    return accept
+
+def record_result(search_job, site, result, is_lead, reason):
+    """Append a qualified/rejected result to the job and the lead store"""
+    lead_data = get_lead_store().add(
+        search_id=search_job.search_id,
+        title=result.get("title", ""),
+        link=result.get("link", ""),
+        snippet=result.get("snippet", ""),
+        platform=site.title(),
+        search_term=result.get("term", ""),
+        is_qualified=is_lead,
+        ai_reason=reason,
+        attempt=search_job.attempt,
+    )
+    lead_data.pop("search_id")
+
+    search_job.add_result(lead_data, result.get("tier"))
+    if search_job.tally is not None:
+        search_job.tally.verdict(site, result, is_lead)
+
+    if is_lead:
+        print(f"✅ Qualified: {reason}")
+    else:
+        print(f"❌ Not a match: {reason}")
+
+def run_sequential_search(search_job, queries, accept, search_fn=google_search):
+    """Original one-query-at-a-time search loop"""
+    processed = 0
+    current_site = None
+
+    for site, full_query in queries:
+        if site != current_site:
+            print(f"\n=== Searching on {site.upper()} ===")
+            current_site = site
+
+        # Check if search was cancelled
+        if search_job.search_id not in active_searches:
+            search_job.update(status="cancelled")
+            return
+
+        # Update progress
+        search_job.update(current_query=f"Searching {site}: {full_query[:50]}...",
+                          progress=int((processed / len(queries)) * 100))
+
+        print(f"🔍 Searching: {full_query}")
+        results = search_fn(full_query)
+
+        for result in results:
+            if not accept(site, result):
+                continue
+
+            # Snippet first: the page is fetched only when the post body isn't enough
+            verdict = qualify_result(result)
+            if verdict is not None:
+                record_result(search_job, site, result, *verdict)
+
+        # Provider budgets are enforced by rate_limiter inside each fetcher
+        processed += 1
+
+def run_pipeline_search(search_job, queries, accept, search_fn=google_search):
+    """Concurrent search → scrape → qualify; results stream into the job as they finish"""
+    processed = 0
+
+    def on_query_done(site, query):
+        nonlocal processed
+        processed += 1
+        search_job.update(current_query=f"Searching {site}: {query[:50]}...",
+                          progress=int((processed / len(queries)) * 100))
+
+    def on_result(site, result, is_lead, reason):
+        record_result(search_job, site, result, is_lead, reason)
+
+    # A multi-city job widens the pipeline so its cities are searched side by side
+    config = PipelineConfig().fan_out(len(search_job.locations))
+    LeadPipeline(search_fn=search_fn, config=config).run(
+        queries,
+        on_result,
+        accept=accept,
+        on_query_done=on_query_done,
+        is_cancelled=lambda: search_job.search_id not in active_searches,
+        max_results=QUERY_MAX_RESULTS,
+    )
+
+    if search_job.search_id not in active_searches:
+        search_job.update(status="cancelled")
 
 def background_search(search_job):
-    """Run the lead search in background"""
+    """Run the lead search on a scheduler worker"""
+    if search_job.status == "cancelled":
+        return
     try:
-        search_job.status = "running"
-        
-        # Calculate total queries
-        total_queries = sum(len(terms) for terms in SEARCH_TERMS.values())
-        search_job.total_queries = total_queries
-        
-        processed = 0
-        seen_urls = set()  # Track URLs to avoid duplicates
-        seen_titles = set()  # Track similar titles
-        seen_content = []  # Track content for similarity checking
-        
-        # Enhanced blacklist of sites to skip
-        blacklisted_domains = [
-            "yelp.com", "angi.com", "houzz.com", "porch.com", "homeadvisor.com",
-            "thumbtack.com", "taskrabbit.com", "handy.com", "amazon.com",
-            "lowes.com", "homedepot.com", "menards.com", "wikipedia.org",
-            "pinterest.com", "youtube.com", "facebook.com/pages", "linkedin.com",
-            "indeed.com", "glassdoor.com", "craigslist.org/about", "angieslist.com"
-        ]
-        
-        for site, terms in SEARCH_TERMS.items():
-            print(f"\n=== Searching on {site.upper()} ===")
-            
-            for term in terms:
-                # Check if search was cancelled
-                if search_job.search_id not in active_searches:
-                    search_job.status = "cancelled"
-                    return
-                
-                # Update progress
-                search_job.current_query = f"Searching {site}: {term[:50]}..."
-                search_job.progress = int((processed / total_queries) * 100)
-                
-                # Customize query based on user input
-                if search_job.search_terms:
-                    # Replace generic terms with user's specific search terms
-                    custom_term = term.replace('"need a painter"', f'"{search_job.search_terms}"')
-                    custom_term = custom_term.replace('"looking for remodeling help"', f'"{search_job.search_terms}"')
-                    full_query = custom_term.replace("durham", search_job.location.lower())
-                else:
-                    full_query = f"{term} in {search_job.location}" if site != "nextdoor" else f"{term} {search_job.location}"
-                
-                print(f"🔍 Searching: {full_query}")
-                results = google_search(full_query)
-                
-                for result in results[:5]:  # MAX_RESULTS
-                    title = result.get("title", "")
-                    link = result.get("link", "")
-                    snippet = result.get("snippet", "")
-                    
-                        # Skip blacklisted domains
-                        if any(bad_domain in link.lower() for bad_domain in blacklisted_domains):
-                            print(f"🚫 Skipping blacklisted site: {link}")
-                            continue
-                    
-                        # Skip duplicates by URL
-                        if link in seen_urls:
-                            print(f"🚫 Skipping duplicate URL: {link}")
-                            continue
-                    
-                        # Skip duplicates by similar title (normalize and compare)
-                        normalized_title = title.lower().strip()
-                        if normalized_title in seen_titles:
-                            print(f"🚫 Skipping duplicate title: {title}")
-                            continue
-                    
-                    
-                            # Pre-filter irrelevant content by keywords
-                            irrelevant_keywords = [
-                                "job posting", "hiring", "employment", "career", "resume",
-                                "for sale", "selling", "buy now", "price", "discount",
-                                "review of", "rating", "how to", "diy", "tutorial",
-                                "advertisement", "sponsored", "promotion", "coupon"
-                            ]
-                    
-                            combined_text = f"{title} {snippet}".lower()
-                            if any(keyword in combined_text for keyword in irrelevant_keywords):
-                                print(f"🚫 Skipping irrelevant content: {title[:50]}...")
-                                continue
-                    
-                            # Add to tracking sets
-                            seen_urls.add(link)
-                            seen_titles.add(normalized_title)
-                    
-                    print(f"Checking: {title} | {link}")
-                    text = scrape_text(link)
-                    
-                    if text:
-                        is_lead, reason = is_good_lead(text)
-                        
-                        lead_data = {
-                            "id": len(search_job.results) + 1,
-                            "title": title,
-                            "link": link,
-                            "snippet": snippet,
-                            "platform": site.title(),
-                            "is_qualified": is_lead,
-                            "ai_reason": reason,
-                            "found_at": datetime.now().isoformat()
-                        }
-                        
-                        search_job.results.append(lead_data)
-                        
-                        if is_lead:
-                            print(f"✅ Qualified: {reason}")
-                            # Add to global lead history
-                            lead_history.append(lead_data)
-                        else:
-                            print(f"❌ Not a match: {reason}")
-                    
-                    time.sleep(1)  # Rate limiting
-                
-                processed += 1
-                time.sleep(2)  # Avoid hitting rate limits
-        
-        search_job.status = "completed"
-        search_job.progress = 100
-        search_job.current_query = "Search completed!"
+        search_job.update(status="running")
+
+        queries, search_fn, search_job.tally = schedule_search(build_job_queries(search_job), google_search)
+        search_job.total_queries = len(queries)
+        accept = search_job.tally.track_accept(make_result_filter())
+
+        if search_job.mode == "sequential":
+            run_sequential_search(search_job, queries, accept, search_fn)
+        else:
+            run_pipeline_search(search_job, queries, accept, search_fn)
+
+        # Leads are queryable from the store once the job reports it is finished
+        get_lead_store().flush()
+        if search_job.status == "cancelled":
+            return
+
+        search_job.update(status="completed", progress=100, current_query="Search completed!")
         
     except Exception as e:
         print(f"Search error: {e}")
-        search_job.status = "error"
-        search_job.current_query = f"Error: {str(e)}"
+        get_lead_store().flush()
+        search_job.update(status="error", current_query=f"Error: {str(e)}")
+    finally:
+        # Cancelled and failed runs still spent their queries
+        if search_job.tally is not None:
+            search_job.tally.save()
+
+# Fixed worker pool + priority queue; identical searches attach to one job
+scheduler = JobScheduler(background_search)
+
+def can_attach(search_job):
+    return search_job.search_id in active_searches and search_job.status not in ("error", "cancelled")
+
+def job_backend():
+    """Whatever runs searches: the in-process scheduler or the durable queue (same stats/estimated_wait)"""
+    return get_job_queue() if JOB_BACKEND == "queue" else scheduler
+
+# === METRICS (computed when /api/metrics is scraped) ===
+def unfinished_jobs_by_status():
+    counts = {"queued": 0, "running": 0}
+    for search_job in list(active_searches.values()):
+        if not search_job.is_finished():
+            counts[search_job.status] = counts.get(search_job.status, 0) + 1
+    return counts
+
+Gauge("leadgen_active_jobs", "Unfinished searches tracked by this process, by status", ["status"],
+      fn=unfinished_jobs_by_status)
+Gauge("leadgen_scheduler_queue_depth", "Searches waiting for a worker",
+      fn=lambda: job_backend().stats()["queue_depth"])
+Gauge("leadgen_scheduler_busy_workers", "Workers currently running a search",
+      fn=lambda: job_backend().stats()["busy_workers"])
+Counter("leadgen_singleflight_shared_total", "Calls answered by another job's in-flight call, by kind", ["kind"],
+        fn=lambda: {name: stats["shared"] for name, stats in singleflight_stats().items()})
+
+class RemoteSearchJob(SearchJob):
+    """API-side mirror of a job run by worker.py, refreshed from the job queue and lead store"""
+
+    def __init__(self, row):
+        priority = next((name for name, rank in PRIORITIES.items() if rank == row["priority"]), "normal")
+        super().__init__(row["search_id"], row["search_terms"], row["location"], row["mode"], priority)
+        self.start_time = datetime.fromtimestamp(row["created_at"])
+        self.attempt = max(row["attempts"], 1)
+        self.last_seq = 0  # per-job write order; IDs from different workers' blocks aren't ordered
+        self.sync_lock = threading.Lock()  # the sync thread and request handlers both sync
+
+    def sync(self):
+        with self.sync_lock:
+            # Read the row first: leads written before a "completed" status are then always picked up
+            row = get_job_queue().get(self.search_id)
+            if row is not None and row["attempts"] > self.attempt:
+                # Another worker took the job over after a lost lease and starts from scratch
+                self.last_seq = 0
+                self.clear_results(row["attempts"])
+            while True:
+                leads = get_lead_store().job_leads_after(self.search_id, self.attempt, self.last_seq)
+                for lead in leads:
+                    self.last_seq = lead.pop("seq")
+                    lead.pop("search_id")
+                    self.add_result(lead)
+                if len(leads) < MAX_PAGE_SIZE:
+                    break
+            if row is not None:
+                changes = {name: row[name] for name in REPORTED_FIELDS if getattr(self, name) != row[name]}
+                if changes:
+                    self.update(**changes)
+
+remote_sync_started = threading.Event()
+
+def sync_remote_jobs():
+    while True:
+        for search_job in list(active_searches.values()):
+            if isinstance(search_job, RemoteSearchJob) and not search_job.is_finished():
+                try:
+                    search_job.sync()
+                except Exception as e:
+                    print(f"Job sync error: {e}")
+        time.sleep(JOB_SYNC_SECONDS)
+
+def track_remote_job(row):
+    """Register (or return) the mirror for a queued job and make sure the sync thread runs"""
+    search_job = active_searches.get(row["search_id"])
+    if search_job is None:
+        search_job = RemoteSearchJob(row)
+        search_job.sync()
+        search_job = active_searches.setdefault(row["search_id"], search_job)
+    if not remote_sync_started.is_set():
+        remote_sync_started.set()
+        threading.Thread(target=sync_remote_jobs, name="job-sync", daemon=True).start()
+    return search_job
+
+def find_job(search_id):
+    """The job for an id; in queue mode, jobs from before an API restart are reloaded from the queue"""
+    search_job = active_searches.get(search_id)
+    if search_job is None and JOB_BACKEND == "queue":
+        row = get_job_queue().get(search_id)
+        if row is not None and row["status"] != "cancelled":
+            search_job = track_remote_job(row)
+    return search_job
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -170,7 +407,37 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "google_search_configured": os.getenv("GOOGLE_API_KEY") is not None
+        "google_search_configured": os.getenv("GOOGLE_API_KEY") is not None,
+        "rate_limits": limiter.stats(),
+        "verdict_cache": get_verdict_cache().stats(),
+        "dedup_index": get_dedup_index().stats(),
+        "http": get_http_client().stats(),
+        "search_cache": get_search_cache().stats(),
+        "scheduler": job_backend().stats(),
+        "singleflight": singleflight_stats()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint: stage latencies, provider errors, tokens, queue depths"""
+    return Response(render_metrics(), mimetype=None, content_type=CONTENT_TYPE)
+
+@app.route('/api/scheduler', methods=['GET'])
+def scheduler_status():
+    """Worker utilization and the queued searches in run order"""
+    if JOB_BACKEND == "queue":
+        queued = [(row["search_id"], row["priority"], row["search_terms"], row["location"])
+                  for row in get_job_queue().queued_jobs()]
+        ranks = {rank: name for name, rank in PRIORITIES.items()}
+        queued = [(search_id, ranks.get(rank, "normal"), terms, location)
+                  for search_id, rank, terms, location in queued]
+    else:
+        queued = [(job.search_id, job.priority, job.search_terms, job.location) for job in scheduler.queued_jobs()]
+    return jsonify({
+        **job_backend().stats(),
+        "queue": [{"search_id": search_id, "position": position, "priority": priority,
+                   "search_terms": terms, "location": location}
+                  for position, (search_id, priority, terms, location) in enumerate(queued, start=1)]
     })
 
 @app.route('/api/search', methods=['POST'])
@@ -178,76 +445,195 @@ def start_search():
     """Start a new lead search"""
     data = request.get_json()
     search_terms = data.get('searchTerms', '')
-    location = data.get('location', LOCATION)
+    # "locations": a list of cities (or metro names like "Triangle"), searched in one job;
+    # "location" may also hold several, separated by ";"
+    locations = expand_locations(data.get('locations') or data.get('location') or finder_config().location)
+    if not locations:
+        return jsonify({"error": "locations must name at least one city"}), 400
+    location = "; ".join(locations)
+    key = job_key(search_terms, "; ".join(sorted(locations, key=str.lower)))  # same cities, any order
+    mode = data.get('mode')  # "async" or "sequential"; defaults to PIPELINE_MODE
+    priority = data.get('priority', 'normal')  # "high", "normal" or "low"
+    if priority not in PRIORITIES:
+        return jsonify({"error": f"priority must be one of {', '.join(PRIORITIES)}"}), 400
     
     # Generate unique search ID
     search_id = str(uuid.uuid4())
     
-    # Create search job
-    search_job = SearchJob(search_id, search_terms, location)
-    active_searches[search_id] = search_job
-    
-    # Start background search
-    thread = threading.Thread(target=background_search, args=(search_job,))
-    thread.daemon = True
-    thread.start()
-    
+    if JOB_BACKEND == "queue":
+        # Durable queue: a worker.py process runs it, this process only follows along
+        row, outcome, position = get_job_queue().enqueue(search_id, search_terms, location, mode, priority, key)
+        job = track_remote_job(row) if row is not None else None
+    else:
+        # Create search job (registered first so a worker never sees it as cancelled)
+        search_job = SearchJob(search_id, search_terms, location, mode, priority)
+        active_searches[search_id] = search_job
+
+        job, outcome, position = scheduler.submit(search_job, key, priority,
+                                                  can_attach=can_attach)
+        if outcome != "queued":
+            del active_searches[search_id]
+
+    if outcome == "full":
+        wait = job_backend().estimated_wait(position)
+        response = jsonify({
+            "error": "Search queue is full, try again later",
+            "queue_position": position,
+            "estimated_wait_seconds": wait
+        })
+        response.headers["Retry-After"] = str(int(wait) or 1)
+        return response, 429
+
+    if outcome == "attached":
+        return jsonify({
+            "search_id": job.search_id,
+            "status": job.status,
+            "coalesced": True,
+            "queue_position": position,
+            "message": "Attached to an identical search"
+        })
+
     return jsonify({
         "search_id": search_id,
-        "status": "started",
-        "message": "Search started successfully"
+        "status": "started" if position == 0 else "queued",
+        "coalesced": False,
+        "queue_position": position,
+        "estimated_wait_seconds": job_backend().estimated_wait(position),
+        "message": "Search started successfully" if position == 0 else "Search queued"
     })
 
 @app.route('/api/search/<search_id>/status', methods=['GET'])
 def get_search_status(search_id):
     """Get status of a running search"""
-    if search_id not in active_searches:
+    search_job = find_job(search_id)
+    if search_job is None:
         return jsonify({"error": "Search not found"}), 404
-    
-    search_job = active_searches[search_id]
-    
-    return jsonify({
-        "search_id": search_id,
-        "status": search_job.status,
-        "progress": search_job.progress,
-        "current_query": search_job.current_query,
-        "results_count": len(search_job.results),
-        "qualified_count": len([r for r in search_job.results if r['is_qualified']]),
-        "start_time": search_job.start_time.isoformat()
-    })
+
+    etag = f"{search_id}-status-{search_job.version}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    status = search_job.snapshot()
+    return with_etag(jsonify(status), f"{search_id}-status-{status['version']}")
 
 @app.route('/api/search/<search_id>/results', methods=['GET'])
 def get_search_results(search_id):
-    """Get results from a search"""
-    if search_id not in active_searches:
+    """Get results from a search; ?since=<seq> returns only results after that seq.
+    Pass the `attempt` the results came with: after a retry the response has reset=true
+    and every result of the new attempt, replacing what the client has."""
+    search_job = find_job(search_id)
+    if search_job is None:
         return jsonify({"error": "Search not found"}), 404
     
-    search_job = active_searches[search_id]
-    
     # Filter results based on query parameters
     show_qualified_only = request.args.get('qualified_only', 'false').lower() == 'true'
+    since = request.args.get('since', 0, type=int)
+    attempt = request.args.get('attempt', type=int)
     
-    results = search_job.results
+    def results_etag(version):
+        return f"{search_id}-results-{version}-{attempt}-{since}-{int(show_qualified_only)}"
+
+    if request.if_none_match.contains(results_etag(search_job.version)):
+        return not_modified(results_etag(search_job.version))
+
+    version, status, results, total, qualified, attempt_now, reset = search_job.results_since(since, attempt)
     if show_qualified_only:
         results = [r for r in results if r['is_qualified']]
     
-    return jsonify({
+    return with_etag(jsonify({
         "search_id": search_id,
-        "status": search_job.status,
+        "status": status,
         "results": results,
-        "total_results": len(search_job.results),
-        "qualified_results": len([r for r in search_job.results if r['is_qualified']])
-    })
+        "attempt": attempt_now,
+        "reset": reset,
+        "next_since": total,
+        "total_results": total,
+        "qualified_results": qualified
+    }), results_etag(version))
+
+def with_etag(response, etag):
+    # no-cache: clients may keep the body but must revalidate with If-None-Match
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def not_modified(etag):
+    """Empty 304 for a client that already has this version"""
+    return with_etag(Response(status=304), etag)
+
+def sse_event(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+def job_events(search_job, since=0, attempt=None):
+    """Yield SSE messages: one `lead` per new result (id = seq), `progress` on changes, `done` at the end.
+    `reset` means a retry replaced the results: the client drops its list and seqs restart at 1."""
+    sent_progress = -1
+    attempt = attempt or search_job.attempt
+    while True:
+        with search_job.changed:
+            if (len(search_job.results) <= since and search_job.progress_seq == sent_progress
+                    and search_job.attempt == attempt and not search_job.is_finished()):
+                search_job.changed.wait(SSE_HEARTBEAT_SECONDS)
+            reset = search_job.attempt != attempt
+            if reset:
+                attempt, since = search_job.attempt, 0
+            new_results = search_job.results[since:]
+            progress_seq = search_job.progress_seq
+            snapshot = search_job.snapshot()
+            finished = search_job.is_finished()
+
+        if reset:
+            yield sse_event("reset", {"attempt": attempt})
+        if not new_results and progress_seq == sent_progress and not finished and not reset:
+            yield ": keep-alive\n\n"
+            continue
+        for lead in new_results:
+            since += 1
+            yield sse_event("lead", lead, since)
+        if progress_seq != sent_progress:
+            yield sse_event("progress", snapshot)
+            sent_progress = progress_seq
+        if finished:
+            yield sse_event("done", snapshot)
+            return
+
+@app.route('/api/search/<search_id>/events', methods=['GET'])
+def stream_search_events(search_id):
+    """Server-Sent Events stream of new results and progress; resumes from ?since= or Last-Event-ID
+    (with ?attempt= when known, so a retry since then starts with a reset)"""
+    search_job = find_job(search_id)
+    if search_job is None:
+        return jsonify({"error": "Search not found"}), 404
+
+    since = request.args.get('since', type=int)
+    if since is None:
+        last_event_id = request.headers.get('Last-Event-ID', '0')
+        since = int(last_event_id) if last_event_id.isdigit() else 0
+
+    return Response(
+        stream_with_context(job_events(search_job, max(since, 0), request.args.get('attempt', type=int))),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.route('/api/search/<search_id>/cancel', methods=['POST'])
 def cancel_search(search_id):
     """Cancel a running search"""
-    if search_id not in active_searches:
+    search_job = find_job(search_id)
+    if search_job is None:
         return jsonify({"error": "Search not found"}), 404
     
     # Remove from active searches to signal cancellation
-    search_job = active_searches.pop(search_id)
-    search_job.status = "cancelled"
+    active_searches.pop(search_id, None)
+    if JOB_BACKEND == "queue":
+        get_job_queue().cancel(search_id)
+    else:
+        scheduler.discard(search_job)
+    search_job.update(status="cancelled")
     
     return jsonify({
         "search_id": search_id,
@@ -257,16 +643,55 @@ def cancel_search(search_id):
 
 @app.route('/api/leads', methods=['GET'])
 def get_leads():
-    """Get all qualified leads from history"""
+    """Page through stored leads, newest first.
+    Query params: limit, cursor (next_cursor from the previous page), platform,
+    qualified (true/false/all, default true), search_id, since (ISO timestamp)"""
+    qualified = request.args.get('qualified', 'true').lower()
+    filters = {
+        "qualified": None if qualified == 'all' else qualified == 'true',
+        "platform": request.args.get('platform'),
+        "search_id": request.args.get('search_id'),
+        "since": request.args.get('since'),
+    }
+    store = get_lead_store()
+    try:
+        limit = int(request.args.get('limit', 50))
+        leads, next_cursor = store.list_leads(limit=limit, before=request.args.get('cursor'), **filters)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer and cursor a next_cursor value"}), 400
+
     return jsonify({
-        "leads": lead_history,
-        "total": len(lead_history)
+        "leads": leads,
+        "total": store.count_leads(**filters),  # every matching lead, not just this page
+        "next_cursor": next_cursor
     })
 
+@app.route('/api/monitor', methods=['GET'])
+def get_monitor_leads():
+    """Posts checked by monitor.py, oldest first; ?since=<next_since> returns only newer ones.
+    Also reports each watched subreddit's cursor (the newest post already checked)."""
+    since = request.args.get('since', 0, type=int)
+    leads = get_lead_store().leads_after(MONITOR_SEARCH_ID, since)
+    for lead in leads:
+        lead.pop("search_id")
+    cache = get_search_cache()
+    return jsonify({
+        "subreddits": [{"subreddit": name, "cursor": cache.get_cursor(cursor_key(name))}
+                       for name in parse_subreddits(MONITOR_SUBREDDITS)],
+        "leads": leads,
+        "qualified_count": sum(1 for lead in leads if lead["is_qualified"]),
+        "next_since": leads[-1]["seq"] if leads else since,
+    })
+
+@app.route('/api/yield', methods=['GET'])
+def get_yield():
+    """Search yield per term and platform across runs, best terms first"""
+    return jsonify(yield_report())
+
 @app.route('/api/leads/<int:lead_id>', methods=['GET'])
 def get_lead_detail(lead_id):
     """Get detailed information about a specific lead"""
-    lead = next((l for l in lead_history if l['id'] == lead_id), None)
+    lead = get_lead_store().get(lead_id)
     if not lead:
         return jsonify({"error": "Lead not found"}), 404
     
@@ -276,15 +701,15 @@ def get_lead_detail(lead_id):
 def get_config():
     """Get current configuration"""
     return jsonify({
-        "location": LOCATION,
+        "location": finder_config().location,
         "google_search_enabled": os.getenv("GOOGLE_API_KEY") is not None,
         "openai_enabled": os.getenv("OPENAI_API_KEY") is not None,
-        "search_platforms": list(SEARCH_TERMS.keys())
+        "search_platforms": list(PLATFORM_TEMPLATES.keys())
     })
 
 if __name__ == '__main__':
     print("🚀 Starting LeadGeneratorAI API Server...")
-    print(f"📍 Location: {LOCATION}")
+    print(f"📍 Location: {finder_config().location}")
     print(f"🔍 Google Search: {'✅ Enabled' if os.getenv('GOOGLE_API_KEY') else '❌ Disabled (using Reddit direct)'}")
     print(f"🤖 OpenAI: {'✅ Enabled' if os.getenv('OPENAI_API_KEY') else '❌ Disabled'}")
     print("🌐 Server will run on: http://localhost:5000")
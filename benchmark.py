@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for LeadGeneratorAI
+Starts the local stand-in services (fake_services.py), then runs each scenario
+in a fresh interpreter pointed at them with cold caches in a temp directory:
+
+    cli  lead_finder.run(), the full CLI search
+    api  several concurrent searches through POST /api/search and the job scheduler
+
+and reports leads/min, p50/p95 per stage (search provider call, page fetch +
+parse, OpenAI call), OpenAI tokens per checked result, verdict accuracy against
+the fixture labels, external calls per service and peak memory. Provider rate
+limits are lifted so the numbers measure our code, not the quotas. Every run is
+appended to benchmark_results.jsonl and compared with the last run that used
+the same settings.
+
+Usage:
+    python benchmark.py                                  # both scenarios, default latencies
+    python benchmark.py --scenario api --jobs 5
+    python benchmark.py --scenario api --location Triangle   # one job fanned out over four cities
+    python benchmark.py --latency 0 --errors openai=0.05 --label no-latency
+    python benchmark.py --set USE_RELEVANCE_WINDOW=false # A/B a setting (stored with the run)
+    python benchmark.py --fail-on-regression             # exit 1 when a metric regressed
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from fake_services import DEFAULT_LATENCY, FIXTURES_PATH, FakeServices, parse_rates
+
+# === CONFIGURATION ===
+BENCHMARK_RESULTS_PATH = os.getenv("BENCHMARK_RESULTS_PATH", "benchmark_results.jsonl")
+REGRESSION_TOLERANCE = 0.15  # relative change that counts as a regression
+ACCURACY_TOLERANCE = 0.02  # absolute drop in verdict accuracy that counts as a regression
+RESULT_MARKER = "BENCHMARK_RESULT "
+SCENARIOS = ("cli", "api")
+DEFAULT_LOCATION = "Durham, NC"
+API_SEARCH_TERMS = ["need a painter", "bathroom remodel", "deck repair", "fence installation",
+                    "drywall repair", "kitchen remodel", "power washing", "handyman"]
+STAGES = ("search", "scrape", "qualify")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(seconds):
+    return {
+        "count": len(seconds),
+        "p50_ms": round(1000 * percentile(seconds, 0.5), 1),
+        "p95_ms": round(1000 * percentile(seconds, 0.95), 1),
+    }
+
+
+# === Scenario side (runs in a fresh interpreter with the benchmark environment) ===
+STAGE_SECONDS = {stage: [] for stage in STAGES}
+
+
+def instrument(lead_finder):
+    """Time the calls that leave the process: search providers, page fetches, OpenAI"""
+    def timed(stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS[stage].append(time.perf_counter() - start)
+        return wrapper
+
+    lead_finder.search_providers = timed("search", lead_finder.search_providers)
+    lead_finder.fetch_text = timed("scrape", lead_finder.fetch_text)
+    lead_finder.ask_openai = timed("qualify", lead_finder.ask_openai)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def count_leads():
+    """(results checked, qualified, share of verdicts matching the fixture labels)"""
+    from lead_store import get_lead_store
+    store = get_lead_store()
+    store.flush()
+    rows = store.conn.execute("SELECT link, is_qualified FROM leads").fetchall()
+    with open(FIXTURES_PATH) as f:
+        labels = {post["id"]: post["lead"] for post in json.load(f)["posts"]}
+    correct = 0
+    for link, is_qualified in rows:
+        match = re.search(r"/(?:pages|comments)/(\w+)", link)
+        correct += bool(match) and labels.get(match.group(1)) == bool(is_qualified)
+    qualified = sum(1 for _, is_qualified in rows if is_qualified)
+    return len(rows), qualified, round(correct / len(rows), 3) if rows else None
+
+
+def warm_up():
+    """Load the lazily imported clients first, so the stages time requests rather than imports
+    (import cost is measured by benchmark_import.py)"""
+    import lead_finder
+    from http_client import get_http_client
+    from bs4 import BeautifulSoup
+    lead_finder.get_config()
+    lead_finder.get_openai_client()
+    get_http_client()
+    BeautifulSoup("<p>warm</p>", lead_finder.HTML_PARSER)
+
+
+def scenario_cli(args):
+    import lead_finder
+    instrument(lead_finder)
+    lead_finder.run(args.mode)
+    return {}
+
+
+def scenario_api(args):
+    import lead_finder
+    instrument(lead_finder)
+    import api_server
+
+    client = api_server.app.test_client()
+    started = {}
+    for number in range(args.jobs):
+        terms = API_SEARCH_TERMS[number % len(API_SEARCH_TERMS)]
+        if number >= len(API_SEARCH_TERMS):
+            terms = f"{terms} {number}"  # distinct terms, so the scheduler doesn't coalesce them
+        response = client.post("/api/search", json={"searchTerms": terms, "location": args.location, "mode": args.mode})
+        started[response.get_json()["search_id"]] = time.perf_counter()
+
+    job_seconds = []
+    deadline = time.time() + args.timeout
+    while started and time.time() < deadline:
+        for search_id in list(started):
+            status = client.get(f"/api/search/{search_id}/status").get_json()
+            if status["status"] in api_server.FINISHED_STATUSES:
+                job_seconds.append(time.perf_counter() - started.pop(search_id))
+        time.sleep(0.05)
+    if started:
+        raise RuntimeError(f"{len(started)} searches did not finish within {args.timeout}s")
+    return {"jobs": summarize(job_seconds)}
+
+
+def run_child(args):
+    warm_up()
+    start = time.perf_counter()
+    extra = {"cli": scenario_cli, "api": scenario_api}[args.child](args)
+    wall_seconds = time.perf_counter() - start
+    results, qualified, accuracy = count_leads()
+    from metrics import OPENAI_TOKENS, QUALIFY_TIERS
+    tokens = OPENAI_TOKENS.value("prompt") + OPENAI_TOKENS.value("completion")
+    minutes = wall_seconds / 60
+    metrics = {
+        "wall_seconds": round(wall_seconds, 2),
+        "results": results,
+        "qualified": qualified,
+        "results_per_min": round(results / minutes, 1) if minutes else 0.0,
+        "leads_per_min": round(qualified / minutes, 1) if minutes else 0.0,
+        "tokens_per_lead": round(tokens / results, 1) if results else 0.0,
+        "accuracy": accuracy,
+        "tiers": {tier: int(QUALIFY_TIERS.value(tier)) for tier in ("snippet", "escalated", "page")},
+        "stages": {stage: summarize(STAGE_SECONDS[stage]) for stage in STAGES},
+        "peak_rss_mb": peak_rss_mb(),
+        **extra,
+    }
+    print(RESULT_MARKER + json.dumps(metrics), flush=True)
+
+
+# === Driver side ===
+def scenario_env(services, workdir, overrides=None):
+    env = dict(os.environ)
+    env.update(services.env())
+    env.update({
+        # Cold caches and a fresh lead store for every scenario
+        "SEARCH_CACHE_PATH": os.path.join(workdir, "search_cache.db"),
+        "VERDICT_CACHE_PATH": os.path.join(workdir, "verdict_cache.db"),
+        "DEDUP_INDEX_PATH": os.path.join(workdir, "dedup_index.db"),
+        "LEAD_STORE_PATH": os.path.join(workdir, "leads.db"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.db"),
+        "TERM_STATS_PATH": os.path.join(workdir, "term_stats.db"),
+        "LEAD_LABELS_PATH": os.path.join(workdir, "lead_labels.jsonl"),
+        "LEAD_CLASSIFIER_PATH": os.path.join(workdir, "lead_classifier.json"),
+        "LEADS_CSV_PATH": os.path.join(workdir, "qualified_leads.csv"),
+        "JOB_BACKEND": "threads",
+        # Measure our code, not provider quotas
+        "GOOGLE_CSE_QUERIES_PER_DAY": "1000000",
+        "REDDIT_REQUESTS_PER_MINUTE": "100000",
+        "OPENAI_REQUESTS_PER_MINUTE": "100000",
+        "OPENAI_TOKENS_PER_MINUTE": "1000000000",
+    })
+    env.update(overrides or {})
+    return env
+
+
+def run_scenario(name, services, args):
+    """Run one scenario in a fresh interpreter and merge in the fake services' call counts"""
+    services.reset()
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, os.path.join(here, "benchmark.py"), "--child", name,
+               "--jobs", str(args.jobs), "--timeout", str(args.timeout),
+               "--location", getattr(args, "location", DEFAULT_LOCATION)]
+    if args.mode:
+        command += ["--mode", args.mode]
+    with tempfile.TemporaryDirectory() as workdir:
+        process = subprocess.run(command, cwd=workdir, env=scenario_env(services, workdir, getattr(args, "overrides", None)),
+                                 capture_output=True, text=True, timeout=args.timeout + 60)
+    lines = process.stdout.splitlines()
+    if args.verbose:
+        print("\n".join(line for line in lines if not line.startswith(RESULT_MARKER)))
+    result = next((line for line in reversed(lines) if line.startswith(RESULT_MARKER)), None)
+    if process.returncode != 0 or result is None:
+        print(process.stdout[-2000:])
+        print(process.stderr[-2000:])
+        raise RuntimeError(f"Benchmark scenario '{name}' failed (exit code {process.returncode})")
+    metrics = json.loads(result[len(RESULT_MARKER):])
+    counts = services.stats()
+    metrics["external_calls"] = counts["calls"]
+    metrics["injected_errors"] = counts["injected_errors"]
+    return metrics
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(runs, settings):
+    for run in reversed(runs):
+        if run.get("settings") == settings:
+            return run
+    return None
+
+
+def compare(current, previous, tolerance=REGRESSION_TOLERANCE):
+    """List of (metric, old, new, regressed) for one scenario"""
+    rows = []
+
+    def check(metric, old, new, higher_is_better, min_change=0.0, absolute=None):
+        if old is None or new is None:
+            return
+        change = new - old
+        worse = -change if higher_is_better else change
+        limit = absolute if absolute is not None else abs(old) * tolerance
+        regressed = worse > limit and worse > min_change
+        rows.append((metric, old, new, regressed))
+
+    check("leads_per_min", previous.get("leads_per_min"), current.get("leads_per_min"), True)
+    check("results_per_min", previous.get("results_per_min"), current.get("results_per_min"), True)
+    check("tokens_per_lead", previous.get("tokens_per_lead"), current.get("tokens_per_lead"), False)
+    check("accuracy", previous.get("accuracy"), current.get("accuracy"), True, absolute=ACCURACY_TOLERANCE)
+    for stage in STAGES:
+        check(f"{stage}_p95_ms", previous.get("stages", {}).get(stage, {}).get("p95_ms"),
+              current["stages"][stage]["p95_ms"], False, min_change=5)
+    if "jobs" in current:
+        check("job_p95_ms", previous.get("jobs", {}).get("p95_ms"), current["jobs"]["p95_ms"], False, min_change=5)
+    check("external_calls", sum(previous.get("external_calls", {}).values()) or None,
+          sum(current["external_calls"].values()), False)
+    check("peak_rss_mb", previous.get("peak_rss_mb"), current.get("peak_rss_mb"), False, min_change=5)
+    return rows
+
+
+def print_report(name, metrics):
+    print(f"\n📊 Scenario: {name}")
+    print(f"   {metrics['results']} results checked, {metrics['qualified']} qualified in {metrics['wall_seconds']}s")
+    print(f"   {metrics['leads_per_min']} leads/min ({metrics['results_per_min']} results/min)")
+    print(f"   {metrics['tokens_per_lead']} OpenAI tokens per result, accuracy {metrics['accuracy']}")
+    if "tiers" in metrics:
+        tiers = metrics["tiers"]
+        print(f"   Judged from post body: {tiers['snippet']}, escalated to the page: {tiers['escalated']}, "
+              f"page only: {tiers['page']}")
+    for stage in STAGES:
+        stats = metrics["stages"][stage]
+        print(f"   {stage:<8} {stats['count']:>4} calls   p50 {stats['p50_ms']:>8} ms   p95 {stats['p95_ms']:>8} ms")
+    if "jobs" in metrics:
+        jobs = metrics["jobs"]
+        print(f"   {'job':<8} {jobs['count']:>4} runs    p50 {jobs['p50_ms']:>8} ms   p95 {jobs['p95_ms']:>8} ms")
+    calls = ", ".join(f"{service} {count}" for service, count in metrics["external_calls"].items())
+    errors = sum(metrics["injected_errors"].values())
+    print(f"   External calls: {calls} ({errors} injected errors)")
+    if metrics.get("peak_rss_mb") is not None:
+        print(f"   Peak memory: {metrics['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against local stand-in services")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--jobs", type=int, default=3, help="concurrent searches in the api scenario")
+    parser.add_argument("--location", default=DEFAULT_LOCATION,
+                        help="location of the api scenario's searches, e.g. 'Triangle' or 'Durham, NC; Cary, NC'")
+    parser.add_argument("--mode", choices=("async", "sequential"), help="pipeline mode (default: PIPELINE_MODE)")
+    parser.add_argument("--latency", help="seconds per call, e.g. 'openai=0.8,pages=0.2' or '0' "
+                                          f"(default {','.join(f'{k}={v}' for k, v in DEFAULT_LATENCY.items())})")
+    parser.add_argument("--errors", help="injected failure rate per service, e.g. 'pages=0.1,openai=0.05'")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures")
+    parser.add_argument("--page-kb", type=int, default=50, help="size of each fake page")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="environment override for the scenarios, e.g. QUALIFY_TOKEN_BUDGET=150")
+    parser.add_argument("--label", default="", help="name stored with the run")
+    parser.add_argument("--results", default=BENCHMARK_RESULTS_PATH, help="JSONL file runs are appended to")
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the results file")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a scenario is abandoned")
+    parser.add_argument("--verbose", action="store_true", help="show the scenarios' own output")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    latency = parse_rates(args.latency, DEFAULT_LATENCY)
+    errors = parse_rates(args.errors)
+    args.overrides = dict(override.split("=", 1) for override in args.set)
+    settings = {"latency": latency, "errors": errors, "error_status": args.error_status, "page_kb": args.page_kb,
+                "jobs": args.jobs, "mode": args.mode or os.getenv("PIPELINE_MODE", "async")}
+    if args.location != DEFAULT_LOCATION:
+        settings["location"] = args.location
+    if args.overrides:
+        settings["env"] = args.overrides
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+
+    services = FakeServices(latency=latency, errors=errors, error_status=args.error_status,
+                            page_kb=args.page_kb).start()
+    print(f"🧪 Fake services on {services.base_url}")
+    try:
+        results = {}
+        for name in scenarios:
+            print(f"⏱️  Running {name} scenario...")
+            results[name] = run_scenario(name, services, args)
+            print_report(name, results[name])
+    finally:
+        services.stop()
+
+    runs = load_runs(args.results)
+    baseline = find_baseline(runs, settings)
+    regressions = 0
+    if baseline:
+        print(f"\n🔁 Compared with {baseline['timestamp']} ({baseline.get('commit') or 'unknown commit'}"
+              f"{', ' + baseline['label'] if baseline.get('label') else ''})")
+        for name, metrics in results.items():
+            if name not in baseline["scenarios"]:
+                continue
+            for metric, old, new, regressed in compare(metrics, baseline["scenarios"][name]):
+                change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+                marker = "⚠️ " if regressed else "  "
+                print(f"   {marker}{name:<4} {metric:<16} {old:>10} → {new:<10} ({change})")
+                regressions += regressed
+        print(f"\n{'⚠️  ' + str(regressions) + ' regressions' if regressions else '✅ No regressions'}")
+    else:
+        print("\nℹ️  No earlier run with these settings to compare against")
+
+    if not args.no_save:
+        run = {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+               "label": args.label, "settings": settings, "scenarios": results}
+        with open(args.results, "a") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"💾 Saved run to {args.results}")
+
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for LeadGeneratorAI
+Imports modules in fresh interpreters (like a cold start or a new worker
+process) and reports the median time and which heavy libraries got loaded.
+
+Usage:
+    python benchmark_import.py                       # lead_finder, api_server, worker
+    python benchmark_import.py lead_finder --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["openai", "bs4", "requests", "dotenv", "flask"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module, runs):
+    """Import module in `runs` fresh interpreters; returns (median ms, heavy modules loaded)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=here, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+    return statistics.median(samples), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time")
+    parser.add_argument("modules", nargs="*", default=["lead_finder", "api_server", "worker"])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"⏱️  Import time, median of {args.runs} fresh interpreters\n")
+    for module in args.modules:
+        median, loaded = time_import(module, args.runs)
+        print(f"   {module:<14} {median:8.1f} ms   loaded: {', '.join(loaded) or 'nothing heavy'}")
+
+
+if __name__ == "__main__":
+    main()
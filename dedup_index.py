@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for LeadGeneratorAI
+Shingled MinHash signatures with LSH banding, persisted in SQLite so reposts
+and cross-posts are recognized across every job and run. Insert and query
+touch only BANDS index buckets, regardless of how many posts have been seen.
+"""
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+
+# === CONFIGURATION ===
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "dedup_index.db")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))  # estimated Jaccard to count as a duplicate
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "8"))  # post text needed before a result is fingerprinted
+NUM_PERM = 64
+BANDS = 16  # 16 bands × 4 rows: pairs above ~0.5 Jaccard almost always share a bucket
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed so signatures stay comparable across runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_TOKEN = re.compile(r"\w+")
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Word n-gram shingles of the normalized text (shorter texts fall back to smaller n)"""
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return set()
+    size = min(size, len(tokens))
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def jaccard(text1, text2):
+    set1, set2 = shingles(text1), shingles(text2)
+    if not set1 or not set2:
+        return 0.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature, or None for empty text"""
+    hashes = [_hash64(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return array("Q", (min(((a * h + b) % _MERSENNE) for h in hashes) for a, b in _PERMUTATIONS))
+
+
+def estimate_similarity(signature1, signature2):
+    return sum(1 for x, y in zip(signature1, signature2) if x == y) / NUM_PERM
+
+
+def band_keys(signature):
+    """One bucket key per band, as signed 64-bit ints for SQLite"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<H{ROWS}Q", band, *chunk), digest_size=8).digest()
+        keys.append(struct.unpack("<q", digest)[0])
+    return keys
+
+
+class DedupIndex:
+    """Persistent MinHash/LSH index of every post we've seen"""
+
+    def __init__(self, path=DEDUP_INDEX_PATH, threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                added_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, doc_id TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets(bucket)")
+        self.conn.commit()
+
+    def _query(self, doc_id, signature, keys):
+        placeholders = ",".join("?" * len(keys))
+        rows = self.conn.execute(
+            f"SELECT DISTINCT d.doc_id, d.signature FROM buckets b JOIN docs d ON d.doc_id = b.doc_id "
+            f"WHERE b.bucket IN ({placeholders}) AND b.doc_id != ?",
+            (*keys, doc_id),
+        ).fetchall()
+        best_id, best_score = None, 0.0
+        for candidate_id, blob in rows:
+            score = estimate_similarity(signature, array("Q", blob))
+            if score >= self.threshold and score > best_score:
+                best_id, best_score = candidate_id, score
+        return best_id
+
+    def find_duplicate(self, doc_id, text):
+        """Return the id of a previously seen near-duplicate (other than doc_id itself), or None"""
+        signature = minhash(text)
+        if signature is None:
+            return None
+        with self.lock:
+            return self._query(doc_id, signature, band_keys(signature))
+
+    def add(self, doc_id, text):
+        signature = minhash(text)
+        if signature is None:
+            return
+        with self.lock:
+            self._insert(doc_id, signature, band_keys(signature))
+            self.conn.commit()
+
+    def _insert(self, doc_id, signature, keys):
+        if self.conn.execute("SELECT 1 FROM docs WHERE doc_id = ?", (doc_id,)).fetchone():
+            return
+        self.conn.execute("INSERT INTO docs (doc_id, signature, added_at) VALUES (?, ?, ?)",
+                          (doc_id, signature.tobytes(), time.time()))
+        self.conn.executemany("INSERT INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                              [(key, doc_id) for key in keys])
+
+    def check_and_add(self, doc_id, text):
+        """Return the id of a near-duplicate if there is one; otherwise index this post and return None.
+        Seeing the same doc_id again is not a duplicate (its verdict comes from the cache)."""
+        signature = minhash(text)
+        if signature is None:
+            return None
+        keys = band_keys(signature)
+        with self.lock:
+            duplicate_of = self._query(doc_id, signature, keys)
+            if duplicate_of is not None:
+                self.duplicates += 1
+                return duplicate_of
+            self._insert(doc_id, signature, keys)
+            self.conn.commit()
+            return None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "documents": self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0],
+                "duplicates_dropped": self.duplicates,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_dedup_index():
+    """Process-wide index, opened on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DedupIndex()
+        return _index
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the services LeadGeneratorAI calls
+One HTTP server plays Google Custom Search, Reddit search JSON, the pages they
+link to and the OpenAI chat API, answering from benchmark_fixtures.json with
+configurable latency and injected errors. Used by benchmark.py; point the app at
+it with GOOGLE_CSE_URL, REDDIT_BASE_URL, REDDIT_LINK_URL and OPENAI_BASE_URL.
+
+Usage:
+    python fake_services.py --port 8765 --latency openai=0.5 --errors pages=0.1
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures.json")
+SERVICES = ("cse", "reddit", "pages", "openai")
+
+# Typical round trips for the real services, in seconds
+DEFAULT_LATENCY = {"cse": 0.15, "reddit": 0.3, "pages": 0.1, "openai": 0.6}
+
+# Sidebar and menu text that pages without <main>/<article> put before the post
+PAGE_CHROME = [
+    "Skip to main content", "Log In", "Get App", "Expand user menu", "r/durham", "Join", "Sort by: Best",
+    "Community rules", "1. Be civil and respectful to other users, even when you disagree.",
+    "2. No spam, self-promotion or advertising. Businesses may post once a month in the megathread.",
+    "3. Posts must relate to the Durham area. Questions about other cities belong in their subreddits.",
+    "4. No personal information. Do not post addresses, phone numbers or license plates.",
+    "Members 120K", "Online 312", "Moderators", "Message the mods", "Related communities",
+    "r/raleigh - Raleigh, North Carolina", "r/chapelhill - Chapel Hill and Carrboro", "r/bullcity",
+    "Popular posts this week", "Best BBQ in town? The annual thread is back",
+    "Traffic on 147 this morning was unreal", "Farmers market moves indoors for the winter",
+    "Anyone else lose power last night near Duke Park?", "New ramen place opening on Ninth Street",
+    "Lost dog found near the Eno River trail, brown lab mix with a blue collar",
+    "Durham Bulls schedule is out, who's going to opening night?",
+    "PSA: street sweeping starts Monday in Trinity Park, move your cars",
+]
+
+BATCH_ITEM = re.compile(r"--- ITEM (\d+) START ---\n(.*?)\n--- ITEM \1 END ---", re.DOTALL)
+SINGLE_ITEM = re.compile(r"--- START ---\n(.*?)\n--- END ---", re.DOTALL)
+
+
+def parse_rates(spec, defaults=None):
+    """'openai=0.5,pages=0.1' (or one number for every service) -> {service: float}"""
+    rates = dict(defaults or {service: 0.0 for service in SERVICES})
+    if not spec:
+        return rates
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if not value:
+            rates = {service: float(name) for service in SERVICES}
+        elif name.strip() in SERVICES:
+            rates[name.strip()] = float(value)
+        else:
+            raise ValueError(f"Unknown service '{name}' (expected one of {', '.join(SERVICES)})")
+    return rates
+
+
+def cse_snippet(body, limit=150):
+    """Like Google: short text whole, longer text cut off with an ellipsis"""
+    return body if len(body) <= limit else body[:limit].rstrip() + " ..."
+
+
+def evidence(post):
+    """The sentence a model has to see to judge the post: the first one of its body"""
+    return re.split(r"(?<=[.!?])\s+", post["body"])[0]
+
+
+def slugify(title):
+    return re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")[:40]
+
+
+class FakeServices:
+    """
+    Threaded HTTP server answering:
+      GET  /customsearch/v1?q=...&num=...    Google Custom Search items
+      GET  /r/<sub>/search.json?q=...        Reddit listing
+      GET  /r/<sub>/new.json?limit=&after=   the first `published` posts, newest first
+      GET  /pages/<id>, /r/<sub>/comments/<id>/<slug>/    HTML post pages
+      POST /v1/chat/completions              OpenAI verdicts from the fixtures
+
+    Search results are picked deterministically from the query text, so
+    overlapping queries return overlapping posts like the real providers do.
+    """
+
+    def __init__(self, latency=None, errors=None, error_status=500, cse_empty_rate=0.25,
+                 page_kb=50, seed=1, fixtures_path=FIXTURES_PATH, port=0):
+        with open(fixtures_path) as f:
+            self.posts = json.load(f)["posts"]
+        self.by_id = {post["id"]: post for post in self.posts}
+        self.latency = parse_rates(None, DEFAULT_LATENCY) if latency is None else latency
+        self.errors = errors or {service: 0.0 for service in SERVICES}
+        self.error_status = error_status
+        self.cse_empty_rate = cse_empty_rate
+        self.padding = "<!-- " + "x" * max(page_kb * 1024 - 2048, 0) + " -->"
+        self.published = len(self.posts)  # raise it to "post" more fixtures to /new
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def env(self):
+        """Environment variables that point LeadGeneratorAI at these stand-ins"""
+        return {
+            "GOOGLE_API_KEY": "fake-google-key",
+            "GOOGLE_CSE_ID": "fake-cse-id",
+            "GOOGLE_CSE_URL": f"{self.base_url}/customsearch/v1",
+            "REDDIT_BASE_URL": self.base_url,
+            "REDDIT_LINK_URL": self.base_url,
+            "OPENAI_API_KEY": "sk-fake",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # === Counters ===
+    def reset(self):
+        with self.lock:
+            self.calls = {service: 0 for service in SERVICES}
+            self.injected_errors = {service: 0 for service in SERVICES}
+
+    def stats(self):
+        with self.lock:
+            return {"calls": dict(self.calls), "injected_errors": dict(self.injected_errors)}
+
+    def begin(self, service):
+        """Count the call, sleep its latency and decide whether it fails. Returns True to fail."""
+        with self.lock:
+            self.calls[service] += 1
+            delay = self.latency.get(service, 0.0) * self.random.uniform(0.5, 1.5)
+            fail = self.random.random() < self.errors.get(service, 0.0)
+            if fail:
+                self.injected_errors[service] += 1
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    # === Fixture answers ===
+    def pick_posts(self, query, count):
+        digest = hashlib.sha256(query.encode()).digest()
+        start = digest[0] % len(self.posts)
+        step = 1 + digest[1] % 3
+        picked = []
+        for index in range(len(self.posts)):
+            post = self.posts[(start + index * step) % len(self.posts)]
+            if post not in picked:
+                picked.append(post)
+            if len(picked) >= count:
+                break
+        return picked
+
+    def search_items(self, query, num):
+        digest = hashlib.sha256(b"empty:" + query.encode()).digest()
+        if digest[0] / 256 < self.cse_empty_rate:
+            return []
+        return [{"title": post["title"], "link": f"{self.base_url}/pages/{post['id']}",
+                 "snippet": cse_snippet(post["body"])} for post in self.pick_posts(query, num)]
+
+    def reddit_post(self, post, subreddit="durham"):
+        return {"kind": "t3", "data": {
+            "name": f"t3_{post['id']}",
+            "title": post["title"],
+            "selftext": post["body"],
+            "permalink": f"/r/{subreddit}/comments/{post['id']}/{slugify(post['title'])}/",
+        }}
+
+    def reddit_listing(self, query, limit, subreddit="durham"):
+        children = [self.reddit_post(post, subreddit) for post in self.pick_posts("reddit:" + query, limit)]
+        return {"kind": "Listing", "data": {"children": children}}
+
+    def new_listing(self, limit, after=None, subreddit="durham"):
+        newest_first = [self.reddit_post(post, subreddit) for post in reversed(self.posts[:self.published])]
+        if after:
+            names = [child["data"]["name"] for child in newest_first]
+            newest_first = newest_first[names.index(after) + 1:] if after in names else []
+        children = newest_first[:limit]
+        last = children[-1]["data"]["name"] if len(children) == limit else None
+        return {"kind": "Listing", "data": {"children": children, "after": last}}
+
+    def page_html(self, post):
+        if int(re.sub(r"\D", "", post["id"]) or 0) % 2 == 0:
+            # No semantic containers: extraction falls back to the whole body, sidebar first
+            chrome = "\n".join(f"<div>{line}</div>" for line in PAGE_CHROME)
+            return f"""<!DOCTYPE html>
+<html><head><title>{post['title']}</title></head>
+<body>
+<div class="sidebar">{chrome}</div>
+<div class="thread"><h1>{post['title']}</h1><div>{post['body']}</div></div>
+<div class="comments"><div>Following, I need one too</div><div>Sort by: Best</div></div>
+{self.padding}
+</body></html>"""
+        return f"""<!DOCTYPE html>
+<html><head><title>{post['title']}</title>
+<script>window.__STATE__ = {{"tracking": true}};</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body>
+<header><nav><a href="/">Home</a> <a href="/r/durham">r/durham</a> <a href="/login">Log in</a></nav></header>
+<main><article><h1>{post['title']}</h1><p>{post['body']}</p></article></main>
+<aside>Related communities: r/raleigh, r/chapelhill, r/triangle</aside>
+<footer>User agreement | Privacy policy</footer>
+{self.padding}
+</body></html>"""
+
+    def verdict(self, text):
+        """The fixture's label, but only if the request itself was sent; a title alone gets an Unsure"""
+        flat = " ".join(text.split())
+        for post in self.posts:
+            if post["title"] in flat:
+                if evidence(post) not in flat:
+                    return "Unsure - Not enough information to tell whether this is a customer request"
+                return f"{'Yes' if post['lead'] else 'No'} - {post['reason']}"
+        return "No - Not a customer looking for our services"
+
+    def chat_reply(self, prompt):
+        items = BATCH_ITEM.findall(prompt)
+        if items:
+            return "\n".join(f"{number}. {self.verdict(text)}" for number, text in items)
+        match = SINGLE_ITEM.search(prompt)
+        return self.verdict(match.group(1) if match else prompt)
+
+    def make_handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, status, body, content_type="application/json"):
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_error_body(self):
+                self.send_body(services.error_status, json.dumps({"error": {
+                    "message": "Injected failure", "type": "server_error", "code": services.error_status}}))
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {name: values[0] for name, values in parse_qs(url.query).items()}
+                if url.path == "/customsearch/v1":
+                    if services.begin("cse"):
+                        return self.send_error_body()
+                    items = services.search_items(params.get("q", ""), int(params.get("num", 10)))
+                    return self.send_body(200, json.dumps({"items": items}))
+                listing = re.match(r"^/r/(\w+)/(search|new)\.json$", url.path)
+                if listing:
+                    if services.begin("reddit"):
+                        return self.send_error_body()
+                    subreddit, limit = listing.group(1), int(params.get("limit", 25))
+                    if listing.group(2) == "search":
+                        body = services.reddit_listing(params.get("q", ""), limit, subreddit)
+                    else:
+                        body = services.new_listing(limit, params.get("after"), subreddit)
+                    return self.send_body(200, json.dumps(body))
+                match = re.match(r"^/(?:pages|r/\w+/comments)/(\w+)", url.path)
+                if match and match.group(1) in services.by_id:
+                    if services.begin("pages"):
+                        return self.send_error_body()
+                    return self.send_body(200, services.page_html(services.by_id[match.group(1)]),
+                                          "text/html; charset=utf-8")
+                self.send_body(404, json.dumps({"error": "not found"}))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if urlsplit(self.path).path != "/v1/chat/completions":
+                    return self.send_body(404, json.dumps({"error": "not found"}))
+                if services.begin("openai"):
+                    return self.send_error_body()
+                request = json.loads(body or b"{}")
+                prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+                reply = services.chat_reply(prompt)
+                prompt_tokens = len(prompt) // 4
+                completion_tokens = len(reply) // 4
+                self.send_body(200, json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "gpt-3.5-turbo"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for Google CSE, Reddit, pages and OpenAI")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", help="seconds per call, e.g. 'openai=0.5,pages=0.1' or '0'")
+    parser.add_argument("--errors", help="failure rate per service, e.g. 'pages=0.1'")
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    services = FakeServices(latency=parse_rates(args.latency, DEFAULT_LATENCY), errors=parse_rates(args.errors),
+                            error_status=args.error_status, port=args.port)
+    print(f"🧪 Fake services listening on {services.base_url}")
+    for name, value in services.env().items():
+        print(f"   {name}={value}")
+    services.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
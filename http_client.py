@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client layer for LeadGeneratorAI
+One pooled requests.Session (per-host keep-alive pools, retries, compression,
+connect/read timeouts) used by every search and page fetcher, plus connection-reuse
+and latency stats for /api/health. The OpenAI SDK talks over its own httpx pool;
+openai_http_client() only gives it the same timeouts, and its calls show up in the
+latency stats but not in the connection stats.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+from metrics import observe_request
+
+# === CONFIGURATION ===
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "50"))  # hosts kept in the pool manager
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "0"))  # keep-alive connections per host; 0 = sized from the pipeline
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+# brotli is only advertised when a decoder is installed
+ACCEPT_ENCODING = "gzip, deflate, br" if (
+    importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi")
+) else "gzip, deflate"
+
+
+def pipeline_pool_size():
+    """Connections one host can need at once: a job's search and scrape workers, widened
+    for every location like PipelineConfig.fan_out does"""
+    from pipeline import SEARCH_CONCURRENCY, SCRAPE_CONCURRENCY, LOCATION_FANOUT_MAX
+    return (SEARCH_CONCURRENCY + SCRAPE_CONCURRENCY) * max(1, LOCATION_FANOUT_MAX)
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class HttpClient:
+    """
+    Thread-safe wrapper around one requests.Session.
+    urllib3's pools are thread-safe; cookies are disabled so concurrent
+    SearchJobs never share or race on session state.
+    """
+
+    def __init__(self, pool_hosts=HTTP_POOL_HOSTS, pool_size=None, retries=HTTP_RETRIES,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        # requests is imported here, not at module load, so importing lead_finder stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.pool_size = pool_size or HTTP_POOL_SIZE or pipeline_pool_size()
+        self.request_errors = requests.exceptions.RequestException
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers.update({"Accept-Encoding": ACCEPT_ENCODING})
+        # 429s are not retried here: rate_limiter honors their Retry-After for every job
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=0.5,
+                      status_forcelist=(500, 502, 503, 504), allowed_methods=("GET", "HEAD"),
+                      raise_on_status=False, respect_retry_after_header=True)
+        self.adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=self.pool_size,
+                                   max_retries=retry, pool_block=False)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def get(self, url, provider="web", **kwargs):
+        """GET through the shared session; provider labels the request in /api/metrics"""
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).hostname or ""
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except self.request_errors:
+            self.record(host, time.perf_counter() - start, error=True, provider=provider)
+            raise
+        self.record(host, time.perf_counter() - start, provider=provider, status=response.status_code)
+        return response
+
+    def record(self, host, seconds, error=False, provider="web", status=None):
+        """Add one request's latency (until headers arrive) to the per-host stats and provider metrics"""
+        observe_request(provider, seconds, status=status, error=error)
+        with self.lock:
+            stats = self.hosts.setdefault(host, HostStats())
+            if error:
+                stats.errors += 1
+                return
+            stats.requests += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def connection_stats(self):
+        """Per-host requests vs. new connections, read from urllib3's pools"""
+        pools = {}
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            entry = pools.setdefault(pool.host, {"connections_opened": 0, "requests_sent": 0})
+            entry["connections_opened"] += pool.num_connections
+            entry["requests_sent"] += pool.num_requests
+        for entry in pools.values():
+            sent = entry["requests_sent"]
+            entry["reuse_rate"] = round(1 - entry["connections_opened"] / sent, 3) if sent else 0.0
+        return pools
+
+    def stats(self):
+        with self.lock:
+            latency = {
+                host: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "avg_ms": round(1000 * stats.total_seconds / stats.requests, 1) if stats.requests else 0.0,
+                    "max_ms": round(1000 * stats.max_seconds, 1),
+                }
+                for host, stats in self.hosts.items()
+            }
+        return {"latency": latency, "connections": self.connection_stats(), "pool_size": self.pool_size}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """Process-wide client shared by all fetchers and SearchJob threads"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def http_get(url, **kwargs):
+    return get_http_client().get(url, **kwargs)
+
+
+def openai_http_client():
+    """httpx client for the OpenAI SDK with our connect/read timeouts. It is not the shared
+    session above: the SDK keeps its own keep-alive pool."""
+    from openai import DefaultHttpxClient, Timeout
+    return DefaultHttpxClient(timeout=Timeout(OPENAI_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT))
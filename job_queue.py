@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Durable job queue for LeadGeneratorAI
+With JOB_BACKEND=queue the API only enqueues searches here; worker processes
+(python worker.py) claim them with a renewable lease, report progress into the
+same SQLite file and write leads to lead_store. Jobs survive API and worker
+restarts: a job whose worker stops renewing its lease goes back to the queue.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from job_scheduler import DEFAULT_JOB_SECONDS, JOB_COALESCE_SECONDS, JOB_QUEUE_LIMIT, PRIORITIES
+
+# === CONFIGURATION ===
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.db")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+FINISHED_STATUSES = ("completed", "error", "cancelled")
+
+COLUMNS = ["search_id", "search_terms", "location", "mode", "priority", "job_key", "status", "progress",
+           "current_query", "worker_id", "lease_until", "attempts", "created_at", "started_at",
+           "finished_at", "scrapes_avoided", "pages_fetched"]
+# Job fields a worker writes back while it runs
+REPORTED_FIELDS = ("status", "progress", "current_query", "scrapes_avoided", "pages_fetched")
+
+
+class JobQueue:
+    def __init__(self, path=JOB_QUEUE_PATH, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS,
+                 queue_limit=JOB_QUEUE_LIMIT, coalesce_seconds=JOB_COALESCE_SECONDS, clock=time.time):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.queue_limit = queue_limit
+        self.coalesce_seconds = coalesce_seconds
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                search_id TEXT PRIMARY KEY,
+                search_terms TEXT NOT NULL,
+                location TEXT NOT NULL,
+                mode TEXT,
+                priority INTEGER NOT NULL,
+                job_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                current_query TEXT NOT NULL DEFAULT '',
+                worker_id TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                scrapes_avoided INTEGER NOT NULL DEFAULT 0,
+                pages_fetched INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("scrapes_avoided", "pages_fetched"):
+            if column not in existing:  # databases created before these columns existed
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, priority, created_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs(job_key, created_at)")
+
+    def _transaction(self, fn):
+        """Run fn() inside BEGIN IMMEDIATE so claims from several processes never overlap"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self.conn.execute("COMMIT")
+                return result
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _row(self, row):
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def _position(self, rank, created_at):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND created_at <= ?))",
+            (rank, rank, created_at),
+        ).fetchone()[0]
+
+    # === API side ===
+    def enqueue(self, search_id, search_terms, location, mode, priority, key):
+        """Returns (job, outcome, position) like JobScheduler.submit; job is a row dict"""
+        encoded_key = "\x1f".join(key)
+        rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+
+        def insert():
+            now = self.clock()
+            existing = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE job_key = ? AND (status IN ('queued', 'running') "
+                f"OR (status = 'completed' AND finished_at >= ?)) ORDER BY created_at DESC LIMIT 1",
+                (encoded_key, now - self.coalesce_seconds),
+            ).fetchone()
+            if existing:
+                job = self._row(existing)
+                position = self._position(job["priority"], job["created_at"]) if job["status"] == "queued" else 0
+                return job, "attached", position
+
+            depth = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.queue_limit:
+                return None, "full", self._position(rank, now) + 1
+
+            self.conn.execute(
+                "INSERT INTO jobs (search_id, search_terms, location, mode, priority, job_key, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (search_id, search_terms, location, mode, rank, encoded_key, now),
+            )
+            return self.get(search_id), "queued", self._position(rank, now)
+
+        return self._transaction(insert)
+
+    def get(self, search_id):
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE search_id = ?", (search_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def cancel(self, search_id):
+        """Mark a queued or running job cancelled; its worker notices on the next heartbeat"""
+        def mark():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE search_id = ? "
+                "AND status IN ('queued', 'running')",
+                (self.clock(), search_id),
+            )
+            return cursor.rowcount > 0
+        return self._transaction(mark)
+
+    def queued_jobs(self, limit=100):
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE status = 'queued' ORDER BY priority, created_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    # === Worker side ===
+    def claim(self, worker_id):
+        """Lease the next job (queued, or running with an expired lease). Returns a row dict or None."""
+        def take():
+            now = self.clock()
+            self.conn.execute(
+                "UPDATE jobs SET status = 'error', finished_at = ?, "
+                "current_query = 'Error: worker stopped responding too many times' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT search_id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?) WHERE search_id = ?",
+                (worker_id, now + self.lease_seconds, now, row[0]),
+            )
+            return self.get(row[0])
+        return self._transaction(take)
+
+    def heartbeat(self, search_id, worker_id):
+        """Renew the lease. Returns False when the job was cancelled or taken over."""
+        def renew():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE search_id = ? AND worker_id = ? AND status = 'running'",
+                (self.clock() + self.lease_seconds, search_id, worker_id),
+            )
+            return cursor.rowcount > 0
+        return self._transaction(renew)
+
+    def report(self, search_id, worker_id, **fields):
+        """Write status/progress/current_query and scrape counts from the worker that holds the lease"""
+        fields = {name: value for name, value in fields.items() if name in REPORTED_FIELDS}
+        if not fields:
+            return
+        if fields.get("status") in FINISHED_STATUSES:
+            fields["finished_at"] = self.clock()
+
+        def write():
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            self.conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE search_id = ? AND worker_id = ? AND status = 'running'",
+                (*fields.values(), search_id, worker_id),
+            )
+        self._transaction(write)
+
+    def estimated_wait(self, position):
+        """Seconds until a job at this queue position starts, from past job times and live workers"""
+        with self.lock:
+            average = self.conn.execute(
+                "SELECT AVG(finished_at - started_at) FROM jobs WHERE status = 'completed' AND started_at IS NOT NULL"
+            ).fetchone()[0]
+            workers = self.conn.execute(
+                "SELECT COUNT(DISTINCT worker_id) FROM jobs WHERE status = 'running' AND lease_until >= ?",
+                (self.clock(),),
+            ).fetchone()[0]
+        return round((average or DEFAULT_JOB_SECONDS) * max(position, 0) / max(workers, 1), 1)
+
+    def stats(self):
+        now = self.clock()
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            workers = self.conn.execute(
+                "SELECT COUNT(DISTINCT worker_id) FROM jobs WHERE status = 'running' AND lease_until >= ?", (now,)
+            ).fetchone()[0]
+        return {
+            "backend": "queue",
+            "busy_workers": workers,
+            "queue_depth": counts.get("queued", 0),
+            "queue_limit": self.queue_limit,
+            "running": counts.get("running", 0),
+            "completed": counts.get("completed", 0),
+            "errors": counts.get("error", 0),
+            "cancelled": counts.get("cancelled", 0),
+        }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Process-wide queue connection, opened on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Bounded job scheduler for LeadGeneratorAI
+A fixed pool of worker threads runs searches from a priority queue. The queue
+has a depth limit (callers get a position estimate instead of a new thread),
+and a search with the same normalized terms and location as a queued, running
+or recently finished job attaches to that job instead of crawling again.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# === CONFIGURATION ===
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "20"))
+JOB_COALESCE_SECONDS = float(os.getenv("JOB_COALESCE_SECONDS", "600"))
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_JOB_SECONDS = 120.0  # wait estimate until a job has finished
+
+
+def job_key(search_terms, location):
+    """Searches with the same normalized terms and location produce the same leads"""
+    return (" ".join((search_terms or "").lower().split()), " ".join((location or "").lower().split()))
+
+
+class JobScheduler:
+    def __init__(self, run_job, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT,
+                 coalesce_seconds=JOB_COALESCE_SECONDS, clock=time.monotonic):
+        self.run_job = run_job
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.coalesce_seconds = coalesce_seconds
+        self.clock = clock
+        self.lock = threading.Condition()
+        self.queue = []  # heap of (priority, order, key, job)
+        self.order = itertools.count()
+        self.by_key = {}  # key -> [job, state, finished_at]; state is queued/running/finished
+        self.running = 0
+        self.run_starts = {}  # id(job) -> start time, for utilization of jobs still running
+        self.threads = []
+        self.started_at = clock()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        with self.lock:
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"search-worker-{len(self.threads) + 1}",
+                                          daemon=True)
+                self.threads.append(thread)
+                thread.start()
+
+    # === Submitting ===
+    def submit(self, job, key, priority="normal", can_attach=None):
+        """
+        Queue a job. Returns (job, outcome, position):
+        outcome "queued" (position = 1-based place in line, 0 if a worker is free),
+        "attached" (job is the existing equivalent job) or "full" (nothing queued;
+        position = where it would have been).
+        can_attach(existing_job) can veto reuse, e.g. of failed jobs.
+        """
+        self.start()
+        with self.lock:
+            entry = self.by_key.get(key)
+            if entry is not None and self._reusable(entry) and (can_attach is None or can_attach(entry[0])):
+                self.coalesced += 1
+                return entry[0], "attached", self._position(entry[0])
+
+            rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+            ahead = sum(1 for queued in self.queue if queued[0] <= rank)
+            if len(self.queue) >= self.queue_limit:
+                self.rejected += 1
+                return None, "full", ahead + 1
+
+            heapq.heappush(self.queue, (rank, next(self.order), key, job))
+            self.by_key[key] = [job, "queued", None]
+            self.submitted += 1
+            self.lock.notify()
+            return job, "queued", 0 if self.running + ahead < self.workers else ahead + 1
+
+    def _reusable(self, entry):
+        job, state, finished_at = entry
+        if state != "finished":
+            return True
+        return self.clock() - finished_at <= self.coalesce_seconds
+
+    def _position(self, job):
+        ordered = sorted(self.queue)
+        for index, queued in enumerate(ordered):
+            if queued[3] is job:
+                return index + 1
+        return 0
+
+    def discard(self, job):
+        """Drop a queued job (e.g. cancelled before a worker picked it up)"""
+        with self.lock:
+            remaining = [queued for queued in self.queue if queued[3] is not job]
+            if len(remaining) != len(self.queue):
+                self.queue = remaining
+                heapq.heapify(self.queue)
+            for key, entry in list(self.by_key.items()):
+                if entry[0] is job:
+                    del self.by_key[key]
+
+    def estimated_wait(self, position):
+        """Seconds until a job at this queue position starts, from average job time"""
+        with self.lock:
+            average = self.busy_seconds / self.completed if self.completed else DEFAULT_JOB_SECONDS
+        return round(average * max(position, 0) / max(self.workers, 1), 1)
+
+    # === Workers ===
+    def _work(self):
+        while True:
+            with self.lock:
+                while not self.queue:
+                    self.lock.wait()
+                _, _, key, job = heapq.heappop(self.queue)
+                entry = self.by_key.get(key)
+                if entry is not None and entry[0] is job:
+                    entry[1] = "running"
+                self.running += 1
+                start = self.clock()
+                self.run_starts[id(job)] = start
+
+            try:
+                self.run_job(job)
+            except Exception as e:
+                print(f"Search worker error: {e}")
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.run_starts.pop(id(job), None)
+                    self.completed += 1
+                    self.busy_seconds += self.clock() - start
+                    entry = self.by_key.get(key)
+                    if entry is not None and entry[0] is job:
+                        entry[1], entry[2] = "finished", self.clock()
+                    self._forget_expired()
+
+    def _forget_expired(self):
+        now = self.clock()
+        for key, entry in list(self.by_key.items()):
+            if entry[1] == "finished" and now - entry[2] > self.coalesce_seconds:
+                del self.by_key[key]
+
+    def queued_jobs(self):
+        """Queued jobs in the order workers will take them"""
+        with self.lock:
+            return [queued[3] for queued in sorted(self.queue)]
+
+    def stats(self):
+        with self.lock:
+            now = self.clock()
+            uptime = max(now - self.started_at, 1e-9)
+            busy = self.busy_seconds + sum(now - start for start in self.run_starts.values())
+            return {
+                "workers": self.workers,
+                "busy_workers": self.running,
+                "utilization": round(min(1.0, busy / (uptime * self.workers)), 3),
+                "queue_depth": len(self.queue),
+                "queue_limit": self.queue_limit,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "avg_job_seconds": round(self.busy_seconds / self.completed, 1) if self.completed else None,
+            }
@@ -21,7 +21,7 @@ const Home = () => {
     
     try {
       // Import API functions
-      const { startSearch, getSearchStatus, getSearchResults } = await import('../services/api');
+      const { startSearch, getSearchStatus, getSearchResults, subscribeToSearch } = await import('../services/api');
       
       // Start the search
       const searchResponse = await startSearch(searchData);
@@ -29,37 +29,75 @@ const Home = () => {
       
       console.log('Search started with ID:', searchId);
       
-      // Poll for search status and results
-      const pollInterval = setInterval(async () => {
-        try {
-          const status = await getSearchStatus(searchId);
-          console.log('Search status:', status);
-          
-          // Get current results
-          const results = await getSearchResults(searchId);
-          setSearchResults(results.results || []);
-          
-          // Check if search is complete
-          if (status.status === 'completed' || status.status === 'error') {
-            clearInterval(pollInterval);
-            setIsSearching(false);
+      let since = 0; // seq of the last result we have
+      let attempt; // job attempt those results belong to; a retry replaces them
+      const finish = (status) => {
+        setIsSearching(false);
+        if (status.status === 'error') {
+          alert('Search completed with errors. Check console for details.');
+        }
+      };
+
+      // Fallback: poll for only the results added since the last poll
+      const poll = () => {
+        const pollInterval = setInterval(async () => {
+          try {
+            const status = await getSearchStatus(searchId);
+            console.log('Search status:', status);
             
-            if (status.status === 'error') {
-              alert('Search completed with errors. Check console for details.');
+            const results = await getSearchResults(searchId, false, since, attempt);
+            since = results.next_since;
+            attempt = results.attempt;
+            if (results.reset) {
+              setSearchResults(results.results);
+            } else if (results.results.length > 0) {
+              setSearchResults((previous) => [...previous, ...results.results]);
             }
+            
+            // Check if search is complete
+            if (status.status === 'completed' || status.status === 'error' || status.status === 'cancelled') {
+              clearInterval(pollInterval);
+              finish(status);
+            }
+            
+          } catch (error) {
+            console.error('Error polling search status:', error);
+            clearInterval(pollInterval);
+            setIsSearching(false);
+            alert('Error monitoring search progress');
           }
-          
-        } catch (error) {
-          console.error('Error polling search status:', error);
-          clearInterval(pollInterval);
-          setIsSearching(false);
-          alert('Error monitoring search progress');
+        }, 3000); // Poll every 3 seconds
+        return () => clearInterval(pollInterval);
+      };
+
+      // Push new leads and progress as they happen
+      let stop = subscribeToSearch(searchId, {
+        onLead: (lead, seq) => {
+          since = seq;
+          setSearchResults((previous) => [...previous, lead]);
+        },
+        onReset: (event) => {
+          attempt = event.attempt;
+          since = 0;
+          setSearchResults([]);
+        },
+        onProgress: (status) => {
+          attempt = attempt || status.attempt;
+          console.log('Search status:', status);
+        },
+        onDone: finish,
+        onError: () => {
+          console.warn('Event stream closed, falling back to polling');
+          stop = poll();
         }
-      }, 3000); // Poll every 3 seconds
+      }, since, attempt);
+      if (!stop) {
+        stop = poll();
+      }
       
-      // Set timeout to stop polling after 10 minutes
+      // Stop listening after 10 minutes
       setTimeout(() => {
-        clearInterval(pollInterval);
+        stop();
         setIsSearching(false);
       }, 600000);
       
@@ -35,14 +35,39 @@ export const getSearchStatus = async (searchId) => {
   return response.data;
 };
 
-// Get search results
-export const getSearchResults = async (searchId, qualifiedOnly = false) => {
+// Get search results (only those after `since` when given; pass back `next_since` and `attempt`).
+// `reset` in the response means a retry replaced the results: drop the old ones.
+export const getSearchResults = async (searchId, qualifiedOnly = false, since = 0, attempt = undefined) => {
   const response = await api.get(`/search/${searchId}/results`, {
-    params: { qualified_only: qualifiedOnly }
+    params: { qualified_only: qualifiedOnly, since, attempt }
   });
   return response.data;
 };
 
+// Stream new results and progress over Server-Sent Events.
+// Returns a function that closes the stream, or null if EventSource is unavailable.
+// onReset({ attempt }) means a retry replaced the results: drop the old ones.
+export const subscribeToSearch = (searchId, { onLead, onProgress, onDone, onError, onReset }, since = 0,
+                                  attempt = undefined) => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+  const attemptParam = attempt ? `&attempt=${attempt}` : '';
+  const source = new EventSource(`${API_BASE_URL}/search/${searchId}/events?since=${since}${attemptParam}`);
+  source.addEventListener('reset', (event) => onReset && onReset(JSON.parse(event.data)));
+  source.addEventListener('lead', (event) => onLead && onLead(JSON.parse(event.data), Number(event.lastEventId)));
+  source.addEventListener('progress', (event) => onProgress && onProgress(JSON.parse(event.data)));
+  source.addEventListener('done', (event) => {
+    source.close();
+    onDone && onDone(JSON.parse(event.data));
+  });
+  source.onerror = (error) => {
+    source.close();
+    onError && onError(error);
+  };
+  return () => source.close();
+};
+
 // Cancel search
 export const cancelSearch = async (searchId) => {
   const response = await api.post(`/search/${searchId}/cancel`);
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Local pre-classifier for LeadGeneratorAI
+A hashed word n-gram logistic regression, trained on the verdicts the LLM
+has already given, that rejects obvious non-leads before they reach OpenAI.
+
+Usage:
+    python lead_classifier.py train      # fit on lead_labels.jsonl and save the model
+    python lead_classifier.py evaluate   # recall vs. LLM labels and calls saved per threshold
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import zlib
+
+if __name__ == "__main__":
+    # Run as a script: load .env before the settings below are read
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# === CONFIGURATION ===
+LEAD_LABELS_PATH = os.getenv("LEAD_LABELS_PATH", "lead_labels.jsonl")
+LEAD_CLASSIFIER_PATH = os.getenv("LEAD_CLASSIFIER_PATH", "lead_classifier.json")
+# Pages scoring below this probability of being a lead are rejected without asking the LLM
+LEAD_CLASSIFIER_THRESHOLD = float(os.getenv("LEAD_CLASSIFIER_THRESHOLD", "0.05"))
+FEATURE_BITS = 18
+EVAL_THRESHOLDS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def extract_features(text, bits=FEATURE_BITS):
+    """Hashed unigram + bigram counts, L2-normalized"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    mask = (1 << bits) - 1
+    counts = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode("utf-8")) & mask
+        counts[index] = counts.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+
+def sigmoid(x):
+    if x < -35:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class LeadClassifier:
+    """Sparse logistic regression over hashed n-gram features"""
+
+    def __init__(self, weights=None, bias=0.0, bits=FEATURE_BITS):
+        self.weights = weights or {}
+        self.bias = bias
+        self.bits = bits
+
+    def predict_proba(self, text):
+        features = extract_features(text, self.bits)
+        score = self.bias + sum(self.weights.get(index, 0.0) * value for index, value in features.items())
+        return sigmoid(score)
+
+    def fit(self, examples, epochs=15, learning_rate=0.5, l2=1e-5, seed=0):
+        """examples: list of (text, is_lead). Positives are up-weighted to balance the classes."""
+        data = [(extract_features(text, self.bits), 1.0 if label else 0.0) for text, label in examples]
+        positives = sum(1 for _, label in data if label) or 1
+        negatives = (len(data) - positives) or 1
+        class_weight = {1.0: len(data) / (2.0 * positives), 0.0: len(data) / (2.0 * negatives)}
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1.0 + epoch)
+            for features, label in data:
+                score = self.bias + sum(self.weights.get(index, 0.0) * value for index, value in features.items())
+                gradient = (sigmoid(score) - label) * class_weight[label]
+                self.bias -= rate * gradient
+                for index, value in features.items():
+                    weight = self.weights.get(index, 0.0)
+                    self.weights[index] = weight - rate * (gradient * value + l2 * weight)
+        return self
+
+    def save(self, path=LEAD_CLASSIFIER_PATH):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "bits": self.bits,
+                "bias": self.bias,
+                "weights": {str(index): round(weight, 6) for index, weight in self.weights.items() if abs(weight) > 1e-6},
+            }, file)
+
+    @classmethod
+    def load(cls, path=LEAD_CLASSIFIER_PATH):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        weights = {int(index): weight for index, weight in data["weights"].items()}
+        return cls(weights, data["bias"], data.get("bits", FEATURE_BITS))
+
+
+# === Labeled history ===
+_labels_lock = threading.Lock()
+
+def record_label(text, is_lead, reason, path=LEAD_LABELS_PATH):
+    """Append an LLM verdict to the training log"""
+    line = json.dumps({"text": text, "is_lead": bool(is_lead), "reason": reason}, ensure_ascii=False)
+    with _labels_lock:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+def load_labels(path=LEAD_LABELS_PATH):
+    """Read (text, is_lead) pairs; the label comes from the ai_reason verdict when present"""
+    examples = []
+    if not os.path.isfile(path):
+        return examples
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            reason = (row.get("reason") or "").strip().lower()
+            if reason.startswith("yes"):
+                label = True
+            elif reason.startswith("no"):
+                label = False
+            else:
+                label = bool(row.get("is_lead"))
+            if row.get("text"):
+                examples.append((row["text"], label))
+    return examples
+
+
+# === Gate used by is_good_lead ===
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+def get_classifier():
+    """The trained model, or None if none has been trained yet"""
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            if os.path.isfile(LEAD_CLASSIFIER_PATH):
+                _model = LeadClassifier.load(LEAD_CLASSIFIER_PATH)
+                print(f"🧠 Loaded local lead pre-classifier from {LEAD_CLASSIFIER_PATH}")
+        return _model
+
+
+def prefilter(text, threshold=None):
+    """Return a (False, reason) verdict for obvious non-leads, or None to ask the LLM"""
+    model = get_classifier()
+    if model is None:
+        return None
+    threshold = LEAD_CLASSIFIER_THRESHOLD if threshold is None else threshold
+    probability = model.predict_proba(text)
+    if probability < threshold:
+        return False, f"No - Rejected by local pre-classifier (p={probability:.3f})"
+    return None
+
+
+# === Offline training / evaluation ===
+def split_examples(examples, holdout=0.2):
+    """Deterministic train/test split by content hash"""
+    train, test = [], []
+    for example in examples:
+        bucket = zlib.crc32(example[0].encode("utf-8")) % 100
+        (test if bucket < holdout * 100 else train).append(example)
+    return train, test
+
+
+def evaluate(model, examples, thresholds=EVAL_THRESHOLDS):
+    """Recall of LLM-positive examples and share of LLM calls avoided at each threshold"""
+    scored = [(model.predict_proba(text), label) for text, label in examples]
+    positives = sum(1 for _, label in scored if label)
+    report = []
+    for threshold in thresholds:
+        rejected = [label for probability, label in scored if probability < threshold]
+        lost = sum(1 for label in rejected if label)
+        report.append({
+            "threshold": threshold,
+            "recall": (positives - lost) / positives if positives else 1.0,
+            "llm_calls_saved": len(rejected) / len(scored) if scored else 0.0,
+            "leads_lost": lost,
+        })
+    return report
+
+
+def print_report(report, total, positives):
+    print(f"📊 {total} held-out examples, {positives} LLM-qualified leads")
+    print(f"   {'threshold':>9}  {'recall':>7}  {'LLM calls saved':>15}  {'leads lost':>10}")
+    for row in report:
+        print(f"   {row['threshold']:>9.2f}  {row['recall']:>7.1%}  {row['llm_calls_saved']:>15.1%}  {row['leads_lost']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the local lead pre-classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--labels", default=LEAD_LABELS_PATH, help="JSONL of LLM verdicts")
+    parser.add_argument("--model", default=LEAD_CLASSIFIER_PATH, help="where the model is saved/loaded")
+    parser.add_argument("--epochs", type=int, default=15)
+    args = parser.parse_args()
+
+    examples = load_labels(args.labels)
+    if not examples:
+        print(f"❌ No labeled examples in {args.labels}. Run some searches first to collect LLM verdicts.")
+        return
+
+    train, test = split_examples(examples)
+    if args.command == "train":
+        print(f"🧠 Training on {len(train)} examples ({sum(1 for _, label in train if label)} leads)...")
+        model = LeadClassifier().fit(train, epochs=args.epochs)
+    else:
+        model = LeadClassifier.load(args.model)
+
+    print_report(evaluate(model, test), len(test), sum(1 for _, label in test if label))
+
+    if args.command == "train":
+        # Refit on everything before saving so no labeled data is wasted
+        model = LeadClassifier().fit(examples, epochs=args.epochs)
+        model.save(args.model)
+        print(f"✅ Saved model to {args.model} (gate threshold LEAD_CLASSIFIER_THRESHOLD={LEAD_CLASSIFIER_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Domain blocklist and irrelevant-keyword filter shared by lead_finder and api_server
+Each URL's host is parsed once and walked through a suffix trie of blocked
+domains (with optional path prefixes); keywords are matched by one compiled
+regex, so large lists still cost microseconds per candidate.
+"""
+
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+# === CONFIGURATION ===
+FILTERS_PATH = os.getenv("FILTERS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "filters.json"))
+
+_END = "$"  # trie node key holding the path prefixes blocked at that domain
+
+
+class LeadFilter:
+    """
+    blocked_domains entries are "example.com" (the domain and all its subdomains)
+    or "example.com/some/path" (only URLs under that path).
+    irrelevant_keywords match whole words/phrases, case-insensitively, with or
+    without a plural "s"/"es" ("price" also matches "prices").
+    """
+
+    def __init__(self, blocked_domains=(), irrelevant_keywords=()):
+        self.trie = {}
+        for entry in blocked_domains:
+            self._add_domain(entry)
+        self.keyword_pattern = self._compile_keywords(irrelevant_keywords)
+
+    def _add_domain(self, entry):
+        entry = entry.strip().lower()
+        if not entry:
+            return
+        if "://" in entry:
+            entry = entry.split("://", 1)[1]
+        host, _, path = entry.partition("/")
+        node = self.trie
+        for label in reversed(host.split(".")):
+            node = node.setdefault(label, {})
+        prefixes = node.setdefault(_END, [])
+        prefixes.append("/" + path.strip("/") if path else "")
+
+    @staticmethod
+    def _compile_keywords(keywords):
+        phrases = {" ".join(keyword.lower().split()) for keyword in keywords}
+        phrases.discard("")
+        if not phrases:
+            return None
+        return re.compile(rf"(?<!\w)({_trie_pattern(phrases)})(?:e?s)?(?!\w)")
+
+    def blocked_entry(self, url):
+        """Return the blocklist entry that matches url, or None"""
+        try:
+            parts = urlsplit(url if "://" in url else f"//{url}")
+        except ValueError:
+            return None
+        host = (parts.hostname or "").rstrip(".")
+        if not host:
+            return None
+        path = parts.path.lower().rstrip("/")
+
+        node = self.trie
+        matched = []
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            matched.append(label)
+            for prefix in node.get(_END, ()):
+                if not prefix or path == prefix or path.startswith(prefix + "/"):
+                    return ".".join(reversed(matched)) + prefix
+        return None
+
+    def is_blocked_url(self, url):
+        return self.blocked_entry(url) is not None
+
+    def matching_keyword(self, text):
+        """Return the first irrelevant keyword found in text (as listed, not its plural), or None"""
+        if self.keyword_pattern is None or not text:
+            return None
+        match = self.keyword_pattern.search(" ".join(text.lower().split()))
+        return match.group(1) if match else None
+
+    @classmethod
+    def from_file(cls, path=FILTERS_PATH):
+        with open(path, encoding="utf-8") as file:
+            config = json.load(file)
+        return cls(config.get("blocked_domains", []), config.get("irrelevant_keywords", []))
+
+
+def _trie_pattern(phrases):
+    """Regex alternation shaped as a character trie, so matching cost grows with
+    phrase length rather than with the number of phrases (Aho-Corasick-like)"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of phrase (no real character is empty)
+
+    def render(node):
+        optional = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+def get_lead_filter():
+    """Shared filter loaded from FILTERS_PATH on first use"""
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            _filter = LeadFilter.from_file()
+        return _filter
@@ -1,206 +1,353 @@
-import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
+import importlib.util
 import json
+import re
+import threading
 import time
-import csv
 import os
-from dotenv import load_dotenv
+from urllib.parse import urlparse
 
-# Load environment variables from .env file
-load_dotenv()
+if __name__ == "__main__":
+    # Run as a script: load .env before the sibling modules below read their settings
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from rate_limiter import limiter, GOOGLE_CSE_MAX_WAIT
+from verdict_cache import get_verdict_cache, verdict_key
+from lead_classifier import prefilter, record_label
+from dedup_index import get_dedup_index, jaccard, DEDUP_MIN_WORDS
+from lead_filters import get_lead_filter
+from http_client import get_http_client, http_get, openai_http_client
+from search_cache import get_search_cache
+from singleflight import singleflight, singleflight_many
+from metrics import timed, record_openai_usage
+from relevance import RelevanceScorer, vocabulary
+
+# Importing this module has no side effects: .env, settings, the OpenAI client
+# and heavy libraries (openai, bs4, requests) are loaded on first use. Run as a
+# script (like the other entry points) it loads .env before anything else.
 
 # === CONFIGURATION ===
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # Free Google Custom Search API
-GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")    # Custom Search Engine ID
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-LOCATION = os.getenv("LOCATION", "Durham, NC")  # Default to Durham, NC if not set
-
-# Validate that required API keys are present
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in your .env file.")
-    
-# Google Custom Search is optional - will fall back to direct scraping if not available
-USE_GOOGLE_SEARCH = GOOGLE_API_KEY and GOOGLE_CSE_ID
-if not USE_GOOGLE_SEARCH:
-    print("⚠️  Google Custom Search API not configured. Using direct scraping method.")
-    print("   For better results, set up free Google Custom Search API (100 searches/day)")
-    print("   Get keys at: https://developers.google.com/custom-search/v1/introduction")
-SEARCH_TERMS = {
-    "facebook": [
-        '"need a painter" site:facebook.com/groups "durham"',
-        '"looking for remodeling help" site:facebook.com/groups "durham"',
-        '"landscaping company wanted" site:facebook.com/groups "durham"',
-        '"home renovation near me" site:facebook.com/groups "durham"',
-        '"drywall repair service" site:facebook.com/groups "durham"',
-        '"interior painting contractor" site:facebook.com/groups "durham"',
-        '"affordable bathroom remodel" site:facebook.com/groups "durham"',
-        '"kitchen remodeling quote" site:facebook.com/groups "durham"',
-        '"siding repair company" site:facebook.com/groups "durham"',
-        '"deck builder near me" site:facebook.com/groups "durham"',
-        '"power washing service" site:facebook.com/groups "durham"',
-        '"local painting company" site:facebook.com/groups "durham"',
-        '"garage conversion contractor" site:facebook.com/groups "durham"',
-        '"window replacement near me" site:facebook.com/groups "durham"',
-        '"fence installation service" site:facebook.com/groups "durham"',
-        '"handyman for hire" site:facebook.com/groups "durham"',
-        '"house painting estimate" site:facebook.com/groups "durham"',
-        '"flooring installation help" site:facebook.com/groups "durham"',
-        '"stucco repair near me" site:facebook.com/groups "durham"',
-        '"licensed general contractor" site:facebook.com/groups "durham"'
-    ],
-    "reddit": [
-        '"need a painter" site:reddit.com/r/durham',
-        '"looking for remodeling help" site:reddit.com/r/durham',
-        '"landscaping company wanted" site:reddit.com/r/durham',
-        '"home renovation near me" site:reddit.com/r/durham',
-        '"drywall repair service" site:reddit.com/r/durham',
-        '"interior painting contractor" site:reddit.com/r/durham',
-        '"affordable bathroom remodel" site:reddit.com/r/durham',
-        '"kitchen remodeling quote" site:reddit.com/r/durham',
-        '"siding repair company" site:reddit.com/r/durham',
-        '"deck builder near me" site:reddit.com/r/durham',
-        '"power washing service" site:reddit.com/r/durham',
-        '"local painting company" site:reddit.com/r/durham',
-        '"garage conversion contractor" site:reddit.com/r/durham',
-        '"window replacement near me" site:reddit.com/r/durham',
-        '"fence installation service" site:reddit.com/r/durham',
-        '"handyman for hire" site:reddit.com/r/durham',
-        '"house painting estimate" site:reddit.com/r/durham',
-        '"flooring installation help" site:reddit.com/r/durham',
-        '"stucco repair near me" site:reddit.com/r/durham',
-        '"licensed general contractor" site:reddit.com/r/durham'
-    ],
-    "nextdoor": [
-        '"need a painter" durham',
-        '"looking for remodeling help" durham',
-        '"landscaping company wanted" durham',
-        '"home renovation near me" durham',
-        '"drywall repair service" durham',
-        '"interior painting contractor" durham',
-        '"affordable bathroom remodel" durham',
-        '"kitchen remodeling quote" durham',
-        '"siding repair company" durham',
-        '"deck builder near me" durham',
-        '"power washing service" durham',
-        '"local painting company" durham',
-        '"garage conversion contractor" durham',
-        '"window replacement near me" durham',
-        '"fence installation service" durham',
-        '"handyman for hire" durham',
-        '"house painting estimate" durham',
-        '"flooring installation help" durham',
-        '"stucco repair near me" durham',
-        '"licensed general contractor" durham'
-    ]
+class Config:
+    """Settings from the environment (and .env), read once by get_config()"""
+
+    def __init__(self):
+        self.google_api_key = os.getenv("GOOGLE_API_KEY")  # Free Google Custom Search API
+        self.google_cse_id = os.getenv("GOOGLE_CSE_ID")    # Custom Search Engine ID
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.location = os.getenv("LOCATION", "Durham, NC")  # Default to Durham, NC if not set
+        self.google_cse_url = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")
+        self.reddit_base_url = os.getenv("REDDIT_BASE_URL", "https://www.reddit.com")
+        self.reddit_link_url = os.getenv("REDDIT_LINK_URL", "https://reddit.com")  # prefix for post permalinks
+        # Google Custom Search is optional - will fall back to direct scraping if not available
+        self.use_google_search = bool(self.google_api_key and self.google_cse_id)
+        self.use_search_cache = os.getenv("USE_SEARCH_CACHE", "true").lower() == "true"
+        self.use_verdict_cache = os.getenv("USE_VERDICT_CACHE", "true").lower() == "true"
+        self.use_lead_classifier = os.getenv("USE_LEAD_CLASSIFIER", "true").lower() == "true"  # needs a trained lead_classifier.json
+        self.record_lead_labels = os.getenv("RECORD_LEAD_LABELS", "true").lower() == "true"  # training data for lead_classifier.py
+        self.use_dedup_index = os.getenv("USE_DEDUP_INDEX", "true").lower() == "true"
+        self.scrape_max_bytes = int(os.getenv("SCRAPE_MAX_BYTES", "1000000"))  # stop downloading after this many bytes
+        # Send the model the most request-like passages of a page instead of its first QUALIFY_WINDOW characters
+        self.use_relevance_window = os.getenv("USE_RELEVANCE_WINDOW", "true").lower() == "true"
+        self.qualify_token_budget = int(os.getenv("QUALIFY_TOKEN_BUDGET", "200"))  # page tokens per item
+        # Qualify from the post body the search provider returned, fetching the page only when it's
+        # missing, cut off, or leaves the model unsure
+        self.use_snippet_first = os.getenv("USE_SNIPPET_FIRST", "true").lower() == "true"
+        self.snippet_min_chars = int(os.getenv("SNIPPET_MIN_CHARS", "40"))  # shorter bodies get the page fetched
+        self.leads_csv_path = os.getenv("LEADS_CSV_PATH", "qualified_leads.csv")
+        # "async" overlaps search/scrape/qualify (see pipeline.py), "sequential" runs one at a time
+        self.pipeline_mode = os.getenv("PIPELINE_MODE", "async")
+
+_config = None
+_openai_client = None
+_init_lock = threading.Lock()
+
+def get_config():
+    """Load .env and read settings the first time they're needed"""
+    global _config
+    with _init_lock:
+        if _config is None:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _config = Config()
+            if not _config.use_google_search:
+                print("⚠️  Google Custom Search API not configured. Using direct scraping method.")
+                print("   For better results, set up free Google Custom Search API (100 searches/day)")
+                print("   Get keys at: https://developers.google.com/custom-search/v1/introduction")
+        return _config
+
+def get_openai_client():
+    """OpenAI client, created on first use"""
+    global _openai_client
+    config = get_config()
+    with _init_lock:
+        if _openai_client is None:
+            # Validate that required API keys are present
+            if not config.openai_api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in your .env file.")
+            from openai import OpenAI
+            _openai_client = OpenAI(api_key=config.openai_api_key, http_client=openai_http_client())
+        return _openai_client
+
+# === SEARCH TERM TEMPLATES ===
+# Queries are service phrases × platform templates × locations; nothing here names a city
+SERVICE_PHRASES = [
+    "need a painter",
+    "looking for remodeling help",
+    "landscaping company wanted",
+    "home renovation near me",
+    "drywall repair service",
+    "interior painting contractor",
+    "affordable bathroom remodel",
+    "kitchen remodeling quote",
+    "siding repair company",
+    "deck builder near me",
+    "power washing service",
+    "local painting company",
+    "garage conversion contractor",
+    "window replacement near me",
+    "fence installation service",
+    "handyman for hire",
+    "house painting estimate",
+    "flooring installation help",
+    "stucco repair near me",
+    "licensed general contractor"
+]
+
+# {phrase}, {city} (lowercase), {subreddit} and {location} (as the user wrote it)
+PLATFORM_TEMPLATES = {
+    "facebook": '"{phrase}" site:facebook.com/groups "{city}" in {location}',
+    "reddit": '"{phrase}" site:reddit.com/r/{subreddit} in {location}',
+    # Nextdoor has no useful site: path, so the city goes in as a plain word
+    "nextdoor": '"{phrase}" {city} {location}'
 }
-MAX_RESULTS = 5  # Per query
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Cities whose subreddit isn't just their name without spaces
+SUBREDDITS = {
+    "chapel hill": "chapelhill",
+    "apex": "apexnc",
+    "wake forest": "wakeforest",
+}
+
+# Metro names a job can ask for instead of listing each city
+METROS = {
+    "triangle": ["Durham, NC", "Raleigh, NC", "Chapel Hill, NC", "Cary, NC"],
+    "research triangle": ["Durham, NC", "Raleigh, NC", "Chapel Hill, NC", "Cary, NC"],
+}
+
+def expand_locations(locations):
+    """A location, a ';'-separated string or a list (metro names expand to their cities) -> unique locations"""
+    if isinstance(locations, str):
+        locations = [locations]
+    expanded, cities = [], set()
+    for location in (part for entry in locations for part in entry.split(";")):
+        location = " ".join(location.split())
+        for name in METROS.get(location.lower(), [location]):
+            city = location_fields(name)["city"]
+            if city and city not in cities:
+                cities.add(city)
+                expanded.append(name)
+    return expanded
+
+def location_fields(location):
+    """Template fields for one location, e.g. 'Chapel Hill, NC' -> city 'chapel hill', subreddit 'chapelhill'"""
+    city = " ".join(location.split(",")[0].lower().split())
+    return {"location": location, "city": city,
+            "subreddit": SUBREDDITS.get(city, re.sub(r"[^a-z0-9]", "", city))}
+
+def build_queries(locations=None, phrases=SERVICE_PHRASES):
+    """(site, full_query) pairs for every location × platform × phrase"""
+    queries = []
+    for location in expand_locations(locations or get_config().location):
+        fields = location_fields(location)
+        for site, template in PLATFORM_TEMPLATES.items():
+            for phrase in phrases:
+                queries.append((site, template.format(phrase=phrase, **fields)))
+    return queries
+
+MAX_RESULTS = 5  # Per query
+OPENAI_MODEL = "gpt-3.5-turbo"
+PROMPT_VERSION = "3"  # Bump whenever the qualification prompt changes to invalidate cached verdicts
+QUALIFY_WINDOW = 1000  # Characters of page text sent to the model when USE_RELEVANCE_WINDOW=false
 
 # === STEP 1: Free Google Custom Search API ===
-def google_custom_search(query):
+class SearchResults(list):
+    """Results of one search call. `reached` is True when a provider actually answered it
+    (quota spent), False for cache hits, quota skips and errors."""
+
+    def __init__(self, results=(), reached=False):
+        super().__init__(results)
+        self.reached = reached
+
+def google_custom_search(query, num=MAX_RESULTS):
     """Use free Google Custom Search API (100 searches/day limit)"""
-    if not USE_GOOGLE_SEARCH:
-        return []
+    config = get_config()
+    if not config.use_google_search:
+        return SearchResults()
+    
+    cache = get_search_cache() if config.use_search_cache else None
+    if cache is not None:
+        cached = cache.get("google_cse", query)
+        if cached is not None:
+            print(f"💾 Using cached Google results for: {query}")
+            return SearchResults(cached)
+    
+    # Don't stall the job when the daily quota is spent; callers fall back to Reddit
+    if not limiter.acquire("google_cse", max_wait=GOOGLE_CSE_MAX_WAIT):
+        print("⚠️  Google Custom Search daily quota exhausted, skipping")
+        return SearchResults()
     
-    url = "https://www.googleapis.com/customsearch/v1"
+    import requests  # loaded by http_client by now; needed for its exception types
+
+    url = config.google_cse_url
     params = {
-        "key": GOOGLE_API_KEY,
-        "cx": GOOGLE_CSE_ID,
+        "key": config.google_api_key,
+        "cx": config.google_cse_id,
         "q": query,
-        "num": MAX_RESULTS,
+        "num": num,
         "dateRestrict": "m1"  # Last month
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, provider="google_cse")
+        if response.status_code == 429:
+            limiter.defer_from_headers("google_cse", response.headers)
         response.raise_for_status()
         data = response.json()
         
         results = []
         for item in data.get("items", []):
-            results.append({
+            result = {
                 "title": item.get("title", ""),
                 "link": item.get("link", ""),
                 "snippet": item.get("snippet", "")
-            })
-        return results
+            }
+            if not is_truncated(result["snippet"]):
+                result["body"] = result["snippet"]  # the whole text, not an excerpt
+            results.append(result)
+        if cache is not None:
+            cache.put("google_cse", query, results)
+        return SearchResults(results, reached=True)
         
     except requests.exceptions.RequestException as e:
         print(f"Google Custom Search API error: {e}")
-        return []
+        return SearchResults()
     except Exception as e:
         print(f"Error parsing Google search results: {e}")
-        return []
+        return SearchResults()
+
+def is_truncated(snippet):
+    """Search engines mark excerpts of longer text with an ellipsis at either end"""
+    snippet = snippet.strip()
+    return snippet.startswith(("...", "…")) or snippet.endswith(("...", "…"))
 
 # === STEP 1A: Advanced Duplicate Detection ===
 def is_similar_content(text1, text2, threshold=0.8):
-    """Check if two pieces of text are too similar (likely duplicates)"""
+    """Check if two pieces of text are too similar (likely duplicates) by word-shingle overlap"""
     if not text1 or not text2:
         return False
-    
-    # Normalize text for comparison
-    def normalize_text(text):
-        return ' '.join(text.lower().split())
-    
-    norm1 = normalize_text(text1)
-    norm2 = normalize_text(text2)
-    
-    # Simple similarity check using character overlap
-    if len(norm1) == 0 or len(norm2) == 0:
+    return jaccard(text1, text2) >= threshold
+
+def fingerprint_text(result):
+    """Title and post text to fingerprint, or None when there's too little text to tell posts apart.
+    A bare title ("Need a plumber ASAP") or a link post would match unrelated posts in every city."""
+    body = result.get("body")
+    if body is None:
+        body = result.get("snippet", "").strip().strip(".…").strip()
+    if len(body.split()) < DEDUP_MIN_WORDS:
+        return None
+    return f"{result.get('title', '')} {body}"
+
+def is_repost(result):
+    """Check a search result against every post seen in earlier jobs and runs (MinHash/LSH)"""
+    if not get_config().use_dedup_index:
         return False
-    
-    # Calculate overlap percentage
-    shorter = min(len(norm1), len(norm2))
-    longer = max(len(norm1), len(norm2))
-    
-    # If one text is much shorter, check if it's contained in the other
-    if shorter / longer < 0.5:
-        return norm1 in norm2 or norm2 in norm1
-    
-    # For similar length texts, check character overlap
-    set1 = set(norm1)
-    set2 = set(norm2)
-    overlap = len(set1.intersection(set2))
-    union = len(set1.union(set2))
-    
-    return (overlap / union) > threshold if union > 0 else False
+    text = fingerprint_text(result)
+    if text is None:
+        return False
+    duplicate_of = get_dedup_index().check_and_add(result.get("link", ""), text)
+    if duplicate_of:
+        print(f"🚫 Skipping near-duplicate of {duplicate_of}: {result.get('title', '')[:50]}")
+        return True
+    return False
 
 # === STEP 1B: Fallback Direct Search Methods ===
-def search_reddit_directly(query_terms):
-    """Direct Reddit search using Reddit's JSON API (no auth required)"""
+SUBREDDIT_SITE = re.compile(r"site:(?:www\.)?reddit\.com/r/(\w+)/?")
+
+def search_reddit_directly(query_terms, num=MAX_RESULTS):
+    """Direct Reddit search using Reddit's JSON API (no auth required).
+    Repeat queries only fetch posts newer than the newest one already seen."""
     results = []
+    reached = False
+    config = get_config()
+    # Search the subreddit named in the site: restriction (the configured location's by default)
+    match = SUBREDDIT_SITE.search(query_terms)
+    subreddit = match.group(1) if match else location_fields(expand_locations(config.location)[0])["subreddit"]
     # Remove site: restriction and quotes for direct Reddit API
-    clean_query = query_terms.replace('site:reddit.com/r/durham', '').replace('"', '').strip()
+    clean_query = SUBREDDIT_SITE.sub("", query_terms)
+    if " OR " not in clean_query:
+        clean_query = clean_query.replace('"', '')  # merged OR queries need their phrase quotes
+    clean_query = " ".join(clean_query.split())
+    cache_key = f"r/{subreddit}: {clean_query}"
+    
+    cache = get_search_cache() if config.use_search_cache else None
+    previous = None
+    cursor = None
+    if cache is not None:
+        cached = cache.get("reddit", cache_key)
+        if cached is not None:
+            print(f"💾 Using cached Reddit results for: {cache_key}")
+            return SearchResults(cached)
+        previous = cache.get("reddit", cache_key, allow_stale=True)
+        cursor = cache.get_cursor(cache_key) if previous is not None else None
     
     try:
-        # Search in Durham subreddit
-        url = f"https://www.reddit.com/r/durham/search.json"
+        url = f"{config.reddit_base_url}/r/{subreddit}/search.json"
         params = {
             "q": clean_query,
             "restrict_sr": "1",
             "sort": "new",
             "t": "month",
-            "limit": MAX_RESULTS
+            "limit": num
         }
+        if cursor:
+            params["before"] = cursor  # only posts newer than the last one we saw
         
         headers = {"User-Agent": "LeadGeneratorBot/1.0"}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        limiter.acquire("reddit")
+        response = http_get(url, params=params, headers=headers, provider="reddit")
         
-        if response.status_code == 200:
+        if response.status_code == 429:
+            limiter.defer_from_headers("reddit", response.headers, default=60)
+        elif response.status_code == 200:
             data = response.json()
-            for post in data.get("data", {}).get("children", []):
-                post_data = post.get("data", {})
-                results.append({
-                    "title": post_data.get("title", ""),
-                    "link": f"https://reddit.com{post_data.get('permalink', '')}",
-                    "snippet": post_data.get("selftext", "")[:200] + "..."
-                })
+            reached = True
+            children = data.get("data", {}).get("children", [])
+            for post in children:
+                results.append(reddit_result(post.get("data", {})))
+            
+            if cache is not None:
+                if cursor:
+                    print(f"🔁 {len(results)} new Reddit posts since last run for: {cache_key}")
+                    seen_links = {result["link"] for result in results}
+                    results = (results + [r for r in previous if r["link"] not in seen_links])[:num]
+                newest = children[0].get("data", {}).get("name") if children else None
+                if newest:
+                    cache.set_cursor(cache_key, newest)
+                cache.put("reddit", cache_key, results)
     except Exception as e:
         print(f"Reddit search error: {e}")
     
-    return results
+    return SearchResults(results, reached=reached)
+
+def reddit_result(post_data):
+    """Search result dict for one post from a Reddit listing"""
+    selftext = post_data.get("selftext", "")
+    return {
+        "title": post_data.get("title", ""),
+        "link": f"{get_config().reddit_link_url}{post_data.get('permalink', '')}",
+        "snippet": selftext[:200] + "...",
+        "body": selftext  # full post text, so the page often needn't be fetched
+    }
 
 def search_facebook_groups(query_terms):
     """
@@ -212,40 +359,149 @@ def search_facebook_groups(query_terms):
     print("   Consider manually checking Facebook groups or using other platforms")
     return []
 
-def google_search(query):
-    """Main search function that tries multiple free methods"""
-    results = []
+@timed("search")
+def google_search(query, num=MAX_RESULTS):
+    """Main search function; concurrent identical queries share one provider call"""
+    sent = []  # only the caller whose call went out is charged for it; the others shared it
+    results = singleflight("search", (query, num), lambda: sent.append(True) or search_providers(query, num))
+    # Callers tag their own copies (e.g. result["term"])
+    return SearchResults([dict(result) for result in results], reached=results.reached and bool(sent))
+
+def platform_searchable(site):
+    """Only Reddit has a free fallback: Facebook and Nextdoor queries need Google Custom Search"""
+    return site == "reddit" or get_config().use_google_search
+
+def search_providers(query, num=MAX_RESULTS):
+    """Try multiple free search methods in turn"""
+    results = SearchResults()
+    reached = False
     
     # Method 1: Try Google Custom Search API (if configured)
-    if USE_GOOGLE_SEARCH:
+    if get_config().use_google_search:
         print(f"🔍 Searching with Google Custom Search: {query}")
-        results = google_custom_search(query)
+        results = google_custom_search(query, num)
+        reached = results.reached
     
     # Method 2: If no results and it's a Reddit query, try direct Reddit API
     if not results and "reddit.com" in query:
         print(f"🔍 Searching Reddit directly: {query}")
-        results = search_reddit_directly(query)
+        results = search_reddit_directly(query, num)
+        reached = reached or results.reached
     
     # Method 3: If no results and it's a Facebook query, notify user
     if not results and "facebook.com" in query:
         results = search_facebook_groups(query)
     
-    return results
+    return SearchResults(results, reached=reached)
 
 # === STEP 2: Scrape Page Text ===
+def provider_for_url(url):
+    """Rate-limit bucket for a scraped URL (Reddit pages share the Reddit API budget)"""
+    host = urlparse(url).hostname or ""
+    if host == "reddit.com" or host.endswith(".reddit.com"):
+        return "reddit"
+    return None
+
+SCRAPE_CHUNK_SIZE = 64 * 1024
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# Page chrome that never contains the post itself
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe",
+                    "nav", "header", "footer", "aside", "form", "button"]
+
+# Most specific first: Reddit post bodies, then generic article/main containers
+MAIN_CONTENT_SELECTORS = [
+    'shreddit-post [slot="text-body"]',
+    '[data-testid="post-container"]',
+    'div[data-click-id="text"]',
+    "div.expando .usertext-body",
+    "article",
+    "main",
+    '[role="main"]',
+    "#content",
+    ".entry-content",
+    ".post",
+]
+MIN_MAIN_CONTENT_CHARS = 40
+
+@timed("fetch")
+def fetch_page(url, headers):
+    """Stream a page, giving up on non-text content and stopping at scrape_max_bytes.
+    Returns (text, content_type), or ("", None) if the page isn't worth parsing."""
+    max_bytes = get_config().scrape_max_bytes
+    provider = provider_for_url(url)
+    with http_get(url, headers=headers, stream=True, provider=provider or "web") as response:
+        if provider and response.status_code == 429:
+            limiter.defer_from_headers(provider, response.headers, default=60)
+        if response.status_code >= 400:
+            print(f"Error scraping {url}: HTTP {response.status_code}")
+            return "", None
+
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in TEXT_CONTENT_TYPES:
+            print(f"🚫 Skipping non-text page ({content_type}): {url}")
+            return "", None
+
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=SCRAPE_CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                break
+
+        encoding = response.encoding or "utf-8"
+        try:
+            return body.decode(encoding, errors="replace"), content_type
+        except LookupError:
+            return body.decode("utf-8", errors="replace"), content_type
+
+@timed("parse")
+def extract_main_text(html):
+    """Page title plus the post body, with scripts, styles and navigation removed"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, HTML_PARSER)
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    content = None
+    for selector in MAIN_CONTENT_SELECTORS:
+        node = soup.select_one(selector)
+        if node is not None and len(node.get_text(strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            content = node
+            break
+    if content is None:
+        content = soup.body or soup
+
+    body = "\n".join(line for line in content.get_text("\n", strip=True).splitlines() if line)
+    if title and not body.startswith(title):
+        return f"{title}\n{body}"
+    return body
+
+@timed("scrape")
 def scrape_text(url):
+    """Main-content text of a page; concurrent requests for the same URL share one fetch"""
+    return singleflight("scrape", url, lambda: fetch_text(url))
+
+def fetch_text(url):
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        html = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(html.text, "html.parser")
-        return soup.get_text()
+        headers = {"User-Agent": "Mozilla/5.0", "Accept": "text/html,application/xhtml+xml;q=0.9,text/plain;q=0.8"}
+        provider = provider_for_url(url)
+        if provider:
+            limiter.acquire(provider)
+        page, content_type = fetch_page(url, headers)
+        if not page:
+            return ""
+        if content_type == "text/plain":
+            return page
+        return extract_main_text(page)
     except Exception as e:
         print(f"Error scraping {url}: {e}")
         return ""
 
 # === STEP 3: Ask OpenAI to Qualify Lead ===
-def is_good_lead(text):
-    prompt = f"""You are a lead qualification agent for a HOME IMPROVEMENT CONTRACTING business in Durham, NC.
+QUALIFY_INSTRUCTIONS = """You are a lead qualification agent for a HOME IMPROVEMENT CONTRACTING business in Durham, NC.
 
 We provide these SPECIFIC SERVICES:
 • Interior/Exterior Painting
@@ -280,75 +536,345 @@ Your task is to identify if this content is a REAL HOMEOWNER/CUSTOMER actively s
 • Residential property work (not commercial)
 • Located in our service area
 
-Look for phrases like: "need", "looking for", "can anyone recommend", "quote", "estimate", "help with", "repair", "install", "paint", "remodel"
+Look for phrases like: "need", "looking for", "can anyone recommend", "quote", "estimate", "help with", "repair", "install", "paint", "remodel\""""
 
-Here is the content:
+# Identical on every call (system message), so providers can cache the prefix;
+# each request adds only the short per-item message below
+QUALIFY_SYSTEM = f"""{QUALIFY_INSTRUCTIONS}
 
---- START ---
-{text[:1000]}
---- END ---
+Be very strict. Answer "Yes" ONLY if the content is clearly a potential customer needing our services. Answer "No" for everything else.
+If the content is too short or cut off to tell either way, answer "Unsure" instead.
 
-Be very strict. Answer "Yes" ONLY if this is clearly a potential customer needing our services. Answer "No" for everything else.
+For a single piece of content, reply: Yes/No/Unsure - [Brief reason why this is/isn't a qualified lead]
+For numbered items, judge each on its own and reply with exactly one line per item, in order, and nothing else:
+1. Yes/No/Unsure - [Brief reason why this is/isn't a qualified lead]
+2. Yes/No/Unsure - [Brief reason why this is/isn't a qualified lead]
+..."""
 
-Format: "Yes/No - [Brief reason why this is/isn't a qualified lead]" """
-    
+def build_qualify_prompt(window):
+    return f"--- START ---\n{window}\n--- END ---"
+
+def build_batch_prompt(windows):
+    items = "\n\n".join(
+        f"--- ITEM {number} START ---\n{window}\n--- ITEM {number} END ---"
+        for number, window in enumerate(windows, start=1)
+    )
+    return f"{len(windows)} items:\n\n{items}"
+
+# Vocabulary for relevance windows: the services and intent phrases the prompt lists,
+# the words of the service phrases, and the areas we serve
+INTENT_EXTRA = ["recommend", "anyone know", "who did", "who do you use", "suggestions", "asap"]
+SERVICE_AREAS = ["Raleigh", "Chapel Hill", "Cary"]
+
+_relevance_scorer = None
+
+def get_relevance_scorer():
+    global _relevance_scorer
+    config = get_config()
+    with _init_lock:
+        if _relevance_scorer is None:
+            services = QUALIFY_INSTRUCTIONS.split("SPECIFIC SERVICES:")[1].split("Your task")[0].splitlines()
+            intents = re.findall(r'"([^"]+)"', QUALIFY_INSTRUCTIONS.split("Look for phrases like:")[1])
+            areas = [location.split(",")[0] for location in expand_locations(config.location)] + SERVICE_AREAS
+            services = [stem for stem in vocabulary(services + SERVICE_PHRASES) if stem not in vocabulary(areas)]
+            _relevance_scorer = RelevanceScorer(services, intents + INTENT_EXTRA, areas)
+        return _relevance_scorer
+
+def qualification_window(text):
+    """The part of a page sent to the model: its most request-like passages within the token budget"""
+    config = get_config()
+    if not config.use_relevance_window:
+        return text[:QUALIFY_WINDOW]
+    return get_relevance_scorer().window(text, config.qualify_token_budget)
+
+BATCH_LINE = re.compile(r"^\s*(?:item\s*)?(\d+)\s*[.):\-]\s*\**\s*(yes|no|unsure)\b\**\s*[-–:]?\s*(.*)$", re.IGNORECASE)
+
+def parse_batch_reply(reply, count):
+    """Map a numbered batch reply back to (is_lead, reason) per item; None where an item is missing.
+    "Unsure" items are not leads; their reason starts with "Unsure" (see is_uncertain)."""
+    verdicts = [None] * count
+    for line in (reply or "").splitlines():
+        match = BATCH_LINE.match(line)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if 1 <= number <= count and verdicts[number - 1] is None:
+            answer = match.group(2).capitalize()
+            reason = match.group(3).strip()
+            verdicts[number - 1] = (answer == "Yes", f"{answer} - {reason}" if reason else answer)
+    return verdicts
+
+UNSURE_REPLY = re.compile(r"^\W*unsure\b", re.IGNORECASE)
+
+def is_uncertain(verdict):
+    """True for an "Unsure" verdict: the text didn't say enough to decide"""
+    return UNSURE_REPLY.match(verdict[1] or "") is not None
+
+def ask_openai(prompt, reply_tokens=60, system=QUALIFY_SYSTEM):
+    """Send one chat completion under the shared rate limit. Returns the reply text or None."""
+    # Rough token estimate (~4 chars/token) plus room for the reply;
+    # reconciled with the real usage once the response arrives
+    estimated_tokens = (len(system) + len(prompt)) // 4 + reply_tokens
+    limiter.acquire("openai", tokens=estimated_tokens)
+    client = get_openai_client()
+    from openai import RateLimitError
+    start = time.perf_counter()
     try:
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
+            model=OPENAI_MODEL,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}],
             temperature=0.1,  # Lower temperature for more consistent filtering
         )
-        reply = response.choices[0].message.content
-        return "yes" in reply.lower(), reply
+        get_http_client().record("api.openai.com", time.perf_counter() - start, provider="openai")
+        if response.usage is not None:
+            limiter.record_usage("openai", estimated_tokens, response.usage.total_tokens)
+            record_openai_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+    except RateLimitError as e:
+        get_http_client().record("api.openai.com", time.perf_counter() - start, error=True,
+                                 provider="openai", status=429)
+        limiter.defer_from_headers("openai", e.response.headers, default=20)
+        print(f"AI error: {e}")
+        return None
     except Exception as e:
+        get_http_client().record("api.openai.com", time.perf_counter() - start, error=True,
+                                 provider="openai", status=getattr(e, "status_code", None))
         print(f"AI error: {e}")
+        return None
+
+@timed("qualify")
+def is_good_lead(text):
+    window = qualification_window(text)
+    config = get_config()
+    cache = get_verdict_cache() if config.use_verdict_cache else None
+    cache_key = verdict_key(window, PROMPT_VERSION, OPENAI_MODEL)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print("💾 Using cached verdict")
+            return cached
+
+    # The same content qualified by another job right now shares that job's verdict
+    return singleflight("qualify", cache_key, lambda: qualify_window(window, cache_key, cache))
+
+def qualify_window(window, cache_key, cache):
+    config = get_config()
+    local_verdict = prefilter(window) if config.use_lead_classifier else None
+    if local_verdict is not None:
+        return local_verdict
+
+    reply = ask_openai(build_qualify_prompt(window))
+    if reply is None:
         return False, ""
+    unsure = UNSURE_REPLY.match(reply) is not None
+    is_lead = not unsure and "yes" in reply.lower()
+    if cache is not None:
+        cache.put(cache_key, is_lead, reply)
+    if config.record_lead_labels and not unsure:
+        record_label(window, is_lead, reply)
+    return is_lead, reply
+
+@timed("qualify_batch")
+def qualify_leads_batch(texts):
+    """Qualify several pages in one request under the shared instructions.
+    Returns one (is_lead, reason) per text; items the reply doesn't cover are asked one by one."""
+    windows = [qualification_window(text) for text in texts]
+    verdicts = [None] * len(windows)
+    config = get_config()
+    cache = get_verdict_cache() if config.use_verdict_cache else None
+    keys = [verdict_key(window, PROMPT_VERSION, OPENAI_MODEL) for window in windows]
+
+    if cache is not None:
+        for index, key in enumerate(keys):
+            verdicts[index] = cache.get(key)
+
+    if config.use_lead_classifier:
+        for index, window in enumerate(windows):
+            if verdicts[index] is None:
+                verdicts[index] = prefilter(window)
+
+    pending = [index for index, verdict in enumerate(verdicts) if verdict is None]
+    if pending:
+        # Windows another job is qualifying right now share its verdicts; only the rest are sent
+        by_key = {keys[index]: windows[index] for index in pending}
+        shared = singleflight_many("qualify", list(by_key),
+                                   lambda owned: qualify_windows(owned, by_key, cache))
+        for index in pending:
+            verdicts[index] = shared[keys[index]]
+    return verdicts
+
+def qualify_windows(owned_keys, windows_by_key, cache):
+    """Send the windows this call owns in one batch request. Returns {key: (is_lead, reason)}."""
+    if len(owned_keys) == 1:
+        key = owned_keys[0]
+        return {key: qualify_window(windows_by_key[key], key, cache)}
+    config = get_config()
+    reply = ask_openai(build_batch_prompt([windows_by_key[key] for key in owned_keys]),
+                       reply_tokens=60 * len(owned_keys))
+    parsed = parse_batch_reply(reply, len(owned_keys))
+    missing = sum(1 for verdict in parsed if verdict is None)
+    if reply is not None and missing:
+        print(f"⚠️  Batch reply covered {len(owned_keys) - missing}/{len(owned_keys)} items, "
+              f"retrying the rest one by one")
+    verdicts = {}
+    for key, verdict in zip(owned_keys, parsed):
+        if verdict is None:
+            # Not is_good_lead: this call holds the key's in-flight slot
+            verdict = qualify_window(windows_by_key[key], key, cache)
+        else:
+            if cache is not None:
+                cache.put(key, *verdict)
+            if config.record_lead_labels and not is_uncertain(verdict):
+                record_label(windows_by_key[key], *verdict)
+        verdicts[key] = verdict
+    return verdicts
+
+# === STEP 3A: Snippet-First Qualification ===
+# Reddit search returns each post's full text, so most results can be judged
+# without fetching their page; the page is fetched only when the body is
+# missing, cut off, or leaves the model unsure
+
+def provider_text(result):
+    """Title plus the full post body the search provider returned, or None if the page must be fetched"""
+    config = get_config()
+    body = (result.get("body") or "").strip()
+    if not config.use_snippet_first or len(body) < config.snippet_min_chars:
+        return None
+    return f"{result.get('title', '')}\n{body}"
+
+def qualify_result(result):
+    """Qualify one search result, snippet first. Tags result["tier"] with how it was judged
+    (snippet, escalated or page) and returns (is_lead, reason), or None if nothing could be read."""
+    from metrics import QUALIFY_TIERS
+    link = result.get("link", "")
+    verdict = None
+    tier = "page"
+    text = provider_text(result)
+    if text:
+        print(f"📝 Checking post body: {result.get('title', '')} | {link}")
+        verdict = is_good_lead(text)
+        if not is_uncertain(verdict):
+            tier = "snippet"
+        else:
+            print(f"🔎 Post body wasn't enough, fetching the page: {link}")
+            tier = "escalated"
+    if tier != "snippet":
+        if tier == "page":
+            print(f"Checking: {result.get('title', '')} | {link}")
+        text = scrape_text(link)
+        if text:
+            verdict = is_good_lead(text)
+    if verdict is not None:
+        result["tier"] = tier
+        QUALIFY_TIERS.labels(tier).inc()
+    return verdict
+
+def print_tier_summary(tiers):
+    if tiers.get("snippet"):
+        print(f"\n⚡ {tiers['snippet']} results judged from their post body without a page fetch "
+              f"({tiers.get('escalated', 0)} needed the page after all)")
 
 # === STEP 4: Store Good Leads ===
+# Every verdict goes to the SQLite lead store in batched transactions; the CSV
+# is written once per run from the store instead of being reopened per lead
+
+def save_lead(run_id, site, result, is_lead, reason):
+    from lead_store import get_lead_store
+    get_lead_store().add(
+        search_id=run_id,
+        title=result.get("title", ""),
+        link=result.get("link", ""),
+        snippet=result.get("snippet", ""),
+        platform=site.title(),
+        search_term=result.get("term", ""),
+        is_qualified=is_lead,
+        ai_reason=reason,
+    )
 
-def save_to_csv(lead):
-    file_exists = os.path.isfile("qualified_leads.csv")
-    with open("qualified_leads.csv", "a", newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        if not file_exists:
-            writer.writerow(["Title", "Link", "Reason"])  # Add headers
-        writer.writerow([lead['title'], lead['link'], lead['reason']])
+def export_run_csv(run_id):
+    from lead_store import get_lead_store
+    path = get_config().leads_csv_path
+    count = get_lead_store().export_csv(path, search_id=run_id)
+    print(f"\n💾 Saved {count} qualified leads to {path}")
 
 
 # === MAIN WORKFLOW ===
-def run():
-    for site, terms in SEARCH_TERMS.items():
-        print(f"\n=== Searching on {site.upper()} ===")
-        for term in terms:
-            # For Nextdoor, maybe remove the site: operator because it may not work well
-            full_query = f"{term} in {LOCATION}" if site != "nextdoor" else f"{term} {LOCATION}"
-            print(f"\n🔍 Searching: {full_query}")
-            results = google_search(full_query)
-            for result in results[:MAX_RESULTS]:
-                title = result.get("title", "")
-                link = result.get("link", "")
-
-        # ⛔️ Skip links from known directories or advertiser platforms
-            if any(bad_domain in link for bad_domain in ["yelp.com", "angi.com", "houzz.com", "porch.com", "homeadvisor.com"]):
-                print(f"🚫 Skipping known ad site: {link}")
+def is_filtered_result(result):
+    """⛔️ Skip links from known directories or advertiser platforms, and irrelevant content"""
+    lead_filter = get_lead_filter()
+    link = result.get("link", "")
+    if lead_filter.is_blocked_url(link):
+        print(f"🚫 Skipping known ad site: {link}")
+        return True
+    if lead_filter.matching_keyword(f"{result.get('title', '')} {result.get('snippet', '')}"):
+        print(f"🚫 Skipping irrelevant content: {result.get('title', '')[:50]}...")
+        return True
+    return False
+
+def handle_verdict(run_id, site, result, is_lead, reason):
+    save_lead(run_id, site, result, is_lead, reason)
+    if is_lead:
+        print(f"✅ Qualified: {reason}")
+    else:
+        print(f"❌ Not a match: {reason}")
+
+def run_sequential(run_id):
+    from term_stats import schedule_search
+
+    queries, search, tally = schedule_search(build_queries(), google_search)
+    tiers = {}
+    current_site = None
+    for site, full_query in queries:
+        if site != current_site:
+            print(f"\n=== Searching on {site.upper()} ===")
+            current_site = site
+        print(f"\n🔍 Searching: {full_query}")
+        results = search(full_query)
+        for result in results:
+            if is_filtered_result(result) or is_repost(result):
                 continue
+            tally.kept(site, result)
 
-            print(f"Checking: {title} | {link}")
-            text = scrape_text(link)
-            if not text:
+            verdict = qualify_result(result)
+            if verdict is None:
                 continue
-            is_lead, reason = is_good_lead(text)
-            if is_lead:
-                print(f"✅ Qualified: {reason}")
-                save_to_csv({
-                    "title": title,
-                    "link": link,
-                    "reason": reason
-                })
-            else:
-                print(f"❌ Not a match: {reason}")
-            time.sleep(2)  # Avoid hitting rate limits
+            tiers[result["tier"]] = tiers.get(result["tier"], 0) + 1
+            tally.verdict(site, result, verdict[0])
+            handle_verdict(run_id, site, result, *verdict)
+    tally.save()
+    return tiers
+
+def run_pipeline(run_id):
+    from pipeline import LeadPipeline, PipelineConfig
+    from query_planner import QUERY_MAX_RESULTS
+    from term_stats import schedule_search
+
+    queries, search, tally = schedule_search(build_queries(), google_search)
+
+    def on_result(site, result, is_lead, reason):
+        tally.verdict(site, result, is_lead)
+        handle_verdict(run_id, site, result, is_lead, reason)
+
+    config = PipelineConfig().fan_out(len(expand_locations(get_config().location)))
+    tiers = LeadPipeline(search, scrape_text, is_good_lead, config, batch_qualify_fn=qualify_leads_batch,
+                         snippet_fn=provider_text, uncertain_fn=is_uncertain).run(
+        queries,
+        on_result,
+        accept=tally.track_accept(lambda site, result: not is_filtered_result(result) and not is_repost(result)),
+        max_results=QUERY_MAX_RESULTS,
+    )
+    tally.save()
+    return tiers
+
+def run(mode=None):
+    import uuid
+    run_id = f"cli-{uuid.uuid4()}"
+    if (mode or get_config().pipeline_mode) == "sequential":
+        tiers = run_sequential(run_id)
+    else:
+        tiers = run_pipeline(run_id)
+    print_tier_summary(tiers)
+    export_run_csv(run_id)
 
 if __name__ == "__main__":
     run()
-
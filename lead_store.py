@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+SQLite lead store for LeadGeneratorAI
+Every checked result (qualified or not) is kept in a WAL-mode database with
+indexed link hash, platform, found_at and is_qualified columns. Inserts are
+buffered and written in batched transactions; IDs are globally unique across
+jobs and processes because they are handed out in blocks from the database.
+Blocks make IDs unordered across processes, so listings follow (found_at, id),
+and a job run elsewhere is followed by the per-job sequence number its rows get
+when they are written. Rows are tagged with the job attempt that wrote them.
+
+Usage:
+    python lead_store.py export qualified_leads.csv   # dump qualified leads to CSV
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+if __name__ == "__main__":
+    # Run as a script: load .env before this and the sibling modules read their settings
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from metrics import LEADS
+
+# === CONFIGURATION ===
+LEAD_STORE_PATH = os.getenv("LEAD_STORE_PATH", "leads.db")
+LEAD_STORE_BATCH_SIZE = int(os.getenv("LEAD_STORE_BATCH_SIZE", "50"))
+LEAD_STORE_FLUSH_SECONDS = float(os.getenv("LEAD_STORE_FLUSH_SECONDS", "1"))
+ID_BLOCK_SIZE = 1000
+MAX_PAGE_SIZE = 500
+
+COLUMNS = ["id", "search_id", "title", "link", "link_hash", "snippet", "platform",
+           "search_term", "is_qualified", "ai_reason", "found_at"]
+
+
+def link_hash(link):
+    return hashlib.sha1(link.encode("utf-8")).hexdigest()
+
+
+def make_cursor(lead):
+    """Opaque keyset cursor for the position just past a lead"""
+    return f"{lead['found_at']}|{lead['id']}"
+
+
+def parse_cursor(cursor):
+    """(found_at, id) from make_cursor's string; ValueError when malformed"""
+    found_at, separator, lead_id = str(cursor).rpartition("|")
+    if not separator or not found_at:
+        raise ValueError(f"bad cursor: {cursor!r}")
+    return found_at, int(lead_id)
+
+
+class LeadStore:
+    def __init__(self, path=LEAD_STORE_PATH, batch_size=LEAD_STORE_BATCH_SIZE,
+                 flush_seconds=LEAD_STORE_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.lock = threading.RLock()
+        self.pending = []
+        self.next_id = 0
+        self.id_limit = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leads (
+                id INTEGER PRIMARY KEY,
+                search_id TEXT,
+                title TEXT NOT NULL,
+                link TEXT NOT NULL,
+                link_hash TEXT NOT NULL,
+                snippet TEXT,
+                platform TEXT,
+                search_term TEXT,
+                is_qualified INTEGER NOT NULL,
+                ai_reason TEXT,
+                found_at TEXT NOT NULL,
+                attempt INTEGER NOT NULL DEFAULT 1,
+                seq INTEGER
+            )
+        """)
+        existing = {column[1] for column in self.conn.execute("PRAGMA table_info(leads)")}
+        if "seq" not in existing:
+            self.conn.execute("ALTER TABLE leads ADD COLUMN attempt INTEGER NOT NULL DEFAULT 1")
+            self.conn.execute("ALTER TABLE leads ADD COLUMN seq INTEGER")
+            self.conn.execute("UPDATE leads SET seq = id")  # one process wrote each job before
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_link_hash ON leads(link_hash)")
+        # Listings are ordered by (found_at, id); drop the id-ordered indexes of older databases
+        for old_index in ("idx_leads_platform", "idx_leads_found_at", "idx_leads_qualified"):
+            self.conn.execute(f"DROP INDEX IF EXISTS {old_index}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_platform_found ON leads(platform, found_at, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_found ON leads(found_at, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_qualified_found ON leads(is_qualified, found_at, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_search ON leads(search_id, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_search_seq ON leads(search_id, seq)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS id_allocator (next_id INTEGER NOT NULL)")
+        if self.conn.execute("SELECT COUNT(*) FROM id_allocator").fetchone()[0] == 0:
+            start = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM leads").fetchone()[0]
+            self.conn.execute("INSERT INTO id_allocator (next_id) VALUES (?)", (start,))
+
+        self.flush_seconds = flush_seconds
+        self.flusher = None
+        if flush_seconds:
+            self.stop_event = threading.Event()
+            self.flusher = threading.Thread(target=self._flush_loop, name="lead-store-flush", daemon=True)
+            self.flusher.start()
+
+    # === IDs ===
+    def _allocate_id(self):
+        """Take the next ID from this process's block, reserving a new block when it runs out"""
+        if self.next_id >= self.id_limit:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                start = self.conn.execute("SELECT next_id FROM id_allocator").fetchone()[0]
+                self.conn.execute("UPDATE id_allocator SET next_id = ?", (start + ID_BLOCK_SIZE,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.next_id, self.id_limit = start, start + ID_BLOCK_SIZE
+        lead_id = self.next_id
+        self.next_id += 1
+        return lead_id
+
+    # === Writes ===
+    def add(self, search_id, title, link, snippet, platform, search_term, is_qualified, ai_reason,
+            found_at=None, attempt=1):
+        """Queue a lead for the next batch and return it (with its ID) as a dict"""
+        LEADS.labels(platform, "true" if is_qualified else "false").inc()
+        with self.lock:
+            lead = {
+                "id": self._allocate_id(),
+                "search_id": search_id,
+                "title": title,
+                "link": link,
+                "snippet": snippet,
+                "platform": platform,
+                "search_term": search_term,
+                "is_qualified": bool(is_qualified),
+                "ai_reason": ai_reason,
+                "found_at": found_at or datetime.now().isoformat(timespec="microseconds"),
+            }
+            self.pending.append((lead, attempt))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            return dict(lead)
+
+    def flush(self):
+        """Write all queued leads in one transaction, numbering each job's rows in commit order"""
+        with self.lock:
+            if not self.pending:
+                return
+            columns = COLUMNS + ["attempt", "seq"]
+            # IMMEDIATE: the seq read below must not race another process's write
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                last_seq = {}
+                rows = []
+                for lead, attempt in self.pending:
+                    search_id = lead["search_id"]
+                    if search_id not in last_seq:
+                        last_seq[search_id] = self.conn.execute(
+                            "SELECT COALESCE(MAX(seq), 0) FROM leads WHERE search_id IS ?", (search_id,)
+                        ).fetchone()[0]
+                    last_seq[search_id] += 1
+                    rows.append((lead["id"], search_id, lead["title"], lead["link"], link_hash(lead["link"]),
+                                 lead["snippet"], lead["platform"], lead["search_term"], int(lead["is_qualified"]),
+                                 lead["ai_reason"], lead["found_at"], attempt, last_seq[search_id]))
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO leads ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    rows,
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.pending = []
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Lead store flush error: {e}")
+
+    # === Reads ===
+    def _row_to_lead(self, row):
+        lead = dict(zip(COLUMNS, row))
+        lead.pop("link_hash")
+        lead["is_qualified"] = bool(lead["is_qualified"])
+        return lead
+
+    def get(self, lead_id):
+        with self.lock:
+            self.flush()
+            row = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM leads WHERE id = ?", (lead_id,)).fetchone()
+        return self._row_to_lead(row) if row else None
+
+    def find_by_link(self, link):
+        with self.lock:
+            self.flush()
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM leads WHERE link_hash = ? ORDER BY id DESC", (link_hash(link),)
+            ).fetchall()
+        return [self._row_to_lead(row) for row in rows if row[3] == link]
+
+    def _filters(self, qualified=True, platform=None, search_id=None, since=None):
+        clauses, params = [], []
+        if qualified is not None:
+            clauses.append("is_qualified = ?")
+            params.append(int(bool(qualified)))
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform.title())
+        if search_id:
+            clauses.append("search_id = ?")
+            params.append(search_id)
+        if since:
+            clauses.append("found_at >= ?")
+            params.append(since)
+        return clauses, params
+
+    def list_leads(self, limit=50, before=None, qualified=True, platform=None, search_id=None, since=None):
+        """Newest-first keyset page. Returns (leads, next_cursor); pass next_cursor back as before.
+        Pages follow (found_at, id), since IDs from different processes' blocks aren't in insertion order."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = self._filters(qualified, platform, search_id, since)
+        if before is not None:
+            found_at, lead_id = parse_cursor(before)
+            clauses.append("(found_at < ? OR (found_at = ? AND id < ?))")
+            params += [found_at, found_at, lead_id]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            self.flush()
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM leads {where} ORDER BY found_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        leads = [self._row_to_lead(row) for row in rows[:limit]]
+        next_cursor = make_cursor(leads[-1]) if len(rows) > limit else None
+        return leads, next_cursor
+
+    def count_leads(self, qualified=True, platform=None, search_id=None, since=None):
+        """Number of leads matching the same filters as list_leads"""
+        clauses, params = self._filters(qualified, platform, search_id, since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            self.flush()
+            return self.conn.execute(f"SELECT COUNT(*) FROM leads {where}", params).fetchone()[0]
+
+    def leads_after(self, search_id, after_seq=0, limit=MAX_PAGE_SIZE, attempt=None):
+        """One job's leads in the order they were written, after a known seq (for following a job run in
+        another process). Each lead carries its "seq", which (unlike IDs) grows in commit order whichever
+        process wrote the row, so paging on it never skips a row committed late."""
+        where, params = "search_id = ? AND seq > ?", [search_id, after_seq]
+        if attempt is not None:
+            where += " AND attempt = ?"
+            params.append(attempt)
+        with self.lock:
+            self.flush()
+            rows = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)}, seq FROM leads WHERE {where} ORDER BY seq LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        leads = []
+        for row in rows:
+            lead = self._row_to_lead(row[:-1])
+            lead["seq"] = row[-1]
+            leads.append(lead)
+        return leads
+
+    def job_leads_after(self, search_id, attempt, after_seq=0, limit=MAX_PAGE_SIZE):
+        """One attempt's leads after a known seq (see leads_after)"""
+        return self.leads_after(search_id, after_seq, limit, attempt=attempt)
+
+    def delete_attempts_before(self, search_id, attempt):
+        """Remove the leads earlier attempts of a job wrote (a retry reruns it from scratch). Returns the count."""
+        with self.lock:
+            self.flush()
+            cursor = self.conn.execute("DELETE FROM leads WHERE search_id = ? AND attempt < ?", (search_id, attempt))
+        return cursor.rowcount
+
+    def export_csv(self, path, search_id=None):
+        """Append qualified leads (optionally from one run) to a CSV file in a single write"""
+        with self.lock:
+            self.flush()
+            query = "SELECT title, link, ai_reason FROM leads WHERE is_qualified = 1"
+            params = ()
+            if search_id:
+                query += " AND search_id = ?"
+                params = (search_id,)
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        file_exists = os.path.isfile(path)
+        with open(path, "a", newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            if not file_exists:
+                writer.writerow(["Title", "Link", "Reason"])  # Add headers
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        if self.flusher is not None:
+            self.stop_event.set()
+            self.flusher.join(timeout=self.flush_seconds + 1)
+        self.flush()
+        self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_lead_store():
+    """Process-wide store, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LeadStore()
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lead store utilities")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("path", nargs="?", default="qualified_leads.csv")
+    args = parser.parse_args()
+    store = get_lead_store()
+    count = store.export_csv(args.path)
+    store.close()
+    print(f"✅ Exported {count} qualified leads to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Process metrics for LeadGeneratorAI in the Prometheus text format
+Counters, gauges and latency histograms cheap enough for the hot path (one
+lock and a bisect per observation); the API serves them on /api/metrics and
+worker.py on --metrics-port. No prometheus_client dependency.
+
+    from metrics import STAGE_SECONDS, timed
+
+    @timed("scrape")
+    def scrape_text(url): ...
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+
+# === CONFIGURATION ===
+# Estimated cost in USD per 1K tokens (defaults: gpt-3.5-turbo list price)
+OPENAI_PROMPT_COST_PER_1K = float(os.getenv("OPENAI_PROMPT_COST_PER_1K", "0.0005"))
+OPENAI_COMPLETION_COST_PER_1K = float(os.getenv("OPENAI_COMPLETION_COST_PER_1K", "0.0015"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn  # computes the value(s) at scrape time instead of being updated by the code
+        self.lock = threading.Lock()
+        self.children = {}
+        with _registry_lock:
+            _registry.append(self)
+
+    def labels(self, *values):
+        """Child for one combination of label values (created on first use)"""
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self.lock:
+                child = self.children.setdefault(values, self.new_child())
+        return child
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) for every sample to render"""
+        if self.fn is None:
+            return [("", values, (), child.value) for values, child in list(self.children.items())]
+        try:
+            current = self.fn()
+        except Exception as e:
+            print(f"⚠️  Metric {self.name} failed: {e}")
+            return []
+        if isinstance(current, dict):
+            return [("", values if isinstance(values, tuple) else (values,), (), value)
+                    for values, value in current.items()]
+        return [("", (), (), current)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labelnames, values, extra)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class CounterChild:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def new_child(self):
+        return CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def value(self, *values):
+        child = self.children.get(values)
+        return child.value if child else 0
+
+
+class GaugeChild(CounterChild):
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+
+class Gauge(Metric):
+    """Gauge set by the code, or computed when scraped by fn() (a number, or {label values: number})"""
+    kind = "gauge"
+
+    def new_child(self):
+        return GaugeChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def count(self, *values):
+        child = self.children.get(values)
+        return sum(child.snapshot()[0]) if child else 0
+
+    def samples(self):
+        samples = []
+        for values, child in list(self.children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", values, (("le", format_value(float(bound))),), cumulative))
+            samples.append(("_sum", values, (), total))
+            samples.append(("_count", values, (), cumulative))
+        return samples
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# === Pipeline metrics ===
+STAGE_SECONDS = Histogram("leadgen_stage_seconds", "Time spent per pipeline stage call", ["stage"])
+STAGE_ERRORS = Counter("leadgen_stage_errors_total", "Pipeline stage calls that raised", ["stage"])
+PROVIDER_SECONDS = Histogram("leadgen_provider_request_seconds",
+                             "External request latency until response headers, by provider", ["provider"])
+PROVIDER_ERRORS = Counter("leadgen_provider_errors_total",
+                          "Failed external requests by provider and reason (429, 4xx, 5xx, exception)",
+                          ["provider", "reason"])
+OPENAI_TOKENS = Counter("leadgen_openai_tokens_total", "OpenAI tokens used", ["kind"])
+OPENAI_COST = Counter("leadgen_openai_cost_dollars_total", "Estimated OpenAI spend in USD")
+LEADS = Counter("leadgen_leads_total", "Results checked, by platform and verdict", ["platform", "qualified"])
+QUALIFY_TIERS = Counter("leadgen_qualify_tier_total",
+                        "Results qualified from the provider's post body (snippet), from the page after the "
+                        "body left the model unsure (escalated), or from the page alone (page)", ["tier"])
+
+
+def timed(stage):
+    """Decorator recording a call's duration in leadgen_stage_seconds (and failures in leadgen_stage_errors_total)"""
+    histogram = STAGE_SECONDS.labels(stage)
+    errors = STAGE_ERRORS.labels(stage)
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def observe_request(provider, seconds, status=None, error=False):
+    """One external request: latency unless it raised, an error reason for HTTP errors and exceptions"""
+    if status is not None and status >= 400:
+        PROVIDER_ERRORS.labels(provider, "429" if status == 429 else f"{status // 100}xx").inc()
+    elif error:
+        PROVIDER_ERRORS.labels(provider, "exception").inc()
+    if not error:
+        PROVIDER_SECONDS.labels(provider).observe(seconds)
+
+
+def record_openai_usage(prompt_tokens, completion_tokens):
+    OPENAI_TOKENS.labels("prompt").inc(prompt_tokens)
+    OPENAI_TOKENS.labels("completion").inc(completion_tokens)
+    OPENAI_COST.inc(prompt_tokens / 1000 * OPENAI_PROMPT_COST_PER_1K
+                    + completion_tokens / 1000 * OPENAI_COMPLETION_COST_PER_1K)
+
+
+def serve(port, host="0.0.0.0"):
+    """Serve /metrics from a background thread (for worker processes, which have no Flask app)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
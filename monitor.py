@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Continuous Reddit monitor for LeadGeneratorAI
+Instead of re-running every search from scratch, watch r/<subreddit>/new for
+each configured subreddit and push only posts newer than a durable high-water
+mark through filter → qualify → store. A quiet poll is one request and no other
+work, so a cycle costs as much as the number of new posts, not the total.
+
+The poll interval adapts per subreddit: it halves (down to MONITOR_MIN_INTERVAL)
+when new posts arrive and grows by half (up to MONITOR_MAX_INTERVAL) while it's
+quiet or rate limited. A post whose verdict failed (e.g. OpenAI was down) holds
+the cursor back, so the next poll checks it again. Leads are stored under the search id "monitor" and show
+up in GET /api/monitor as soon as a cycle ends.
+
+Usage:
+    python monitor.py                          # watch MONITOR_SUBREDDITS until stopped
+    python monitor.py --once                   # poll each subreddit once, then exit
+    python monitor.py --subreddits durham,raleigh --metrics-port 9200
+"""
+
+import argparse
+import os
+import time
+
+if __name__ == "__main__":
+    # Run as a script: load .env before this and the sibling modules read their settings
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from metrics import Counter, Gauge, serve as serve_metrics
+
+# === CONFIGURATION ===
+MONITOR_SUBREDDITS = os.getenv("MONITOR_SUBREDDITS", "durham")
+MONITOR_MIN_INTERVAL = float(os.getenv("MONITOR_MIN_INTERVAL", "15"))  # seconds
+MONITOR_MAX_INTERVAL = float(os.getenv("MONITOR_MAX_INTERVAL", "300"))
+MONITOR_BACKFILL = int(os.getenv("MONITOR_BACKFILL", "25"))  # newest posts checked on the very first poll
+MONITOR_PAGE_SIZE = 100  # Reddit's maximum listing size
+MONITOR_MAX_PAGES = 5  # catching up after downtime stops after this many pages
+MONITOR_SEARCH_ID = "monitor"
+
+NEW_POSTS = Counter("leadgen_monitor_new_posts_total", "Posts newer than the cursor, by subreddit", ["subreddit"])
+POLL_ERRORS = Counter("leadgen_monitor_poll_errors_total", "Failed /new polls, by subreddit", ["subreddit"])
+
+# Watches of every monitor in this process, read by the interval gauge when metrics are scraped
+_live_watches = []
+
+Gauge("leadgen_monitor_poll_interval_seconds", "Current poll interval per subreddit", ["subreddit"],
+      fn=lambda: {watch.name: watch.interval for watch in list(_live_watches)})
+
+
+def parse_subreddits(spec):
+    """'durham, r/raleigh' -> ['durham', 'raleigh']"""
+    names = []
+    for name in spec.split(","):
+        name = name.strip().strip("/")
+        if name.lower().startswith("r/"):
+            name = name[2:]
+        if name and name.lower() not in [existing.lower() for existing in names]:
+            names.append(name)
+    return names
+
+
+def cursor_key(subreddit):
+    return f"new:r/{subreddit}"
+
+
+def post_number(fullname):
+    """Reddit fullnames (t3_<base36 id>) grow with every new post"""
+    return int(fullname.split("_", 1)[1], 36)
+
+
+def fullname_before(fullname):
+    """t3_p05 -> t3_p04: a cursor just below `fullname`, so the next poll fetches it again"""
+    kind, number = fullname.split("_", 1)[0], post_number(fullname) - 1
+    digits = ""
+    while True:
+        number, digit = divmod(number, 36)
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"[digit] + digits
+        if not number:
+            return f"{kind}_{digits}"
+
+
+class SubredditWatch:
+    """Poll schedule and high-water mark for one subreddit"""
+
+    def __init__(self, name, cursor, interval):
+        self.name = name
+        self.cursor = cursor  # fullname of the newest post already processed
+        self.interval = interval
+        self.next_poll = 0.0
+        self.last_poll = None
+        self.last_new = 0
+
+
+class RedditMonitor:
+    """Polls /new for each subreddit and qualifies only the posts past its cursor"""
+
+    def __init__(self, subreddits, base_url=None, cursors=None, min_interval=MONITOR_MIN_INTERVAL,
+                 max_interval=MONITOR_MAX_INTERVAL, backfill=MONITOR_BACKFILL, clock=time.time):
+        from lead_finder import get_config
+        from search_cache import get_search_cache
+        self.base_url = base_url or get_config().reddit_base_url
+        self.cursors = cursors or get_search_cache()  # cursors live next to the search cursors
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backfill = backfill
+        self.clock = clock
+        self.watches = [SubredditWatch(name, self.cursors.get_cursor(cursor_key(name)), min_interval)
+                        for name in subreddits]
+        _live_watches.extend(self.watches)
+
+    # === Polling ===
+    def fetch_new(self, watch):
+        """Posts newer than watch.cursor, newest first. Returns (result dicts, newest fullname).
+        Without a cursor yet, only the newest `backfill` posts are returned."""
+        from lead_finder import http_get, reddit_result
+        from rate_limiter import limiter
+
+        url = f"{self.base_url}/r/{watch.name}/new.json"
+        headers = {"User-Agent": "LeadGeneratorBot/1.0"}
+        limit = MONITOR_PAGE_SIZE if watch.cursor else max(self.backfill, 1)
+        seen = post_number(watch.cursor) if watch.cursor else None
+        posts, newest, after = [], None, None
+        for _ in range(MONITOR_MAX_PAGES):
+            params = {"limit": limit}
+            if after:
+                params["after"] = after
+            limiter.acquire("reddit")
+            response = http_get(url, params=params, headers=headers, provider="reddit")
+            if response.status_code == 429:
+                limiter.defer_from_headers("reddit", response.headers, default=60)
+            response.raise_for_status()
+            data = response.json().get("data", {})
+            children = [child.get("data", {}) for child in data.get("children", [])]
+            reached_cursor = False
+            for post_data in children:
+                name = post_data.get("name", "")
+                if seen is not None and post_number(name) <= seen:
+                    reached_cursor = True
+                    break
+                newest = newest or name
+                if seen is None and len(posts) >= self.backfill:
+                    break
+                result = reddit_result(post_data)
+                result["term"] = f"r/{watch.name}/new"
+                result["fullname"] = name
+                posts.append(result)
+            after = data.get("after")
+            # The first poll only looks at the newest `backfill` posts, not the whole history
+            if reached_cursor or seen is None or not after or len(children) < limit:
+                break
+        return posts, newest
+
+    def adapt(self, watch, new_posts, failed=False):
+        """Shorter intervals while posts keep coming, longer ones while it's quiet or failing"""
+        if new_posts and not failed:
+            watch.interval = max(self.min_interval, watch.interval / 2)
+        else:
+            watch.interval = min(self.max_interval, watch.interval * 1.5)
+        watch.next_poll = self.clock() + watch.interval
+
+    # === One cycle ===
+    def run_cycle(self):
+        """Poll every subreddit that is due, qualify its new posts and advance the cursors.
+        Returns the number of new posts."""
+        now = self.clock()
+        batches = {}
+        newest_seen = {}
+        polled = []
+        for watch in self.watches:
+            if watch.next_poll > now:
+                continue
+            try:
+                posts, newest = self.fetch_new(watch)
+            except Exception as e:
+                print(f"⚠️  Polling r/{watch.name}/new failed: {e}")
+                POLL_ERRORS.labels(watch.name).inc()
+                self.adapt(watch, 0, failed=True)
+                continue
+            watch.last_poll = now
+            watch.last_new = len(posts)
+            NEW_POSTS.labels(watch.name).inc(len(posts))
+            if posts:
+                print(f"🆕 {len(posts)} new posts in r/{watch.name}")
+                batches[watch.name] = posts
+            if newest:
+                newest_seen[watch.name] = newest
+            polled.append(watch)
+
+        failed = self.process(batches) if batches else set()
+        # Cursors move only once the leads are stored, so a crash re-checks (never skips) posts
+        for watch in polled:
+            posts = batches.get(watch.name, [])
+            unqualified = [post for post in posts if post["link"] in failed]
+            cursor = newest_seen.get(watch.name)
+            if unqualified:
+                # Stop just below the oldest post without a verdict. Even without an earlier cursor
+                # the next poll then pages back to it instead of taking a fresh backfill.
+                cursor = fullname_before(unqualified[-1]["fullname"])
+                print(f"⚠️  {len(unqualified)} posts in r/{watch.name} couldn't be qualified, retrying next poll")
+            self.adapt(watch, len(posts), failed=bool(unqualified))
+            if cursor and cursor != watch.cursor:
+                watch.cursor = cursor
+                self.cursors.set_cursor(cursor_key(watch.name), watch.cursor)
+        return sum(len(posts) for posts in batches.values())
+
+    def process(self, batches):
+        """filter → qualify (snippet first) → store, through the same pipeline as a search job.
+        Returns the links of posts whose verdict failed; they aren't stored."""
+        from lead_finder import is_filtered_result, is_repost, handle_verdict
+        from lead_store import get_lead_store
+        from pipeline import LeadPipeline
+
+        store = get_lead_store()
+        failed = set()
+
+        def is_stored(result):
+            # Posts newer than a failed one come around again with it
+            return any(lead["search_id"] == MONITOR_SEARCH_ID for lead in store.find_by_link(result["link"]))
+
+        def accept(site, result):
+            return not is_filtered_result(result) and not is_stored(result) and not is_repost(result)
+
+        def on_result(site, result, is_lead, reason):
+            if not reason:  # no reply from OpenAI, not a "No"
+                failed.add(result["link"])
+                return
+            handle_verdict(MONITOR_SEARCH_ID, site, result, is_lead, reason)
+
+        LeadPipeline(search_fn=batches.get).run(
+            [("reddit", name) for name in batches],
+            on_result,
+            accept=accept,
+            max_results=max(len(posts) for posts in batches.values()),
+        )
+        store.flush()
+        return failed
+
+    def run(self, once=False, sleep=time.sleep):
+        while True:
+            self.run_cycle()
+            if once:
+                return
+            sleep(max(0.0, min(watch.next_poll for watch in self.watches) - self.clock()))
+
+    def status(self):
+        return [{
+            "subreddit": watch.name,
+            "cursor": watch.cursor,
+            "interval_seconds": round(watch.interval, 1),
+            "last_poll": watch.last_poll,
+            "last_new_posts": watch.last_new,
+        } for watch in self.watches]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch subreddits for new leads")
+    parser.add_argument("--subreddits", default=MONITOR_SUBREDDITS, help="comma-separated, e.g. durham,raleigh")
+    parser.add_argument("--once", action="store_true", help="poll each subreddit once, then exit")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    subreddits = parse_subreddits(args.subreddits)
+    if not subreddits:
+        parser.error("no subreddits to watch")
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"📈 Monitor metrics on http://localhost:{args.metrics_port}/metrics")
+    monitor = RedditMonitor(subreddits)
+    print(f"👀 Watching {', '.join('r/' + name for name in subreddits)} for new posts")
+    try:
+        monitor.run(once=args.once)
+    except KeyboardInterrupt:
+        print("\n👋 Monitor stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Concurrent search → scrape → qualify pipeline for LeadGeneratorAI
+Each stage runs as a pool of asyncio workers joined by bounded queues,
+so slow network calls overlap instead of running one at a time.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Gauge, QUALIFY_TIERS
+
+# === CONFIGURATION ===
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "4"))
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+QUALIFY_CONCURRENCY = int(os.getenv("QUALIFY_CONCURRENCY", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
+QUALIFY_BATCH_SIZE = int(os.getenv("QUALIFY_BATCH_SIZE", "8"))
+QUALIFY_BATCH_WAIT = float(os.getenv("QUALIFY_BATCH_WAIT", "0.5"))  # seconds to wait for a batch to fill
+LOCATION_FANOUT_MAX = int(os.getenv("LOCATION_FANOUT_MAX", "4"))  # cities of one job searched side by side
+
+
+# Stage queues of every running pipeline, read by the queue-depth gauge when metrics are scraped
+_live_queues = []
+
+def queue_depths():
+    depths = {"search": 0, "scrape": 0, "qualify": 0}
+    for stage, stage_queue in list(_live_queues):
+        depths[stage] += stage_queue.qsize()
+    return depths
+
+Gauge("leadgen_pipeline_queue_depth", "Items waiting for each pipeline stage across running searches",
+      ["stage"], fn=queue_depths)
+
+
+class PipelineConfig:
+    """Worker counts per stage and the size of the queues between them"""
+
+    def __init__(self, search_concurrency=None, scrape_concurrency=None,
+                 qualify_concurrency=None, queue_size=None,
+                 qualify_batch_size=None, qualify_batch_wait=None):
+        self.search_concurrency = search_concurrency or SEARCH_CONCURRENCY
+        self.scrape_concurrency = scrape_concurrency or SCRAPE_CONCURRENCY
+        self.qualify_concurrency = qualify_concurrency or QUALIFY_CONCURRENCY
+        self.queue_size = queue_size or PIPELINE_QUEUE_SIZE
+        self.qualify_batch_size = qualify_batch_size or QUALIFY_BATCH_SIZE
+        self.qualify_batch_wait = QUALIFY_BATCH_WAIT if qualify_batch_wait is None else qualify_batch_wait
+
+    def fan_out(self, locations):
+        """This config with every stage widened once per location (up to LOCATION_FANOUT_MAX),
+        so a multi-city job runs its cities side by side; provider rate limits stay shared"""
+        factor = max(1, min(locations, LOCATION_FANOUT_MAX))
+        return PipelineConfig(self.search_concurrency * factor, self.scrape_concurrency * factor,
+                              self.qualify_concurrency * factor, self.queue_size * factor,
+                              self.qualify_batch_size, self.qualify_batch_wait)
+
+
+class LeadPipeline:
+    """
+    Runs queries through three stages:
+      1. search  - search_fn(query) -> list of result dicts
+      2. scrape  - scrape_fn(link) -> page text
+      3. qualify - qualify_fn(text) -> (is_lead, reason), or
+                   batch_qualify_fn([text, ...]) -> [(is_lead, reason), ...]
+                   when given; batches fill from the queue up to
+                   qualify_batch_size items or qualify_batch_wait seconds
+
+    Snippet first: with snippet_fn(result) -> text or None, a result whose
+    search provider already returned its full text skips the scrape stage;
+    if uncertain_fn((is_lead, reason)) says that text wasn't enough, the
+    result goes back to the scrape stage and its page is qualified like any
+    other (batched, within scrape_concurrency). Each result is tagged with
+    result["tier"] ("snippet", "escalated" or "page") before on_result, and
+    run() returns the count of results per tier.
+
+    The stage functions are the blocking ones from lead_finder; they run on a
+    dedicated thread pool sized to the total stage concurrency.
+
+    Callbacks (all invoked on the event loop thread, one at a time):
+      accept(site, result)  -> bool, filter results before they are scraped
+      on_result(site, result, is_lead, reason)
+      on_query_done(site, query)
+      is_cancelled()        -> bool, checked before each unit of work
+    """
+
+    def __init__(self, search_fn=None, scrape_fn=None, qualify_fn=None, config=None,
+                 batch_qualify_fn=None, snippet_fn=None, uncertain_fn=None):
+        if search_fn is None or scrape_fn is None or qualify_fn is None:
+            from lead_finder import (google_search, scrape_text, is_good_lead, qualify_leads_batch,
+                                     provider_text, is_uncertain)
+            search_fn = search_fn or google_search
+            scrape_fn = scrape_fn or scrape_text
+            if qualify_fn is None:
+                qualify_fn = is_good_lead
+                batch_qualify_fn = batch_qualify_fn or qualify_leads_batch
+                snippet_fn = snippet_fn or provider_text
+                uncertain_fn = uncertain_fn or is_uncertain
+        self.search_fn = search_fn
+        self.scrape_fn = scrape_fn
+        self.qualify_fn = qualify_fn
+        self.batch_qualify_fn = batch_qualify_fn
+        self.snippet_fn = snippet_fn
+        self.uncertain_fn = uncertain_fn
+        self.config = config or PipelineConfig()
+
+    def run(self, queries, on_result, accept=None, on_query_done=None,
+            is_cancelled=None, max_results=5):
+        """Run the pipeline to completion (blocking). queries is a list of (site, query)."""
+        return asyncio.run(self.run_async(
+            queries, on_result, accept=accept, on_query_done=on_query_done,
+            is_cancelled=is_cancelled, max_results=max_results))
+
+    async def run_async(self, queries, on_result, accept=None, on_query_done=None,
+                        is_cancelled=None, max_results=5):
+        accept = accept or (lambda site, result: True)
+        on_query_done = on_query_done or (lambda site, query: None)
+        is_cancelled = is_cancelled or (lambda: False)
+        config = self.config
+
+        loop = asyncio.get_running_loop()
+        pool_size = config.search_concurrency + config.scrape_concurrency + config.qualify_concurrency
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="lead-pipeline")
+
+        def call(fn, *args):
+            return loop.run_in_executor(executor, fn, *args)
+
+        tiers = {"snippet": 0, "escalated": 0, "page": 0}
+
+        async def fetch(link):
+            try:
+                return await call(self.scrape_fn, link)
+            except Exception as e:
+                print(f"Error scraping {link}: {e}")
+                return ""
+
+        def finish(site, result, tier, verdict):
+            result["tier"] = tier
+            tiers[tier] += 1
+            QUALIFY_TIERS.labels(tier).inc()
+            on_result(site, result, *verdict)
+
+        query_queue = asyncio.Queue()
+        scrape_queue = asyncio.Queue(maxsize=config.queue_size)
+        qualify_queue = asyncio.Queue(maxsize=config.queue_size)
+
+        # Escalations send results from qualify back to scrape, so the stages can't simply be
+        # drained in order; instead count accepted results until each is finished or dropped
+        outstanding = 0
+        settled = asyncio.Event()
+        escalations = set()
+
+        def release():
+            nonlocal outstanding
+            outstanding -= 1
+            if outstanding == 0:
+                settled.set()
+
+        def escalate(site, result, tier, verdict):
+            """Send a result back to be scraped when its post body left the model unsure.
+            Returns False when the verdict stands."""
+            if tier != "snippet" or self.uncertain_fn is None or not self.uncertain_fn(verdict):
+                return False
+            print(f"🔎 Post body wasn't enough, fetching the page: {result.get('link', '')}")
+            # Not awaited: a qualify worker waiting on a full scrape queue could deadlock both stages
+            task = asyncio.create_task(scrape_queue.put((site, result, "escalated", verdict)))
+            escalations.add(task)
+            task.add_done_callback(escalations.discard)
+            return True
+
+        for site, query in queries:
+            query_queue.put_nowait((site, query))
+        live = [("search", query_queue), ("scrape", scrape_queue), ("qualify", qualify_queue)]
+        _live_queues.extend(live)
+
+        async def search_worker():
+            nonlocal outstanding
+            while True:
+                site, query = await query_queue.get()
+                try:
+                    if not is_cancelled():
+                        try:
+                            results = await call(self.search_fn, query)
+                        except Exception as e:
+                            print(f"Search error: {e}")
+                            results = []
+                        for result in (results or [])[:max_results]:
+                            if is_cancelled():
+                                break
+                            if accept(site, result):
+                                outstanding += 1
+                                await scrape_queue.put((site, result, None, None))
+                    on_query_done(site, query)
+                finally:
+                    query_queue.task_done()
+
+        async def scrape_worker():
+            while True:
+                # tier is "escalated" (with the unsure post-body verdict) for a result sent back by qualify
+                site, result, tier, verdict = await scrape_queue.get()
+                handed_off = False
+                try:
+                    if not is_cancelled():
+                        link = result.get("link", "")
+                        text = self.snippet_fn(result) if self.snippet_fn and tier is None else None
+                        if text:
+                            print(f"📝 Checking post body: {result.get('title', '')} | {link}")
+                            await qualify_queue.put((site, result, text, "snippet"))
+                            handed_off = True
+                        else:
+                            if tier is None:
+                                print(f"Checking: {result.get('title', '')} | {link}")
+                            text = await fetch(link)
+                            if text:
+                                await qualify_queue.put((site, result, text, tier or "page"))
+                                handed_off = True
+                            elif verdict is not None:
+                                finish(site, result, tier, verdict)  # no page: the post-body verdict stands
+                finally:
+                    if not handed_off:
+                        release()
+                    scrape_queue.task_done()
+
+        async def qualify_worker():
+            while True:
+                site, result, text, tier = await qualify_queue.get()
+                handed_off = False
+                try:
+                    if not is_cancelled():
+                        try:
+                            verdict = await call(self.qualify_fn, text)
+                        except Exception as e:
+                            print(f"AI error: {e}")
+                            verdict = (False, "")
+                        handed_off = escalate(site, result, tier, verdict)
+                        if not handed_off:
+                            finish(site, result, tier, verdict)
+                finally:
+                    if not handed_off:
+                        release()
+                    qualify_queue.task_done()
+
+        async def next_batch():
+            """Wait for one item, then keep filling until the batch is full or the wait expires"""
+            batch = [await qualify_queue.get()]
+            deadline = loop.time() + config.qualify_batch_wait
+            while len(batch) < config.qualify_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(qualify_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            return batch
+
+        async def batch_qualify_worker():
+            while True:
+                batch = await next_batch()
+                handed_off = 0
+                try:
+                    if not is_cancelled():
+                        texts = [text for _, _, text, _ in batch]
+                        try:
+                            verdicts = await call(self.batch_qualify_fn, texts)
+                        except Exception as e:
+                            print(f"AI error: {e}")
+                            verdicts = [(False, "")] * len(batch)
+                        for (site, result, _, tier), verdict in zip(batch, verdicts):
+                            if escalate(site, result, tier, verdict):
+                                handed_off += 1
+                            else:
+                                finish(site, result, tier, verdict)
+                finally:
+                    for _ in range(len(batch) - handed_off):
+                        release()
+                    for _ in batch:
+                        qualify_queue.task_done()
+
+        if self.batch_qualify_fn is not None and config.qualify_batch_size > 1:
+            qualify_worker = batch_qualify_worker
+
+        stages = [
+            (query_queue, [asyncio.create_task(search_worker()) for _ in range(config.search_concurrency)]),
+            (scrape_queue, [asyncio.create_task(scrape_worker()) for _ in range(config.scrape_concurrency)]),
+            (qualify_queue, [asyncio.create_task(qualify_worker()) for _ in range(config.qualify_concurrency)]),
+        ]
+
+        try:
+            # Once every query is searched no new results arrive; then wait for the
+            # accepted ones (escalations included) to be finished or dropped
+            await query_queue.join()
+            while outstanding:
+                settled.clear()
+                await settled.wait()
+            for _, workers in stages:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            return tiers
+        finally:
+            for task in list(escalations):
+                task.cancel()
+            for _, workers in stages:
+                for worker in workers:
+                    worker.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for entry in live:
+                _live_queues.remove(entry)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Query planner for LeadGeneratorAI
+Merges search phrases that share the same site/location modifiers into
+OR-combined queries under the engine's length limit, drops duplicate queries,
+and maps each merged result back to the phrase (and platform) it came from.
+
+Usage:
+    python query_planner.py --dry-run   # print the planned queries and quota use
+"""
+
+import argparse
+import os
+import re
+
+if __name__ == "__main__":
+    # Run as a script: load .env before the settings below are read
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# === CONFIGURATION ===
+USE_QUERY_PLANNER = os.getenv("USE_QUERY_PLANNER", "true").lower() == "true"
+QUERY_MAX_WORDS = int(os.getenv("QUERY_MAX_WORDS", "32"))  # Google ignores words past 32
+QUERY_MAX_PHRASES = int(os.getenv("QUERY_MAX_PHRASES", "4"))  # keeps ~2-3 of the 10 results per phrase
+RESULTS_PER_PHRASE = 5
+QUERY_MAX_RESULTS = 10  # Google CSE's per-request maximum
+
+_PHRASE = re.compile(r'"([^"]+)"')
+_WORD = re.compile(r"\w+")
+
+
+class PlannedQuery:
+    """One query to send, and the original (site, query) pairs it stands for"""
+
+    def __init__(self, site, modifiers, phrases, sources):
+        self.site = site
+        self.modifiers = modifiers
+        self.phrases = phrases
+        self.sources = sources
+        if len(phrases) == 1:
+            self.query = sources[0]
+        else:
+            alternatives = " OR ".join(f'"{phrase}"' for phrase in phrases)
+            self.query = f"({alternatives}) {modifiers}".strip()
+        self.max_results = min(QUERY_MAX_RESULTS, RESULTS_PER_PHRASE * len(phrases))
+
+    def attribute(self, result):
+        """The original query whose phrase best matches a result's title and snippet"""
+        if len(self.sources) == 1:
+            return self.sources[0]
+        words = set(_WORD.findall(f"{result.get('title', '')} {result.get('snippet', '')}".lower()))
+        best_index, best_score = 0, 0.0
+        for index, phrase in enumerate(self.phrases):
+            phrase_words = _WORD.findall(phrase.lower())
+            score = sum(1 for word in phrase_words if word in words) / (len(phrase_words) or 1)
+            if score > best_score:
+                best_index, best_score = index, score
+        return self.sources[best_index]
+
+
+def split_query(query):
+    """Return (phrase, modifiers) for a query built around one quoted phrase, else (None, query)"""
+    match = _PHRASE.search(query)
+    if not match:
+        return None, query
+    modifiers = " ".join((query[:match.start()] + " " + query[match.end():]).split())
+    return match.group(1), modifiers
+
+
+def word_count(query):
+    return len(query.split())
+
+
+def plan_queries(queries, max_words=QUERY_MAX_WORDS):
+    """queries: list of (site, query). Returns PlannedQuery objects in first-seen order."""
+    plan = []
+    open_groups = {}  # (site, normalized modifiers) -> PlannedQuery still accepting phrases
+    seen = set()
+
+    for site, query in queries:
+        phrase, modifiers = split_query(query)
+        normalized = (" ".join((phrase or "").lower().split()), " ".join(modifiers.lower().split()))
+        if (site, normalized) in seen:
+            continue  # same phrase and modifiers already planned
+        seen.add((site, normalized))
+
+        if phrase is None:
+            plan.append(PlannedQuery(site, modifiers, [query], [query]))
+            continue
+
+        group_key = (site, normalized[1])
+        group = open_groups.get(group_key)
+        if group is not None:
+            candidate = PlannedQuery(site, modifiers, group.phrases + [phrase], group.sources + [query])
+            if word_count(candidate.query) <= max_words and len(candidate.phrases) <= QUERY_MAX_PHRASES:
+                plan[plan.index(group)] = candidate
+                open_groups[group_key] = candidate
+                continue
+        group = PlannedQuery(site, modifiers, [phrase], [query])
+        plan.append(group)
+        open_groups[group_key] = group
+    return plan
+
+
+def plan_search(queries, search_fn):
+    """Plan queries and wrap search_fn so every result carries its original query in result["term"].
+    Returns (planned (site, query) pairs, wrapped search function)."""
+    if not USE_QUERY_PLANNER:
+        return queries, search_fn
+
+    plan = plan_queries(queries)
+    by_query = {planned.query: planned for planned in plan}
+
+    def planned_search(query):
+        planned = by_query.get(query)
+        if planned is None:
+            return search_fn(query)
+        results = search_fn(query, num=planned.max_results)
+        for result in results:
+            result["term"] = planned.attribute(result)
+        return results
+
+    print(f"🧭 Query planner merged {len(queries)} queries into {len(plan)}")
+    return [(planned.site, planned.query) for planned in plan], planned_search
+
+
+def print_plan(queries, google_enabled, daily_quota):
+    plan = plan_queries(queries)
+    for planned in plan:
+        print(f"[{planned.site}] ({len(planned.phrases)} phrase{'s' if len(planned.phrases) != 1 else ''}, "
+              f"{word_count(planned.query)} words) {planned.query}")
+    print()
+    print(f"📊 {len(queries)} original queries → {len(plan)} planned queries")
+    if google_enabled:
+        print(f"   Google CSE quota: {len(plan)} of {daily_quota:.0f}/day "
+              f"(was {len(queries)} without planning)")
+    else:
+        print("   Google CSE not configured: queries go to Reddit directly and use no CSE quota")
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan merged search queries for the configured phrases and locations")
+    parser.add_argument("--dry-run", action="store_true", help="print the planned queries without searching")
+    parser.parse_args()
+
+    from lead_finder import build_queries, get_config
+    from rate_limiter import GOOGLE_CSE_QUERIES_PER_DAY
+    print_plan(build_queries(), get_config().use_google_search, GOOGLE_CSE_QUERIES_PER_DAY)
+
+
+if __name__ == "__main__":
+    main()
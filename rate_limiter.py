@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Process-wide rate limiting for LeadGeneratorAI
+One token bucket per provider budget (Google CSE, Reddit, OpenAI), shared by
+every SearchJob thread, so callers wait exactly as long as the budget requires.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# === CONFIGURATION ===
+GOOGLE_CSE_QUERIES_PER_DAY = float(os.getenv("GOOGLE_CSE_QUERIES_PER_DAY", "100"))
+GOOGLE_CSE_MAX_WAIT = float(os.getenv("GOOGLE_CSE_MAX_WAIT", "5"))  # seconds before falling back
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "30"))
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with reservation semantics.
+    A caller reserves its tokens immediately (the balance may go negative) and
+    then sleeps for the deficit / rate, so concurrent callers are queued in
+    arrival order without polling.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0  # set from Retry-After
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, tokens=1, max_wait=None):
+        """Reserve tokens and return the seconds to wait, or None if that would exceed max_wait"""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            deficit = tokens - self.tokens
+            wait = max(deficit / self.rate if deficit > 0 else 0.0, self.blocked_until - now)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= tokens
+            return wait
+
+    def refund(self, tokens):
+        """Give back tokens (negative values charge extra, e.g. when actual usage exceeds the estimate)"""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def defer(self, seconds):
+        """Block all callers for at least `seconds` (honors Retry-After)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+    def available(self):
+        with self.lock:
+            self._refill(self.clock())
+            return self.tokens
+
+
+class ProviderLimit:
+    """All budgets for one provider, e.g. OpenAI requests/min and tokens/min"""
+
+    def __init__(self, name, buckets, sleep=time.sleep):
+        self.name = name
+        self.buckets = buckets  # {"requests": TokenBucket, "tokens": TokenBucket}
+        self.sleep = sleep
+        self.calls = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rejected = 0
+        self.deferrals = 0
+        self.stats_lock = threading.Lock()
+
+    def acquire(self, requests=1, tokens=0, max_wait=None):
+        """Block until the budget allows this call. Returns False if it would wait longer than max_wait."""
+        wanted = {"requests": requests, "tokens": tokens}
+        reserved = []
+        wait = 0.0
+        for dimension, bucket in self.buckets.items():
+            amount = wanted.get(dimension, 0)
+            if not amount:
+                continue
+            bucket_wait = bucket.reserve(amount, max_wait)
+            if bucket_wait is None:
+                for reserved_bucket, reserved_amount in reserved:
+                    reserved_bucket.refund(reserved_amount)
+                with self.stats_lock:
+                    self.rejected += 1
+                return False
+            reserved.append((bucket, amount))
+            wait = max(wait, bucket_wait)
+
+        with self.stats_lock:
+            self.calls += 1
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+        if wait > 0:
+            self.sleep(wait)
+        return True
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Reconcile a token estimate with the usage the provider reported"""
+        bucket = self.buckets.get("tokens")
+        if bucket and actual_tokens is not None:
+            bucket.refund(estimated_tokens - actual_tokens)
+
+    def defer(self, seconds):
+        with self.stats_lock:
+            self.deferrals += 1
+        for bucket in self.buckets.values():
+            bucket.defer(seconds)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "calls": self.calls,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rejected": self.rejected,
+                "retry_after_deferrals": self.deferrals,
+                "available": {dimension: round(bucket.available(), 2)
+                              for dimension, bucket in self.buckets.items()},
+            }
+
+
+class RateLimiter:
+    """Registry of provider limits shared across the whole process"""
+
+    def __init__(self, providers):
+        self.providers = {provider.name: provider for provider in providers}
+
+    def acquire(self, provider, requests=1, tokens=0, max_wait=None):
+        limit = self.providers.get(provider)
+        if limit is None:
+            return True
+        return limit.acquire(requests=requests, tokens=tokens, max_wait=max_wait)
+
+    def record_usage(self, provider, estimated_tokens, actual_tokens):
+        limit = self.providers.get(provider)
+        if limit is not None:
+            limit.record_usage(estimated_tokens, actual_tokens)
+
+    def defer(self, provider, seconds):
+        limit = self.providers.get(provider)
+        if limit is not None and seconds > 0:
+            print(f"⏳ {provider} asked us to back off for {seconds:.1f}s")
+            limit.defer(seconds)
+
+    def defer_from_headers(self, provider, headers, default=None):
+        """Honor a Retry-After header (seconds or HTTP date) from a 429/503 response"""
+        seconds = parse_retry_after(headers.get("Retry-After") if headers else None)
+        if seconds is None:
+            seconds = default
+        if seconds:
+            self.defer(provider, seconds)
+
+    def stats(self):
+        return {name: limit.stats() for name, limit in self.providers.items()}
+
+
+def parse_retry_after(value):
+    """Return the Retry-After delay in seconds, or None if missing/invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def per_minute(count):
+    return TokenBucket(rate=count / 60.0, capacity=count)
+
+
+def build_default_limiter():
+    return RateLimiter([
+        # CSE's quota is per day; spread it evenly but allow a full day's burst
+        ProviderLimit("google_cse", {
+            "requests": TokenBucket(rate=GOOGLE_CSE_QUERIES_PER_DAY / 86400.0,
+                                    capacity=GOOGLE_CSE_QUERIES_PER_DAY),
+        }),
+        ProviderLimit("reddit", {"requests": per_minute(REDDIT_REQUESTS_PER_MINUTE)}),
+        ProviderLimit("openai", {
+            "requests": per_minute(OPENAI_REQUESTS_PER_MINUTE),
+            "tokens": per_minute(OPENAI_TOKENS_PER_MINUTE),
+        }),
+    ])
+
+
+# Shared by every SearchJob in the process
+limiter = build_default_limiter()
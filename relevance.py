@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Relevance windows for LeadGeneratorAI
+Instead of sending the model the first N characters of a page (often menus,
+sidebars and comment chrome), score each sentence by service, intent and area
+vocabulary and keep only the best ones, in page order, within a token budget.
+"""
+
+import re
+
+# === CONFIGURATION ===
+CHARS_PER_TOKEN = 4  # same rough estimate rate_limiter budgets use
+TITLE_MAX_CHARS = 200
+MIN_CONTEXT_WORDS = 4  # neighbouring passages shorter than this are page chrome, not context
+SUFFIXES = ("ations", "ation", "ments", "ment", "ings", "ing", "ers", "er", "ed", "es", "s")
+
+PASSAGE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Plain words that carry no service meaning when vocabulary is built from search phrases
+STOPWORDS = {"a", "an", "and", "the", "for", "in", "of", "to", "with", "near", "me", "my", "our", "we",
+             "looking", "need", "wanted", "help", "service", "services", "company", "local", "affordable",
+             "quote", "estimate", "hire", "licensed", "general", "home", "house", "specific"}
+
+
+def stem(word):
+    """Crude suffix stripping so 'painter', 'painting' and 'repainted' share the stem 'paint'"""
+    word = word.lower()
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def vocabulary(phrases, stopwords=STOPWORDS):
+    """Stems of the meaningful words in a list of phrases"""
+    stems = set()
+    for phrase in phrases:
+        for word in re.findall(r"[a-z]+", phrase.lower()):
+            if word not in stopwords and len(word) > 2:
+                stems.add(stem(word))
+    return sorted(stems)
+
+
+def term_pattern(terms):
+    """One regex matching any term at a word start (so stems match their inflections)"""
+    terms = sorted({term.lower() for term in terms if term}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+class RelevanceScorer:
+    """
+    Scores passages by how much they read like a service request:
+      service terms (what we do), intent terms (need / looking for / quote)
+      and area terms (where we work); service + intent together score extra.
+    """
+
+    def __init__(self, service_terms, intent_terms, area_terms=()):
+        self.service = term_pattern(service_terms)
+        self.intent = term_pattern(intent_terms)
+        self.area = term_pattern(area_terms)
+
+    def score(self, passage):
+        lowered = passage.lower()
+        service = min(len(self.service.findall(lowered)), 3) if self.service else 0
+        intent = min(len(self.intent.findall(lowered)), 3) if self.intent else 0
+        area = min(len(self.area.findall(lowered)), 1) if self.area else 0
+        if not service and not intent:
+            return 0  # a place name alone doesn't make a passage relevant
+        score = 2 * service + 3 * intent + area
+        if service and intent:
+            score += 3
+        return score
+
+    def window(self, text, budget_tokens):
+        """
+        The page title plus the highest-scoring passages that fit in budget_tokens,
+        kept in page order. Text already within budget is returned unchanged; text
+        with nothing relevant falls back to its beginning.
+        """
+        budget = budget_tokens * CHARS_PER_TOKEN
+        if len(text) <= budget:
+            return text
+
+        passages = []
+        seen = set()
+        for passage in PASSAGE_SPLIT.split(text):
+            passage = passage.strip()
+            if passage and passage not in seen:  # menus and sidebars repeat
+                seen.add(passage)
+                passages.append(passage)
+        if not passages:
+            return text[:budget]
+
+        title = passages[0][:TITLE_MAX_CHARS]
+        remaining = budget - len(title)
+        scored = [(self.score(passage), index) for index, passage in enumerate(passages) if index > 0]
+        chosen = []
+        for score, index in sorted(scored, key=lambda item: (-item[0], item[1])):
+            if score <= 0 or remaining <= 0:
+                break
+            cost = len(passages[index]) + 1
+            if cost <= remaining:
+                chosen.append(index)
+                remaining -= cost
+            elif not chosen:
+                # A single very long relevant passage: keep as much of it as fits
+                passages[index] = passages[index][:remaining - 1]
+                chosen.append(index)
+                remaining = 0
+
+        if not chosen:
+            return text[:budget]
+
+        # Spend what's left on the sentences right after (then before) the chosen ones
+        for index in list(chosen):
+            for neighbour in (index + 1, index - 1):
+                if neighbour <= 0 or neighbour >= len(passages) or neighbour in chosen:
+                    continue
+                passage = passages[neighbour]
+                if len(passage.split()) >= MIN_CONTEXT_WORDS and len(passage) + 1 <= remaining:
+                    chosen.append(neighbour)
+                    remaining -= len(passage) + 1
+        return "\n".join([title] + [passages[index] for index in sorted(chosen)])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Persistent search-result cache for LeadGeneratorAI
+Results are keyed by provider + normalized query with a configurable TTL, so
+repeated jobs don't spend Google CSE quota on queries that just ran. Reddit
+queries also keep the newest post fullname seen, for incremental `before=` fetches.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# === CONFIGURATION ===
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "search_cache.db")
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "6"))
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """SQLite-backed cache of search results and Reddit cursors"""
+
+    def __init__(self, path=SEARCH_CACHE_PATH, ttl_seconds=SEARCH_CACHE_TTL_HOURS * 3600, clock=time.time):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_results (
+                provider TEXT NOT NULL,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (provider, query)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reddit_cursors (
+                query TEXT PRIMARY KEY,
+                newest_fullname TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, provider, query, allow_stale=False):
+        """Cached results list, or None when missing (or expired unless allow_stale)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT results, fetched_at FROM search_results WHERE provider = ? AND query = ?",
+                (provider, normalize_query(query)),
+            ).fetchone()
+            fresh = row is not None and self.clock() - row[1] <= self.ttl_seconds
+            if not allow_stale:
+                if fresh:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if row is None or not (fresh or allow_stale):
+                return None
+            return json.loads(row[0])
+
+    def put(self, provider, query, results):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_results (provider, query, results, fetched_at) VALUES (?, ?, ?, ?)",
+                (provider, normalize_query(query), json.dumps(results), self.clock()),
+            )
+            self.conn.commit()
+
+    def get_cursor(self, query):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT newest_fullname FROM reddit_cursors WHERE query = ?", (normalize_query(query),)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_cursor(self, query, fullname):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reddit_cursors (query, newest_fullname, updated_at) VALUES (?, ?, ?)",
+                (normalize_query(query), fullname, self.clock()),
+            )
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_search_cache():
+    """Process-wide cache, opened on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
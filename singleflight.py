@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+In-flight request deduplication for LeadGeneratorAI
+When concurrent jobs ask for the same search query, page or verdict at the same
+moment, only the first caller does the external call; the others wait for its
+result. Counts of executed vs. shared calls show how many duplicates were saved.
+"""
+
+import os
+import threading
+
+# === CONFIGURATION ===
+USE_SINGLEFLIGHT = os.getenv("USE_SINGLEFLIGHT", "true").lower() == "true"
+
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> Call in progress
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Return fn()'s result, sharing it with every caller that arrives while it runs"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = Call()
+                self.calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def do_many(self, keys, fn):
+        """do() for several keys at once. fn(owned_keys) -> {key: result} runs only for the keys
+        no other caller is already working on; the rest wait for their callers. Returns {key: result}."""
+        owned, waiting = {}, {}
+        with self.lock:
+            for key in keys:
+                if key in owned or key in waiting:
+                    continue
+                call = self.calls.get(key)
+                if call is None:
+                    call = Call()
+                    self.calls[key] = call
+                    owned[key] = call
+                    self.executed += 1
+                else:
+                    waiting[key] = call
+                    self.shared += 1
+
+        results = {}
+        if owned:
+            try:
+                produced = fn(list(owned))
+                for key, call in owned.items():
+                    call.result = results[key] = produced.get(key)
+            except Exception as e:
+                for call in owned.values():
+                    call.error = e
+                raise
+            finally:
+                with self.lock:
+                    for key in owned:
+                        del self.calls[key]
+                for call in owned.values():
+                    call.done.set()
+
+        for key, call in waiting.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+    def stats(self):
+        with self.lock:
+            total = self.executed + self.shared
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "in_flight": len(self.calls),
+                "saved_rate": round(self.shared / total, 3) if total else 0.0,
+            }
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+def get_flight(name):
+    """Process-wide group for one kind of call (e.g. "search", "scrape", "qualify")"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight()
+        return _groups[name]
+
+
+def singleflight(name, key, fn):
+    if not USE_SINGLEFLIGHT:
+        return fn()
+    return get_flight(name).do(key, fn)
+
+
+def singleflight_many(name, keys, fn):
+    """Batch form of singleflight: fn(owned_keys) -> {key: result} for the keys not already in flight"""
+    if not USE_SINGLEFLIGHT:
+        return fn(list(dict.fromkeys(keys)))
+    return get_flight(name).do_many(keys, fn)
+
+
+def singleflight_stats():
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in groups.items()}
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Per-term search yield for LeadGeneratorAI
+Every run records, for each (platform, phrase), the search queries it sent,
+the results they returned, how many passed the filters, how many reached a
+verdict (the rest failed to scrape) and how many qualified. Only searches a
+provider answered for this run count: cache hits, searches shared with another
+job, skipped quota and errors add nothing, not even their results. The next run
+reads those totals back to decide which queries to send:
+
+- platforms that can't return anything are skipped: Facebook and Nextdoor are
+  only searchable through Google CSE, and a platform that has returned nothing
+  in YIELD_EMPTY_AFTER queries is left out until YIELD_EMPTY_RETRY_DAYS later
+- the remaining queries are ranked by a UCB1 bandit: qualified leads per query
+  plus an exploration bonus that is largest for phrases tried least, so new and
+  rarely run phrases still get their turn
+- with YIELD_QUERY_BUDGET set, only the top-ranked queries are sent
+
+Phrases are tracked without their location, so what one city learns carries over
+to the others. GET /api/yield and `python term_stats.py` report the totals.
+
+Usage:
+    python term_stats.py            # yield per term, best first
+    python term_stats.py --plan     # which queries the next run would send
+"""
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+if __name__ == "__main__":
+    # Run as a script: load .env before the settings below are read
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# === CONFIGURATION ===
+TERM_STATS_PATH = os.getenv("TERM_STATS_PATH", "term_stats.db")
+USE_YIELD_SCHEDULER = os.getenv("USE_YIELD_SCHEDULER", "true").lower() == "true"
+YIELD_QUERY_BUDGET = int(os.getenv("YIELD_QUERY_BUDGET", "0"))  # queries per run before merging, 0 = all
+YIELD_EXPLORATION = float(os.getenv("YIELD_EXPLORATION", "1.0"))  # weight of the UCB exploration bonus
+YIELD_EMPTY_AFTER = int(os.getenv("YIELD_EMPTY_AFTER", "20"))  # queries without a result before a platform is skipped
+YIELD_EMPTY_RETRY_DAYS = float(os.getenv("YIELD_EMPTY_RETRY_DAYS", "7"))
+PROMPT_TOKENS_PER_CALL = 60  # instructions are cached, so roughly the item framing and title
+COMPLETION_TOKENS_PER_CALL = 15  # "Yes - <short reason>"
+
+FIELDS = ("queries", "results", "kept", "checked", "qualified", "qualify_calls")
+
+_PHRASE = re.compile(r'"([^"]+)"')
+
+
+def term_phrase(query):
+    """The quoted phrase a query was built from ('"need a painter" site:...' -> 'need a painter')"""
+    match = _PHRASE.search(query or "")
+    return " ".join(match.group(1).lower().split()) if match else None
+
+
+def query_phrases(query):
+    """Phrases a (possibly merged) query searches for: '("a" OR "b") site:... "durham"' -> ['a', 'b']"""
+    if query.startswith("("):
+        alternatives = query[1:query.find(")")]
+        return [" ".join(phrase.lower().split()) for phrase in _PHRASE.findall(alternatives)]
+    phrase = term_phrase(query)
+    return [phrase] if phrase else []
+
+
+class RunTally:
+    """Counts for one run, kept in memory and written to the store once at the end"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}  # (platform, phrase) -> {field: amount}
+
+    def add(self, site, phrase, **amounts):
+        if not site or not phrase:
+            return
+        with self.lock:
+            counts = self.counts.setdefault((site, phrase), dict.fromkeys(FIELDS, 0))
+            for field, amount in amounts.items():
+                counts[field] += amount
+
+    def track_search(self, queries, search_fn):
+        """Wrap search_fn so every (planned) query a provider answered and the results it returns are counted.
+        Results without a `reached` flag (plain lists) count as answered."""
+        sites = dict((query, site) for site, query in queries)
+
+        def search(query, *args, **kwargs):
+            results = search_fn(query, *args, **kwargs)
+            site = sites.get(query)
+            # Cache hits and shared searches spent no quota here, and a skipped or failed call
+            # says nothing about the platform; crediting their results would make them look free
+            sent = getattr(results, "reached", True)
+            # A merged query's quota is shared by the phrases it stands for
+            phrases = query_phrases(query) if sent else []
+            for phrase in phrases:
+                self.add(site, phrase, queries=1 / len(phrases))
+            for result in results:
+                result.setdefault("term", query)
+                if sent:
+                    self.add(site, term_phrase(result["term"]), results=1)
+                else:
+                    result["tallied"] = False  # kept() and verdict() skip it too
+            return results
+        return search
+
+    def track_accept(self, accept):
+        """Wrap accept(site, result) so results that pass the filters are counted"""
+        def counted(site, result):
+            if not accept(site, result):
+                return False
+            self.kept(site, result)
+            return True
+        return counted
+
+    def kept(self, site, result):
+        if result.get("tallied", True):
+            self.add(site, term_phrase(result.get("term")), kept=1)
+
+    def verdict(self, site, result, is_lead):
+        if not result.get("tallied", True):
+            return
+        # An escalated result was sent to the model twice: post body, then page
+        calls = 2 if result.get("tier") == "escalated" else 1
+        self.add(site, term_phrase(result.get("term")), checked=1, qualified=int(bool(is_lead)),
+                 qualify_calls=calls)
+
+    def save(self, stats=None):
+        if self.counts:
+            (stats or get_term_stats()).record(self)
+
+
+class TermStats:
+    """SQLite-backed yield totals per (platform, phrase), across runs"""
+
+    def __init__(self, path=TERM_STATS_PATH, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS term_stats (
+                platform TEXT NOT NULL,
+                phrase TEXT NOT NULL,
+                runs INTEGER NOT NULL DEFAULT 0,
+                queries REAL NOT NULL DEFAULT 0,
+                results INTEGER NOT NULL DEFAULT 0,
+                kept INTEGER NOT NULL DEFAULT 0,
+                checked INTEGER NOT NULL DEFAULT 0,
+                qualified INTEGER NOT NULL DEFAULT 0,
+                qualify_calls INTEGER NOT NULL DEFAULT 0,
+                last_run REAL NOT NULL,
+                PRIMARY KEY (platform, phrase)
+            )
+        """)
+        self.conn.commit()
+
+    def record(self, tally):
+        """Add one run's counts"""
+        with self.lock, tally.lock:
+            now = self.clock()
+            for (platform, phrase), counts in tally.counts.items():
+                self.conn.execute(
+                    "INSERT INTO term_stats (platform, phrase, runs, queries, results, kept, checked, qualified, "
+                    "qualify_calls, last_run) VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (platform, phrase) DO UPDATE SET runs = runs + 1, "
+                    "queries = queries + excluded.queries, results = results + excluded.results, "
+                    "kept = kept + excluded.kept, checked = checked + excluded.checked, "
+                    "qualified = qualified + excluded.qualified, "
+                    "qualify_calls = qualify_calls + excluded.qualify_calls, last_run = excluded.last_run",
+                    (platform, phrase, *(counts[field] for field in FIELDS), now),
+                )
+            self.conn.commit()
+
+    def totals(self):
+        """{(platform, phrase): row dict}"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM term_stats")
+            columns = [column[0] for column in cursor.description]
+            return {(row[0], row[1]): dict(zip(columns, row)) for row in cursor.fetchall()}
+
+    def empty_platforms(self, totals=None):
+        """{platform: reason} for platforms that have never returned a result, checked again
+        once their last run is YIELD_EMPTY_RETRY_DAYS old"""
+        totals = self.totals() if totals is None else totals
+        platforms = {}
+        for (platform, _), row in totals.items():
+            entry = platforms.setdefault(platform, {"queries": 0.0, "results": 0, "last_run": 0.0})
+            entry["queries"] += row["queries"]
+            entry["results"] += row["results"]
+            entry["last_run"] = max(entry["last_run"], row["last_run"])
+        now = self.clock()
+        return {platform: f"no results from {entry['queries']:.0f} queries"
+                for platform, entry in platforms.items()
+                if entry["queries"] >= YIELD_EMPTY_AFTER and not entry["results"]
+                and now - entry["last_run"] < YIELD_EMPTY_RETRY_DAYS * 86400}
+
+
+def estimated_cost(qualify_calls):
+    """Estimated OpenAI spend in USD for this many qualification calls"""
+    from metrics import OPENAI_PROMPT_COST_PER_1K, OPENAI_COMPLETION_COST_PER_1K
+    from lead_finder import get_config
+    prompt_tokens = get_config().qualify_token_budget + PROMPT_TOKENS_PER_CALL
+    return qualify_calls * (prompt_tokens / 1000 * OPENAI_PROMPT_COST_PER_1K
+                            + COMPLETION_TOKENS_PER_CALL / 1000 * OPENAI_COMPLETION_COST_PER_1K)
+
+
+def ucb_scores(keys, totals, exploration=YIELD_EXPLORATION):
+    """UCB1 score per (platform, phrase): leads per query plus an exploration bonus.
+    Untried terms score infinity so every phrase is tried at least once."""
+    tried = [totals[key] for key in keys if key in totals and totals[key]["queries"] > 0]
+    total_queries = sum(row["queries"] for row in tried)
+    # Scale the bonus to the best observed yield, since leads per query isn't bounded by 1
+    scale = max([row["qualified"] / row["queries"] for row in tried] + [0.0]) or 1.0
+    scores = {}
+    for key in keys:
+        row = totals.get(key)
+        if row is None or row["queries"] <= 0:
+            scores[key] = math.inf
+            continue
+        bonus = scale * math.sqrt(math.log(total_queries + 1) / row["queries"])
+        scores[key] = row["qualified"] / row["queries"] + exploration * bonus
+    return scores
+
+
+def schedule_queries(queries, stats=None, budget=YIELD_QUERY_BUDGET):
+    """queries: list of (site, query). Returns (scheduled queries, {platform: reason} skipped).
+    Unsearchable and known-empty platforms are dropped, the rest are ordered best first
+    and, with a budget, cut to that many."""
+    from lead_finder import platform_searchable
+    if not USE_YIELD_SCHEDULER:
+        return queries, {}
+
+    stats = stats or get_term_stats()
+    totals = stats.totals()
+    skipped = {site: "only searchable through Google Custom Search"
+               for site, _ in queries if not platform_searchable(site)}
+    for platform, reason in stats.empty_platforms(totals).items():
+        skipped.setdefault(platform, reason)
+    remaining = [(site, query) for site, query in queries if site not in skipped]
+
+    scores = ucb_scores({(site, term_phrase(query)) for site, query in remaining}, totals)
+    ranked = sorted(remaining, key=lambda pair: -scores[(pair[0], term_phrase(pair[1]))])
+    if budget > 0:
+        ranked = ranked[:budget]
+    return ranked, skipped
+
+
+def schedule_search(queries, search_fn, stats=None):
+    """Schedule queries by yield, merge them (query_planner) and count what the run gets back.
+    Returns (planned (site, query) pairs, search function, RunTally)."""
+    from query_planner import plan_search
+    scheduled, skipped = schedule_queries(queries, stats)
+    for platform, reason in skipped.items():
+        print(f"⏭️  Skipping {platform}: {reason}")
+    if len(scheduled) < len(queries) - sum(1 for site, _ in queries if site in skipped):
+        print(f"🎯 Yield budget: sending the best {len(scheduled)} queries")
+    tally = RunTally()
+    planned, search = plan_search(scheduled, search_fn)
+    return planned, tally.track_search(planned, search), tally
+
+
+def yield_report(stats=None):
+    """Per-term and per-platform yield, best terms first"""
+    stats = stats or get_term_stats()
+    totals = stats.totals()
+    scores = ucb_scores(list(totals), totals)
+    empty = stats.empty_platforms(totals)
+    terms, platforms = [], {}
+    for key, row in totals.items():
+        queries = row["queries"]
+        cost = estimated_cost(row["qualify_calls"])
+        terms.append({
+            "platform": row["platform"],
+            "phrase": row["phrase"],
+            "runs": row["runs"],
+            "queries": round(queries, 2),
+            "results": row["results"],
+            "kept": row["kept"],
+            "checked": row["checked"],
+            "qualified": row["qualified"],
+            "leads_per_query": round(row["qualified"] / queries, 3) if queries else 0.0,
+            "qualified_rate": round(row["qualified"] / row["checked"], 3) if row["checked"] else 0.0,
+            "scrape_success": round(row["checked"] / row["kept"], 3) if row["kept"] else None,
+            "estimated_cost_usd": round(cost, 4),
+            "cost_per_lead_usd": round(cost / row["qualified"], 4) if row["qualified"] else None,
+            "score": round(scores[key], 3) if math.isfinite(scores[key]) else None,
+        })
+        platform = platforms.setdefault(row["platform"], {"platform": row["platform"], "queries": 0.0,
+                                                          "results": 0, "qualified": 0})
+        platform["queries"] += queries
+        platform["results"] += row["results"]
+        platform["qualified"] += row["qualified"]
+    for platform in platforms.values():
+        platform["queries"] = round(platform["queries"], 2)
+        platform["skipped"] = empty.get(platform["platform"])
+    terms.sort(key=lambda term: (-term["leads_per_query"], -term["qualified"], term["phrase"]))
+    return {"terms": terms, "platforms": sorted(platforms.values(), key=lambda p: -p["qualified"])}
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+def get_term_stats():
+    """Process-wide store, opened on first use"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = TermStats()
+        return _stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search yield per term")
+    parser.add_argument("--plan", action="store_true", help="show the queries the next run would send")
+    args = parser.parse_args()
+
+    if args.plan:
+        from lead_finder import build_queries
+        queries = build_queries()
+        scheduled, skipped = schedule_queries(queries)
+        for platform, reason in skipped.items():
+            print(f"⏭️  Skipping {platform}: {reason}")
+        for site, query in scheduled:
+            print(f"[{site}] {query}")
+        print(f"\n📊 {len(scheduled)} of {len(queries)} queries scheduled")
+        return
+
+    report = yield_report()
+    if not report["terms"]:
+        print("No runs recorded yet")
+        return
+    for term in report["terms"]:
+        print(f"[{term['platform']}] {term['phrase']}: {term['qualified']} leads from {term['queries']:g} queries "
+              f"({term['leads_per_query']:.2f}/query, {term['results']} results, "
+              f"{term['checked']}/{term['kept']} checked)")
+    print()
+    for platform in report["platforms"]:
+        status = f" — skipped: {platform['skipped']}" if platform["skipped"] else ""
+        print(f"📊 {platform['platform']}: {platform['qualified']} leads, {platform['results']} results "
+              f"from {platform['queries']:g} queries{status}")
+
+
+if __name__ == "__main__":
+    main()
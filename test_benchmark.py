@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the offline benchmark harness
+Checks the fake services answer like the real providers, then runs a zero-latency CLI scenario
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import FakeServices, parse_rates
+import benchmark
+
+def test_parse_rates():
+    print("🧪 Testing latency/error specs...")
+    assert parse_rates("0") == {"cse": 0.0, "reddit": 0.0, "pages": 0.0, "openai": 0.0}
+    assert parse_rates("openai=0.5,pages=0.1")["openai"] == 0.5
+    try:
+        parse_rates("bing=1")
+        assert False, "unknown services are rejected"
+    except ValueError:
+        pass
+
+def test_fake_services_answer_like_providers():
+    print("🧪 Testing fake CSE, Reddit, pages and OpenAI...")
+    from http_client import http_get
+    from openai import OpenAI
+
+    services = FakeServices(latency=parse_rates("0"), cse_empty_rate=0).start()
+    try:
+        env = services.env()
+        items = http_get(env["GOOGLE_CSE_URL"], params={"q": "need a painter", "num": 5}).json()["items"]
+        assert len(items) == 5 and items[0]["link"].startswith(services.base_url)
+        assert items == http_get(env["GOOGLE_CSE_URL"], params={"q": "need a painter", "num": 5}).json()["items"]
+
+        listing = http_get(f"{services.base_url}/r/durham/search.json", params={"q": "deck", "limit": 3}).json()
+        permalink = listing["data"]["children"][0]["data"]["permalink"]
+        page = http_get(services.base_url + permalink)
+        assert page.headers["Content-Type"].startswith("text/html") and "<h1>" in page.text
+
+        client = OpenAI(api_key=env["OPENAI_API_KEY"], base_url=env["OPENAI_BASE_URL"])
+        painter, hiring = services.by_id["p01"], services.by_id["p09"]
+        prompt = (f"--- ITEM 1 START ---\n{painter['title']}\n{painter['body']}\n--- ITEM 1 END ---\n"
+                  f"--- ITEM 2 START ---\n{hiring['title']}\n{hiring['body']}\n--- ITEM 2 END ---\n"
+                  f"--- ITEM 3 START ---\n{painter['title']}\nSkip to main content\n--- ITEM 3 END ---")
+        reply = client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
+        lines = reply.choices[0].message.content.splitlines()
+        assert lines[0].startswith("1. Yes") and lines[1].startswith("2. No")
+        assert lines[2].startswith("3. Unsure"), "a title without the request itself isn't enough"
+        assert reply.usage.total_tokens > 0
+        assert services.stats()["calls"] == {"cse": 2, "reddit": 1, "pages": 1, "openai": 1}
+    finally:
+        services.stop()
+
+def test_error_injection():
+    print("🧪 Testing injected failures...")
+    from http_client import http_get
+    services = FakeServices(latency=parse_rates("0"), errors=parse_rates("pages=1"), error_status=503).start()
+    try:
+        response = http_get(f"{services.base_url}/pages/p01", params={})
+        assert response.status_code == 503
+        assert services.stats()["injected_errors"]["pages"] == services.stats()["calls"]["pages"] > 1, \
+            "5xx responses are retried by the shared HTTP client"
+    finally:
+        services.stop()
+
+def test_cli_scenario_and_comparison():
+    print("🧪 Testing a zero-latency CLI run...")
+    args = argparse.Namespace(jobs=1, timeout=120, mode=None, verbose=False)
+    services = FakeServices(latency=parse_rates("0")).start()
+    try:
+        metrics = benchmark.run_scenario("cli", services, args)
+    finally:
+        services.stop()
+    print(f"   {metrics['results']} results, {metrics['qualified']} qualified, {metrics['external_calls']}")
+    assert metrics["qualified"] > 0 and metrics["results"] >= metrics["qualified"]
+    assert metrics["stages"]["scrape"]["count"] == metrics["external_calls"]["pages"]
+    assert metrics["external_calls"]["openai"] == metrics["stages"]["qualify"]["count"]
+    assert metrics["accuracy"] == 1.0 and metrics["tokens_per_lead"] > 0
+
+    slower = dict(metrics, leads_per_min=metrics["leads_per_min"] / 2)
+    regressed = {row[0] for row in benchmark.compare(slower, metrics) if row[3]}
+    assert regressed == {"leads_per_min"}
+
+if __name__ == "__main__":
+    print("🚀 Testing benchmark harness\n")
+    test_parse_rates()
+    test_fake_services_answer_like_providers()
+    test_error_injection()
+    test_cli_scenario_and_comparison()
+    print("\n✅ Benchmark harness tests passed")
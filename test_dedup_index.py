@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify MinHash/LSH near-duplicate detection
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dedup_index import DedupIndex, jaccard, minhash, estimate_similarity
+from testing import patched
+
+POST = ("Looking for a reliable painter to repaint our living room and hallway in Durham, "
+        "walls are in decent shape, need a quote for next month")
+CROSS_POST = ("Looking for a reliable painter to repaint our living room and hallway in Durham! "
+              "Walls are in decent shape, need a quote for next month. Thanks")
+OTHER = ("Anyone know a good fence installation company near Southpoint? "
+         "Our backyard fence blew down in the storm and we need it replaced")
+
+def test_similarity_estimates():
+    print("🧪 Testing shingle similarity...")
+    assert jaccard(POST, POST) == 1.0
+    assert jaccard(POST, CROSS_POST) > 0.7
+    assert jaccard(POST, OTHER) < 0.1
+    # Unlike the old character-set check, unrelated English text is not "similar"
+    assert jaccard("Kitchen remodel estimate", "Bathroom renovation quote") == 0.0
+
+    estimate = estimate_similarity(minhash(POST), minhash(CROSS_POST))
+    print(f"   MinHash estimate {estimate:.2f} vs exact {jaccard(POST, CROSS_POST):.2f}")
+    assert abs(estimate - jaccard(POST, CROSS_POST)) < 0.2
+
+def test_index_drops_reposts_across_runs():
+    print("🧪 Testing persistent LSH index...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dedup.db")
+        index = DedupIndex(path, threshold=0.7)
+        for i in range(200):
+            index.add(f"https://reddit.com/filler/{i}", f"filler post number {i} about topic {i * 7} and item {i * 13}")
+
+        assert index.check_and_add("https://reddit.com/r/durham/1", POST) is None
+        assert index.check_and_add("https://reddit.com/r/durham/1", POST) is None  # same post again is fine
+        assert index.check_and_add("https://reddit.com/r/raleigh/2", OTHER) is None
+
+        reopened = DedupIndex(path, threshold=0.7)
+        assert reopened.check_and_add("https://reddit.com/r/triangle/3", CROSS_POST) == "https://reddit.com/r/durham/1"
+        assert reopened.stats()["duplicates_dropped"] == 1
+
+def test_short_posts_are_not_reposts():
+    print("🧪 Testing title-only and link posts...")
+    import lead_finder
+    import dedup_index
+
+    with tempfile.TemporaryDirectory() as tmp, patched(lead_finder.get_config(), use_dedup_index=True), \
+            patched(dedup_index, _index=DedupIndex(os.path.join(tmp, "dedup.db"), threshold=0.7)):
+        raleigh = {"title": "Need a plumber ASAP", "link": "https://reddit.com/r/raleigh/1",
+                   "snippet": "...", "body": ""}
+        cary = {"title": "Need a plumber ASAP", "link": "https://reddit.com/r/cary/2",
+                "snippet": "...", "body": ""}
+        assert not lead_finder.is_repost(raleigh) and not lead_finder.is_repost(cary), \
+            "a shared generic title alone doesn't make a repost"
+
+        original_post = {"title": "Painter?", "link": "https://reddit.com/r/durham/3",
+                         "snippet": POST[:40] + "...", "body": POST}
+        cross_post = {"title": "Painter?", "link": "https://reddit.com/r/raleigh/4",
+                      "snippet": CROSS_POST[:40] + "...", "body": CROSS_POST}
+        assert not lead_finder.is_repost(original_post)
+        assert lead_finder.is_repost(cross_post), "the full post body is compared, not the cut-off snippet"
+
+if __name__ == "__main__":
+    print("🚀 Testing near-duplicate index\n")
+    test_similarity_estimates()
+    test_index_drops_reposts_across_runs()
+    test_short_posts_are_not_reposts()
+    print("\n✅ Dedup index tests passed")
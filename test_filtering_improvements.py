@@ -19,7 +19,8 @@ def test_duplicate_detection():
         
         test_cases = [
             ("Need painter for kitchen", "Need painter for kitchen", True),  # Exact duplicate
-            ("Looking for painter in Durham", "Need painter in Durham area", True),  # Similar
+            ("Looking for painter in Durham", "Need painter in Durham area", False),  # Same intent, different wording (not a repost)
+            ("Need a painter for my kitchen in Durham", "Need a painter for my kitchen in Durham!", True),  # Repost
             ("Kitchen remodel estimate", "Bathroom renovation quote", False),  # Different
             ("Hiring painters - job posting", "Looking for painting contractor", False),  # Different intent
         ]
@@ -33,48 +34,50 @@ def test_duplicate_detection():
         print(f"   ❌ Import error: {e}")
     
     print("\n2. Testing blacklisted domains:")
-    blacklisted_domains = [
-        "yelp.com", "angi.com", "houzz.com", "porch.com", "homeadvisor.com",
-        "thumbtack.com", "taskrabbit.com", "handy.com", "amazon.com",
-        "lowes.com", "homedepot.com", "menards.com", "wikipedia.org",
-        "pinterest.com", "youtube.com", "facebook.com/pages", "linkedin.com",
-        "indeed.com", "glassdoor.com", "craigslist.org/about", "angieslist.com"
-    ]
+    from lead_filters import get_lead_filter
+    lead_filter = get_lead_filter()
     
     test_urls = [
         ("https://www.reddit.com/r/durham/comments/abc123", False),  # Should pass
         ("https://www.yelp.com/biz/durham-painters", True),  # Should be blocked
         ("https://www.homedepot.com/services/painters", True),  # Should be blocked
         ("https://durhampainters.com/services", False),  # Should pass
+        ("https://www.facebook.com/pages/painter", True),  # Blocked path prefix
+        ("https://www.facebook.com/groups/durham", False),  # Other Facebook paths pass
+        ("https://handymanhandy.com/blog", False),  # Contains "handy.com" but isn't that domain
+        ("https://reddit.com/r/durham/comments/xyz/yelp.com_was_useless", False),  # Domain only in the path
     ]
     
     for url, should_block in test_urls:
-        is_blocked = any(domain in url.lower() for domain in blacklisted_domains)
+        is_blocked = lead_filter.is_blocked_url(url)
         status = "✅" if is_blocked == should_block else "❌"
         action = "BLOCKED" if is_blocked else "ALLOWED"
         print(f"   {status} {url} = {action}")
+        assert is_blocked == should_block
     
     print("\n3. Testing irrelevant keyword filtering:")
-    irrelevant_keywords = [
-        "job posting", "hiring", "employment", "career", "resume",
-        "for sale", "selling", "buy now", "price", "discount",
-        "review of", "rating", "how to", "diy", "tutorial",
-        "advertisement", "sponsored", "promotion", "coupon"
-    ]
-    
     test_content = [
         ("Need painter for my kitchen Durham", False),  # Good lead
         ("Hiring painters for construction company", True),  # Should be filtered
         ("For sale: painting equipment Durham", True),  # Should be filtered
         ("How to paint kitchen cabinets DIY", True),  # Should be filtered
         ("Review of Durham Painting Company", True),  # Should be filtered
+        ("Need help decorating a nursery, looking for painter", False),  # "rating" inside a word
+        ("Painter ratings for Durham", True),  # Plurals of keywords are filtered too
+        ("Coupons for house painting", True),
+        ("Careers at our painting company", True),
+        ("Spring promotions on exterior painting", True),
+        ("Compare prices from local painters", True),
+        ("Advertisements for painters", True),
     ]
     
     for content, should_filter in test_content:
-        is_filtered = any(keyword in content.lower() for keyword in irrelevant_keywords)
+        is_filtered = lead_filter.matching_keyword(content) is not None
         status = "✅" if is_filtered == should_filter else "❌"
         action = "FILTERED" if is_filtered else "ALLOWED"
         print(f"   {status} '{content}' = {action}")
+        assert is_filtered == should_filter
+    assert lead_filter.matching_keyword("Compare prices") == "price", "the keyword as listed is reported"
 
 def test_ai_prompt_improvement():
     """Test the improved AI prompt (without making actual API calls)"""
@@ -5,13 +5,22 @@ Test script to verify the free search methods work
 
 import sys
 import os
+import tempfile
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import search_cache
 from lead_finder import search_reddit_directly, google_search
+from search_cache import SearchCache
+from testing import patched
+
+def temp_search_cache(tmp):
+    """Keep cached results and cursors out of the real search_cache.db"""
+    return patched(search_cache, _cache=SearchCache(os.path.join(tmp, "search_cache.db")))
 
 def test_reddit_search():
     print("🧪 Testing Reddit search...")
-    results = search_reddit_directly("need painter durham")
+    with tempfile.TemporaryDirectory() as tmp, temp_search_cache(tmp):
+        results = search_reddit_directly("need painter durham")
     print(f"   Found {len(results)} Reddit results")
     for i, result in enumerate(results[:2]):  # Show first 2
         print(f"   {i+1}. {result['title'][:50]}...")
@@ -19,7 +28,8 @@ def test_reddit_search():
 
 def test_google_search():
     print("🧪 Testing Google search function...")
-    results = google_search('"need a painter" site:reddit.com/r/durham')
+    with tempfile.TemporaryDirectory() as tmp, temp_search_cache(tmp):
+        results = google_search('"need a painter" site:reddit.com/r/durham')
     print(f"   Found {len(results)} total results")
     return True
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared pooled HTTP client reuses connections
+Uses a local keep-alive HTTP server (no internet needed)
+"""
+
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from http_client import HttpClient, HTTP_POOL_SIZE
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b'{"data": {"children": []}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=abc")
+        self.end_headers()
+        self.wfile.write(body)
+
+def test_connections_are_reused_across_threads():
+    print("🧪 Testing keep-alive connection reuse...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/search.json"
+    client = HttpClient(pool_size=4)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            statuses = list(pool.map(lambda _: client.get(url).status_code, range(40)))
+        assert statuses == [200] * 40
+
+        stats = client.stats()
+        connections = stats["connections"]["127.0.0.1"]
+        print(f"   {connections['requests_sent']} requests over {connections['connections_opened']} connections")
+        assert connections["requests_sent"] == 40
+        assert connections["connections_opened"] <= 4
+        assert stats["latency"]["127.0.0.1"]["requests"] == 40
+        assert len(client.session.cookies) == 0  # no shared cookie state between jobs
+    finally:
+        server.shutdown()
+
+def test_pool_covers_pipeline_concurrency():
+    print("🧪 Testing the default pool size...")
+    from pipeline import PipelineConfig, LOCATION_FANOUT_MAX
+    widest = PipelineConfig().fan_out(LOCATION_FANOUT_MAX)
+    client = HttpClient()
+    if not HTTP_POOL_SIZE:
+        assert client.pool_size >= widest.search_concurrency + widest.scrape_concurrency, \
+            "every search and scrape worker of a multi-city job can keep its connection alive"
+    assert client.adapter._pool_maxsize == client.pool_size == client.stats()["pool_size"]
+    assert HttpClient(pool_size=4).pool_size == 4
+
+if __name__ == "__main__":
+    print("🚀 Testing shared HTTP client\n")
+    test_connections_are_reused_across_threads()
+    test_pool_covers_pipeline_concurrency()
+    print("\n✅ HTTP client tests passed")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the durable job queue and worker mode
+Checks claims, leases, cancellation and restarts, then runs an API → worker round trip
+and a retry after a lost lease
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_queue import JobQueue
+from job_scheduler import job_key
+from testing import patched
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_queue(tmp, **kwargs):
+    clock = FakeClock()
+    return JobQueue(os.path.join(tmp, "jobs.db"), clock=clock, **kwargs), clock
+
+def test_claim_order_and_limits():
+    print("🧪 Testing priorities, coalescing and the depth limit...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue, clock = make_queue(tmp, queue_limit=3)
+        assert queue.enqueue("low", "deck", "Durham", None, "low", job_key("deck", "Durham"))[1:] == ("queued", 1)
+        clock.now += 1
+        queue.enqueue("normal", "paint", "Durham", None, "normal", job_key("paint", "Durham"))
+        clock.now += 1
+        job, outcome, position = queue.enqueue("high", "roof", "Durham", None, "high", job_key("roof", "Durham"))
+        assert outcome == "queued" and position == 1
+
+        job, outcome, _ = queue.enqueue("again", " Paint ", "durham", None, "normal", job_key(" Paint ", "durham"))
+        assert outcome == "attached" and job["search_id"] == "normal"
+        assert queue.enqueue("full", "fence", "Durham", None, "normal", job_key("fence", "Durham"))[1] == "full"
+
+        claimed = [queue.claim("worker-1")["search_id"] for _ in range(3)]
+        assert claimed == ["high", "normal", "low"]
+        assert queue.claim("worker-1") is None
+
+def test_leases_and_cancel():
+    print("🧪 Testing leases, reclaiming and cancellation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue, clock = make_queue(tmp, lease_seconds=60, max_attempts=2)
+        queue.enqueue("job", "paint", "Durham", None, "normal", job_key("paint", "Durham"))
+        assert queue.claim("worker-1")["attempts"] == 1
+        assert queue.claim("worker-2") is None, "leased jobs are not handed out twice"
+
+        clock.now += 30
+        assert queue.heartbeat("job", "worker-1")
+        clock.now += 61  # worker-1 died without renewing
+        row = queue.claim("worker-2")
+        assert row["search_id"] == "job" and row["worker_id"] == "worker-2" and row["attempts"] == 2
+        assert not queue.heartbeat("job", "worker-1"), "the old worker loses the job"
+        queue.report("job", "worker-1", progress=90)
+        assert queue.get("job")["progress"] == 0, "stale workers can't report"
+
+        clock.now += 61  # worker-2 died too: out of attempts
+        assert queue.claim("worker-3") is None
+        assert queue.get("job")["status"] == "error"
+
+        queue.enqueue("other", "deck", "Durham", None, "normal", job_key("deck", "Durham"))
+        queue.claim("worker-3")
+        assert queue.cancel("other")
+        assert not queue.heartbeat("other", "worker-3"), "cancellation reaches the worker on its heartbeat"
+
+def test_jobs_survive_restart():
+    print("🧪 Testing durability across restarts...")
+    with tempfile.TemporaryDirectory() as tmp:
+        queue, _ = make_queue(tmp)
+        queue.enqueue("job", "paint", "Durham", None, "high", job_key("paint", "Durham"))
+        queue.conn.close()
+        reopened, _ = make_queue(tmp)
+        assert reopened.claim("worker-1")["search_id"] == "job"
+
+def test_api_and_worker_round_trip():
+    print("🧪 Testing API enqueue → worker → API results...")
+    import api_server
+    import job_queue
+    import lead_store
+    import term_stats
+    import worker
+
+    def fake_search(search_job, queries, accept, search_fn):
+        for number in range(3):
+            api_server.record_result(search_job, "reddit",
+                                     {"title": f"Need a painter #{number}", "link": f"https://reddit.com/{number}",
+                                      "tier": "page" if number == 2 else "snippet"},
+                                     number != 1, "Homeowner asking for a painter")
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patched(api_server, JOB_BACKEND="queue", run_pipeline_search=fake_search), \
+            patched(job_queue, _queue=JobQueue(os.path.join(tmp, "jobs.db"))), \
+            patched(lead_store, _store=lead_store.LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)), \
+            patched(term_stats, _stats=term_stats.TermStats(os.path.join(tmp, "term_stats.db"))):
+        try:
+            client = api_server.app.test_client()
+            started = client.post("/api/search", json={"searchTerms": "painter", "location": "Durham"}).get_json()
+            search_id = started["search_id"]
+            assert started["status"] == "queued"
+            assert client.get("/api/scheduler").get_json()["queue"][0]["search_id"] == search_id
+
+            worker_job = worker.run_job(job_queue._queue.claim("worker-1"), "worker-1", job_queue._queue)
+            assert worker_job.status == "completed"
+
+            api_server.find_job(search_id).sync()
+            status = client.get(f"/api/search/{search_id}/status").get_json()
+            assert status["status"] == "completed" and status["results_count"] == 3 and status["qualified_count"] == 2
+            assert status["scrapes_avoided"] == 2 and status["pages_fetched"] == 1
+
+            api_server.active_searches.clear()  # API restart
+            results = client.get(f"/api/search/{search_id}/results?since=1").get_json()
+            assert [r["title"] for r in results["results"]] == ["Need a painter #1", "Need a painter #2"]
+        finally:
+            api_server.active_searches.clear()
+
+def test_retry_replaces_earlier_leads():
+    print("🧪 Testing a retry after a lost lease...")
+    import api_server
+    import job_queue
+    import lead_store
+    import term_stats
+    import worker
+
+    def painter_post(search_job, number):
+        api_server.record_result(search_job, "reddit", {"title": f"Attempt {search_job.attempt} #{number}",
+                                                        "link": f"https://reddit.com/{number}"},
+                                 True, "Homeowner asking for a painter")
+
+    fake_search = lambda search_job, *args: [painter_post(search_job, n) for n in range(3)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "leads.db")
+        # One store per process; the retry's worker reserved its ID block first, so its IDs are the lower ones
+        api_store = lead_store.LeadStore(path, flush_seconds=0)
+        retry_store = lead_store.LeadStore(path, flush_seconds=0)
+        retry_store._allocate_id()
+        first_store = lead_store.LeadStore(path, flush_seconds=0)
+        queue, clock = make_queue(tmp, lease_seconds=60)
+        try:
+            with patched(api_server, JOB_BACKEND="queue", run_pipeline_search=fake_search), \
+                    patched(job_queue, _queue=queue), patched(lead_store, _store=api_store), \
+                    patched(term_stats, _stats=term_stats.TermStats(os.path.join(tmp, "term_stats.db"))):
+                client = api_server.app.test_client()
+                started = client.post("/api/search", json={"searchTerms": "painter", "location": "Durham"}).get_json()
+                search_id = started["search_id"]
+
+                # The first worker stores two leads, then stops renewing its lease
+                with patched(lead_store, _store=first_store):
+                    first = worker.WorkerSearchJob(queue.claim("worker-1"), "worker-1", queue)
+                    painter_post(first, 0)
+                    painter_post(first, 1)
+                    first_store.flush()
+                mirror = api_server.find_job(search_id)
+                mirror.sync()
+                assert len(mirror.results) == 2
+                seen = client.get(f"/api/search/{search_id}/results").get_json()
+                assert (seen["attempt"], seen["next_since"], seen["reset"]) == (1, 2, False)
+
+                clock.now += 61
+                with patched(lead_store, _store=retry_store):
+                    worker.run_job(queue.claim("worker-2"), "worker-2", queue)
+                mirror.sync()
+                assert [result["title"] for result in mirror.results] == ["Attempt 2 #0", "Attempt 2 #1", "Attempt 2 #2"]
+                assert mirror.results[0]["id"] < first.results[0]["id"], "the retry's IDs are lower than the first attempt's"
+                assert mirror.status == "completed" and mirror.qualified_count == 3
+                assert api_store.count_leads(qualified=None, search_id=search_id) == 3, "the first attempt's leads are gone"
+
+                # A client that already has the first attempt's two leads is told to start over
+                polled = client.get(f"/api/search/{search_id}/results?since=2&attempt=1").get_json()
+                assert polled["reset"] and polled["attempt"] == 2 and polled["next_since"] == 3
+                assert [result["title"] for result in polled["results"]] == ["Attempt 2 #0", "Attempt 2 #1", "Attempt 2 #2"]
+                assert not client.get(f"/api/search/{search_id}/results?since=3&attempt=2").get_json()["reset"]
+                stream = client.get(f"/api/search/{search_id}/events?since=2&attempt=1").get_data(as_text=True)
+                events = [line[len("event: "):] for line in stream.splitlines() if line.startswith("event: ")]
+                assert events == ["reset", "lead", "lead", "lead", "progress", "done"], events
+        finally:
+            api_server.active_searches.clear()
+            for store in (api_store, retry_store, first_store):
+                store.close()
+
+if __name__ == "__main__":
+    print("🚀 Testing job queue\n")
+    test_claim_order_and_limits()
+    test_leases_and_cancel()
+    test_jobs_survive_restart()
+    test_api_and_worker_round_trip()
+    test_retry_replaces_earlier_leads()
+    print("\n✅ Job queue tests passed")
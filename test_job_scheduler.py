@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the bounded search scheduler
+Checks the worker limit, priority order, queue-full rejection and coalescing
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_scheduler import JobScheduler, job_key
+
+class FakeJob:
+    def __init__(self, name):
+        self.name = name
+        self.release = threading.Event()
+
+def make_scheduler(**kwargs):
+    started = []
+    lock = threading.Lock()
+    peak = {"running": 0, "max": 0}
+
+    def run_job(job):
+        with lock:
+            started.append(job.name)
+            peak["running"] += 1
+            peak["max"] = max(peak["max"], peak["running"])
+        job.release.wait(5)
+        with lock:
+            peak["running"] -= 1
+
+    return JobScheduler(run_job, **kwargs), started, peak
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_worker_limit_and_priority():
+    print("🧪 Testing worker pool and priority queue...")
+    scheduler, started, peak = make_scheduler(workers=2, queue_limit=10)
+    jobs = {name: FakeJob(name) for name in ("a", "b", "low", "normal", "high")}
+
+    assert scheduler.submit(jobs["a"], job_key("a", "Durham"))[1:] == ("queued", 0)
+    scheduler.submit(jobs["b"], job_key("b", "Durham"))
+    wait_for(lambda: len(started) == 2)
+    _, outcome, position = scheduler.submit(jobs["low"], job_key("low", "Durham"), "low")
+    assert outcome == "queued" and position == 1
+    scheduler.submit(jobs["normal"], job_key("normal", "Durham"), "normal")
+    _, _, position = scheduler.submit(jobs["high"], job_key("high", "Durham"), "high")
+    assert position == 1, "high priority goes to the front"
+    assert [job.name for job in scheduler.queued_jobs()] == ["high", "normal", "low"]
+    assert scheduler.stats()["busy_workers"] == 2 and scheduler.stats()["queue_depth"] == 3
+
+    for job in jobs.values():
+        job.release.set()
+    wait_for(lambda: scheduler.stats()["completed"] == 5)
+    assert started[2:] == ["high", "normal", "low"]
+    assert peak["max"] == 2, "never more than the pool size at once"
+
+def test_queue_limit():
+    print("🧪 Testing queue-full rejection...")
+    scheduler, started, _ = make_scheduler(workers=1, queue_limit=2)
+    jobs = [FakeJob(str(i)) for i in range(4)]
+    scheduler.submit(jobs[0], job_key("0", "Durham"))
+    wait_for(lambda: len(started) == 1)
+    for job in jobs[1:3]:
+        scheduler.submit(job, job_key(job.name, "Durham"))
+    job, outcome, position = scheduler.submit(jobs[3], job_key("3", "Durham"))
+    assert job is None and outcome == "full" and position == 3
+    assert scheduler.stats()["rejected"] == 1
+    assert scheduler.estimated_wait(position) > 0
+    for job in jobs:
+        job.release.set()
+
+def test_coalescing():
+    print("🧪 Testing coalescing of identical searches...")
+    scheduler, started, _ = make_scheduler(workers=1, queue_limit=5, coalesce_seconds=60)
+    first = FakeJob("first")
+    scheduler.submit(first, job_key("Need a Painter", "Durham, NC"))
+    job, outcome, _ = scheduler.submit(FakeJob("dup"), job_key("  need a painter ", "durham,  nc"))
+    assert outcome == "attached" and job is first
+
+    first.release.set()
+    wait_for(lambda: scheduler.stats()["completed"] == 1)
+    job, outcome, _ = scheduler.submit(FakeJob("later"), job_key("need a painter", "durham, nc"))
+    assert outcome == "attached" and job is first, "recently finished jobs are reused"
+
+    vetoed = FakeJob("retry")
+    vetoed.release.set()
+    job, outcome, _ = scheduler.submit(vetoed, job_key("need a painter", "durham, nc"),
+                                       can_attach=lambda existing: False)
+    assert outcome == "queued" and job is vetoed
+    wait_for(lambda: started == ["first", "retry"])
+    assert scheduler.stats()["coalesced"] == 2
+
+def test_discard():
+    print("🧪 Testing cancel of a queued job...")
+    scheduler, started, _ = make_scheduler(workers=1, queue_limit=5)
+    running, queued = FakeJob("running"), FakeJob("queued")
+    scheduler.submit(running, job_key("running", ""))
+    wait_for(lambda: started == ["running"])
+    scheduler.submit(queued, job_key("queued", ""))
+    scheduler.discard(queued)
+    assert scheduler.queued_jobs() == []
+    running.release.set()
+    wait_for(lambda: scheduler.stats()["completed"] == 1)
+    assert started == ["running"]
+
+if __name__ == "__main__":
+    print("🚀 Testing job scheduler\n")
+    test_worker_limit_and_priority()
+    test_queue_limit()
+    test_coalescing()
+    test_discard()
+    print("\n✅ Job scheduler tests passed")
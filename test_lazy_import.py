@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script to verify importing lead_finder is fast and side-effect free
+Imports it in a fresh interpreter without credentials and checks nothing heavy was loaded,
+then checks that the command-line entry points read their settings from .env
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def run_fresh(code):
+    env = {name: value for name, value in os.environ.items() if name != "OPENAI_API_KEY"}
+    return subprocess.run([sys.executable, "-c", code], cwd=HERE, env=env, capture_output=True, text=True)
+
+def test_import_needs_no_credentials():
+    print("🧪 Testing import without OPENAI_API_KEY...")
+    result = run_fresh(
+        "import sys, lead_finder\n"
+        "print(sorted(m for m in ('openai', 'bs4', 'requests', 'dotenv') if m in sys.modules))\n"
+        "print(lead_finder.is_similar_content('need a painter in durham', 'need a painter in durham'))\n"
+        "print(len(lead_finder.SERVICE_PHRASES) > 0)"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["[]", "True", "True"], result.stdout
+
+def test_config_and_client_load_on_first_use():
+    print("🧪 Testing lazy configuration and client...")
+    result = run_fresh(
+        "import os, lead_finder\n"
+        "os.environ.pop('OPENAI_API_KEY', None)\n"
+        "os.environ['LOCATION'] = 'Raleigh, NC'\n"
+        "assert lead_finder.get_config() is lead_finder.get_config()\n"
+        "print(lead_finder.get_config().location)\n"
+        "try:\n"
+        "    lead_finder.get_openai_client()\n"
+        "except ValueError:\n"
+        "    print('missing key')"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-2:] == ["Raleigh, NC", "missing key"], result.stdout
+
+def run_script(tmp, script, dotenv, *args):
+    """Run an entry point from a directory holding links to the code and its own .env"""
+    for name in os.listdir(HERE):
+        if name.endswith((".py", ".json")):
+            os.symlink(os.path.join(HERE, name), os.path.join(tmp, name))
+    with open(os.path.join(tmp, ".env"), "w") as file:
+        file.write(dotenv)
+    env = {name: value for name, value in os.environ.items()
+           if name not in ("OPENAI_API_KEY", "TERM_STATS_PATH", "MONITOR_SUBREDDITS", "REDDIT_BASE_URL",
+                           "SEARCH_CACHE_PATH")}
+    return subprocess.run([sys.executable, os.path.join(tmp, script), *args], cwd=tmp, env=env,
+                          capture_output=True, text=True, timeout=60)
+
+def test_entry_points_read_dotenv():
+    print("🧪 Testing settings from .env in the command-line entry points...")
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run_script(tmp, "term_stats.py", "TERM_STATS_PATH=custom_stats.db\n")
+        assert result.returncode == 0, result.stderr
+        assert os.path.exists(os.path.join(tmp, "custom_stats.db")), "module settings see .env"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run_script(tmp, "monitor.py", "MONITOR_SUBREDDITS=raleigh\nREDDIT_BASE_URL=http://127.0.0.1:9\n"
+                                               "SEARCH_CACHE_PATH=cache.db\n", "--once")
+        assert result.returncode == 0, result.stderr
+        assert "Watching r/raleigh" in result.stdout and "Polling r/raleigh/new failed" in result.stdout, result.stdout
+        assert os.path.exists(os.path.join(tmp, "cache.db"))
+
+if __name__ == "__main__":
+    print("🚀 Testing lazy import\n")
+    test_import_needs_no_credentials()
+    test_config_and_client_load_on_first_use()
+    test_entry_points_read_dotenv()
+    print("\n✅ Lazy import tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the local lead pre-classifier trains and gates sensibly
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from lead_classifier import LeadClassifier, evaluate, load_labels, record_label, split_examples
+
+SERVICES = ["painter", "deck repair", "kitchen remodel", "drywall patch", "fence install", "power washing"]
+
+def make_examples(count=300, seed=1):
+    rng = random.Random(seed)
+    examples = []
+    for i in range(count):
+        service = rng.choice(SERVICES)
+        if i % 4 == 0:
+            text = rng.choice([
+                f"Can anyone recommend a {service} in Durham? Need a quote this month for our house",
+                f"Looking for a {service} near me, homeowner needs an estimate asap",
+                f"Need help with {service} at my home in Durham, who do you recommend",
+            ])
+            examples.append((text, True))
+        else:
+            text = rng.choice([
+                f"We are hiring experienced {service} crew, apply now, competitive pay",
+                f"Best {service} company in the Triangle, call for discount coupon",
+                f"How to do {service} yourself DIY tutorial step by step",
+                f"Review of local {service} businesses and ratings for 2024",
+            ])
+            examples.append((text, False))
+    return examples
+
+def test_classifier_separates_leads():
+    print("🧪 Testing pre-classifier training...")
+    train, test = split_examples(make_examples())
+    model = LeadClassifier().fit(train)
+
+    report = {row["threshold"]: row for row in evaluate(model, test)}
+    print(f"   threshold 0.05 → recall {report[0.05]['recall']:.0%}, saved {report[0.05]['llm_calls_saved']:.0%}")
+    assert report[0.05]["recall"] == 1.0
+    assert report[0.05]["llm_calls_saved"] > 0.5
+
+    assert model.predict_proba("Need a painter for my kitchen, can anyone recommend one?") > 0.5
+    assert model.predict_proba("Now hiring painters, apply today") < 0.5
+
+def test_model_and_label_roundtrip():
+    print("🧪 Testing model save/load and label log...")
+    with tempfile.TemporaryDirectory() as tmp:
+        labels = os.path.join(tmp, "labels.jsonl")
+        record_label("need a deck builder", True, "Yes - homeowner wants a deck", path=labels)
+        record_label("deck builders hiring", True, "No - job posting", path=labels)
+        assert load_labels(labels) == [("need a deck builder", True), ("deck builders hiring", False)]
+
+        model = LeadClassifier().fit(make_examples(100))
+        path = os.path.join(tmp, "model.json")
+        model.save(path)
+        loaded = LeadClassifier.load(path)
+        text = "looking for a fence install quote"
+        assert abs(loaded.predict_proba(text) - model.predict_proba(text)) < 1e-3
+
+if __name__ == "__main__":
+    print("🚀 Testing lead pre-classifier\n")
+    test_classifier_separates_leads()
+    test_model_and_label_roundtrip()
+    print("\n✅ Pre-classifier tests passed")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the SQLite lead store
+Checks batched writes, globally unique IDs, keyset pagination, filters and CSV export
+"""
+
+import sys
+import os
+import csv
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from lead_store import LeadStore
+
+def add_leads(store, search_id, count, platform="Reddit"):
+    return [store.add(search_id=search_id, title=f"Need a painter #{i}", link=f"https://reddit.com/r/durham/{search_id}/{i}",
+                      snippet="kitchen walls", platform=platform, search_term='"need a painter"',
+                      is_qualified=i % 2 == 0, ai_reason="Homeowner asking for a painter")
+            for i in range(count)]
+
+def test_ids_are_unique_across_jobs_and_stores():
+    print("🧪 Testing globally unique IDs...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "leads.db")
+        first = LeadStore(path, batch_size=10, flush_seconds=0)
+        second = LeadStore(path, batch_size=10, flush_seconds=0)  # e.g. another worker process
+        ids = [lead["id"] for lead in add_leads(first, "job-a", 25) + add_leads(second, "job-b", 25)]
+        ids += [lead["id"] for lead in add_leads(first, "job-c", 5)]
+        assert len(ids) == len(set(ids)), "IDs must never repeat across jobs"
+        first.close()
+        second.close()
+
+        reopened = LeadStore(path, flush_seconds=0)
+        assert len(reopened.list_leads(limit=500, qualified=None)[0]) == 55
+        assert reopened.get(ids[0])["title"] == "Need a painter #0"
+        reopened.close()
+
+def test_batched_writes():
+    print("🧪 Testing batched inserts...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LeadStore(os.path.join(tmp, "leads.db"), batch_size=50, flush_seconds=0)
+        add_leads(store, "job", 49)
+        assert len(store.pending) == 49
+        add_leads(store, "job", 1)
+        assert store.pending == [], "a full batch is written in one transaction"
+        lead = add_leads(store, "job", 1)[0]
+        lead.pop("search_id")  # callers may reshape the returned dict
+        assert store.get(lead["id"]) is not None, "reads flush pending writes first"
+        store.close()
+
+def test_keyset_pagination_and_filters():
+    print("🧪 Testing keyset pagination and filters...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)
+        add_leads(store, "job-a", 30, platform="Reddit")
+        add_leads(store, "job-b", 10, platform="Nextdoor")
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = store.list_leads(limit=7, before=cursor)
+            seen.extend(lead["id"] for lead in page)
+            if cursor is None:
+                break
+        assert len(seen) == 20, "only qualified leads by default"
+        assert seen == sorted(seen, reverse=True), "newest first"
+
+        assert len(store.list_leads(limit=100, qualified=None)[0]) == 40
+        assert store.count_leads() == 20 and store.count_leads(platform="nextdoor") == 5
+        nextdoor, _ = store.list_leads(limit=100, platform="nextdoor")
+        assert len(nextdoor) == 5 and all(lead["platform"] == "Nextdoor" for lead in nextdoor)
+        assert len(store.list_leads(limit=100, search_id="job-a", qualified=False)[0]) == 15
+        assert len(store.find_by_link("https://reddit.com/r/durham/job-b/3")) == 1
+        store.close()
+
+def test_order_follows_insertion_across_processes():
+    print("🧪 Testing newest-first order with interleaved ID blocks...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "leads.db")
+        api = LeadStore(path, flush_seconds=0)
+        worker = LeadStore(path, flush_seconds=0)
+        api.add("job-a", "warm up", "https://x/0", "", "Reddit", "", True, "", found_at="2026-01-01T00:00:00.000000")
+        worker.add("job-b", "warm up", "https://x/1", "", "Reddit", "", True, "", found_at="2026-01-01T00:00:01.000000")
+        titles = []
+        for second in range(2, 22):
+            store = worker if second % 3 else api  # the worker's IDs are a block above the API's
+            title = f"lead {second}"
+            store.add("job", title, f"https://x/{second}", "", "Reddit", "", True, "",
+                      found_at=f"2026-01-01T00:00:{second:02d}.000000")
+            titles.append(title)
+        api.flush()
+        worker.flush()
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = api.list_leads(limit=6, before=cursor, search_id="job")
+            seen.extend(lead["title"] for lead in page)
+            if cursor is None:
+                break
+        assert seen == titles[::-1], "newest first by time found, whichever process wrote it"
+        try:
+            api.list_leads(before="not-a-cursor")
+            assert False, "malformed cursors are rejected"
+        except ValueError:
+            pass
+        api.close()
+        worker.close()
+
+def test_csv_export():
+    print("🧪 Testing per-run CSV export...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)
+        add_leads(store, "run-1", 6)
+        add_leads(store, "run-2", 4)
+        path = os.path.join(tmp, "qualified_leads.csv")
+        assert store.export_csv(path, search_id="run-1") == 3
+        assert store.export_csv(path, search_id="run-2") == 2
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = list(csv.reader(file))
+        assert rows[0] == ["Title", "Link", "Reason"]
+        assert len(rows) == 6, "header written once, then every qualified lead"
+        store.close()
+
+if __name__ == "__main__":
+    print("🚀 Testing lead store\n")
+    test_ids_are_unique_across_jobs_and_stores()
+    test_batched_writes()
+    test_keyset_pagination_and_filters()
+    test_order_follows_insertion_across_processes()
+    test_csv_export()
+    print("\n✅ Lead store tests passed")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script to verify multi-location searches
+Checks metro expansion, the per-city query templates, the subreddit picked by the
+Reddit search, the widened pipeline and POST /api/search with several locations
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import lead_finder
+from pipeline import PipelineConfig, LOCATION_FANOUT_MAX
+from testing import patched
+
+def test_expand_locations():
+    print("🧪 Testing location lists and metro names...")
+    triangle = ["Durham, NC", "Raleigh, NC", "Chapel Hill, NC", "Cary, NC"]
+    assert lead_finder.expand_locations("Triangle") == triangle
+    assert lead_finder.expand_locations(["Durham, NC", "research triangle"]) == triangle, "cities are deduplicated"
+    assert lead_finder.expand_locations("Apex, NC;  Wake   Forest, NC ; ") == ["Apex, NC", "Wake Forest, NC"]
+    assert lead_finder.expand_locations(" ; ") == []
+
+    assert lead_finder.location_fields("Chapel Hill, NC") == {
+        "location": "Chapel Hill, NC", "city": "chapel hill", "subreddit": "chapelhill"}
+    assert lead_finder.location_fields("Apex, NC")["subreddit"] == "apexnc"
+
+def test_build_queries():
+    print("🧪 Testing templated queries...")
+    single = lead_finder.build_queries("Durham, NC")
+    assert len(single) == len(lead_finder.PLATFORM_TEMPLATES) * len(lead_finder.SERVICE_PHRASES)
+    assert ("reddit", '"need a painter" site:reddit.com/r/durham in Durham, NC') in single
+    assert ("facebook", '"need a painter" site:facebook.com/groups "durham" in Durham, NC') in single
+    assert ("nextdoor", '"need a painter" durham Durham, NC') in single
+
+    triangle = lead_finder.build_queries("Triangle", ["deck repair"])
+    assert len(triangle) == 4 * len(lead_finder.PLATFORM_TEMPLATES)
+    assert ("reddit", '"deck repair" site:reddit.com/r/chapelhill in Chapel Hill, NC') in triangle
+    assert len(set(triangle)) == len(triangle)
+
+def test_reddit_search_uses_the_city_subreddit():
+    print("🧪 Testing the subreddit of a Reddit query...")
+    import search_cache
+    from fake_services import FakeServices, parse_rates
+    from search_cache import SearchCache
+
+    services = FakeServices(latency=parse_rates("0")).start()
+    config = lead_finder.get_config()
+    with tempfile.TemporaryDirectory() as tmp, \
+            patched(config, reddit_base_url=services.base_url, use_search_cache=True), \
+            patched(search_cache, _cache=SearchCache(os.path.join(tmp, "search_cache.db"))):
+        try:
+            results = lead_finder.search_reddit_directly('"need a painter" site:reddit.com/r/chapelhill in Chapel Hill, NC')
+            assert results and all("/r/chapelhill/" in result["link"] for result in results)
+            assert search_cache._cache.get("reddit", "r/chapelhill: need a painter in Chapel Hill, NC") is not None
+        finally:
+            services.stop()
+
+def test_fan_out():
+    print("🧪 Testing the widened pipeline...")
+    base = PipelineConfig(search_concurrency=2, scrape_concurrency=3, qualify_concurrency=1, queue_size=10)
+    assert base.fan_out(1).search_concurrency == 2
+    wide = base.fan_out(4)
+    expected = min(4, LOCATION_FANOUT_MAX)
+    assert (wide.search_concurrency, wide.scrape_concurrency, wide.qualify_concurrency, wide.queue_size) == \
+        (2 * expected, 3 * expected, expected, 10 * expected)
+    assert wide.qualify_batch_size == base.qualify_batch_size
+    assert base.fan_out(100).search_concurrency == 2 * LOCATION_FANOUT_MAX
+
+def test_api_accepts_locations():
+    print("🧪 Testing POST /api/search with several locations...")
+    import api_server
+    import job_queue
+    import lead_store
+    from job_queue import JobQueue
+
+    # The queue backend, so nothing runs without a worker
+    with tempfile.TemporaryDirectory() as tmp, patched(api_server, JOB_BACKEND="queue"), \
+            patched(job_queue, _queue=JobQueue(os.path.join(tmp, "jobs.db"))), \
+            patched(lead_store, _store=lead_store.LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)):
+        try:
+            client = api_server.app.test_client()
+            started = client.post("/api/search", json={"searchTerms": "deck repair",
+                                                       "locations": ["Durham, NC", "Cary, NC"]}).get_json()
+            row = job_queue._queue.get(started["search_id"])
+            assert row["location"] == "Durham, NC; Cary, NC"
+
+            same = client.post("/api/search", json={"searchTerms": "deck repair",
+                                                    "location": "Cary, NC; Durham, NC"}).get_json()
+            assert same["coalesced"] and same["search_id"] == started["search_id"], "same cities in any order"
+
+            job = api_server.SearchJob("job-x", "deck repair", row["location"])
+            assert job.locations == ["Durham, NC", "Cary, NC"]
+            queries = api_server.build_job_queries(job)
+            assert ("reddit", '"deck repair" site:reddit.com/r/cary in Cary, NC') in queries
+            assert not any("need a painter" in query for _, query in queries), "the user's terms replace the generic ones"
+
+            response = client.post("/api/search", json={"searchTerms": "deck repair", "locations": [" ; "]})
+            assert response.status_code == 400
+        finally:
+            api_server.active_searches.clear()
+
+if __name__ == "__main__":
+    print("🚀 Testing multi-location searches\n")
+    test_expand_locations()
+    test_build_queries()
+    test_reddit_search_uses_the_city_subreddit()
+    test_fan_out()
+    test_api_accepts_locations()
+    print("\n✅ Multi-location tests passed")
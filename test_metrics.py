@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script to verify pipeline metrics and the /api/metrics endpoint
+Checks the Prometheus text format, hot-path cost, and metrics from a scrape and an OpenAI call
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Counter, Gauge, Histogram, timed, STAGE_SECONDS, STAGE_ERRORS
+from testing import patched
+
+def test_text_format():
+    print("🧪 Testing the exposition format...")
+    requests_total = Counter("test_requests_total", "Requests", ["provider"])
+    requests_total.labels("reddit").inc()
+    requests_total.labels("reddit").inc(2)
+    latency = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+    depth = Gauge("test_depth", "Depth", ["stage"], fn=lambda: {"scrape": 3})
+
+    text = requests_total.render() + "\n" + latency.render() + "\n" + depth.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{provider="reddit"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count 3' in text and 'test_latency_seconds_sum 5.55' in text
+    assert 'test_depth{stage="scrape"} 3' in text
+
+def test_timed_stage_and_overhead():
+    print("🧪 Testing stage timing and its cost...")
+
+    @timed("test_stage")
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        failing()
+    except RuntimeError:
+        pass
+    assert STAGE_SECONDS.count("test_stage") == 1 and STAGE_ERRORS.value("test_stage") == 1
+
+    @timed("test_noop")
+    def noop():
+        return None
+
+    calls = 20000
+    start = time.perf_counter()
+    for _ in range(calls):
+        noop()
+    per_call_us = (time.perf_counter() - start) / calls * 1e6
+    print(f"   {per_call_us:.2f} µs per timed call")
+    assert per_call_us < 50, "metrics must stay negligible next to network calls"
+
+def test_metrics_endpoint_after_real_calls():
+    print("🧪 Testing /api/metrics after a scrape and an OpenAI call...")
+    from openai import OpenAI
+    from fake_services import FakeServices, parse_rates
+    import api_server
+    import lead_finder
+
+    services = FakeServices(latency=parse_rates("0"), errors=parse_rates("reddit=1")).start()
+    env = services.env()
+    client = OpenAI(api_key=env["OPENAI_API_KEY"], base_url=env["OPENAI_BASE_URL"])
+    try:
+        with patched(lead_finder, _openai_client=client):
+            text = lead_finder.scrape_text(f"{services.base_url}/pages/p01")
+            assert text.startswith("Need a painter")
+            assert lead_finder.ask_openai(lead_finder.build_qualify_prompt(text)).startswith("Yes")
+            lead_finder.http_get(f"{services.base_url}/r/durham/search.json", provider="reddit")
+    finally:
+        services.stop()
+
+    response = api_server.app.test_client().get("/api/metrics")
+    assert response.status_code == 200 and response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    for expected in ('leadgen_stage_seconds_count{stage="scrape"}',
+                     'leadgen_stage_seconds_count{stage="fetch"}',
+                     'leadgen_stage_seconds_count{stage="parse"}',
+                     'leadgen_provider_request_seconds_count{provider="web"}',
+                     'leadgen_provider_request_seconds_count{provider="openai"}',
+                     'leadgen_provider_errors_total{provider="reddit",reason="5xx"}',
+                     'leadgen_openai_tokens_total{kind="prompt"}',
+                     'leadgen_openai_cost_dollars_total',
+                     'leadgen_active_jobs{status="running"}',
+                     'leadgen_scheduler_queue_depth',
+                     'leadgen_pipeline_queue_depth{stage="qualify"}'):
+        assert expected in body, f"missing {expected}"
+
+if __name__ == "__main__":
+    print("🚀 Testing metrics\n")
+    test_text_format()
+    test_timed_stage_and_overhead()
+    test_metrics_endpoint_after_real_calls()
+    print("\n✅ Metrics tests passed")
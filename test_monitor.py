@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the continuous Reddit monitor
+Polls the fake r/durham/new as posts are "published" and checks that only posts past
+the durable cursor are qualified, that the interval adapts, that posts without a verdict are
+checked again, and that /api/monitor sees the leads
+"""
+
+import sys
+import os
+import re
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from monitor import RedditMonitor, parse_subreddits, post_number, fullname_before, cursor_key
+from testing import patched
+
+# Off, so the tests don't write outside their temp dir or load a local model
+OFFLINE_SETTINGS = {"use_verdict_cache": False, "use_dedup_index": False, "record_lead_labels": False,
+                    "use_lead_classifier": False}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_names_and_cursor_order():
+    print("🧪 Testing subreddit lists and post order...")
+    assert parse_subreddits("durham, r/raleigh,/r/Durham/ ,") == ["durham", "raleigh"]
+    assert post_number("t3_z") < post_number("t3_10") < post_number("t3_1abcz") < post_number("t3_1abd0")
+    assert fullname_before("t3_1abd0") == "t3_1abcz" and fullname_before("t3_p01") == "t3_p00"
+    assert fullname_before("t3_10") == "t3_z" and fullname_before("t3_1") == "t3_0"
+
+def stored_ids(store):
+    store.flush()
+    links = [row[0] for row in store.conn.execute("SELECT link FROM leads WHERE search_id = 'monitor'")]
+    return sorted(re.search(r"/comments/(\w+)/", link).group(1) for link in links)
+
+def test_only_new_posts_are_processed():
+    print("🧪 Testing polls against the cursor...")
+    from openai import OpenAI
+    from fake_services import FakeServices, parse_rates
+    from search_cache import SearchCache
+    import api_server
+    import lead_finder
+    import lead_store
+    import search_cache
+
+    services = FakeServices(latency=parse_rates("0")).start()
+    env = services.env()
+    client = OpenAI(api_key=env["OPENAI_API_KEY"], base_url=env["OPENAI_BASE_URL"])
+    with tempfile.TemporaryDirectory() as tmp:
+        store = lead_store.LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)
+        cursors = SearchCache(os.path.join(tmp, "search_cache.db"))
+        try:
+            with patched(lead_finder.get_config(), **OFFLINE_SETTINGS), patched(lead_finder, _openai_client=client), \
+                    patched(lead_store, _store=store), patched(search_cache, _cache=cursors):
+                clock = FakeClock()
+
+                services.published = 5
+                monitor = RedditMonitor(["durham"], base_url=services.base_url, cursors=cursors,
+                                        min_interval=10, max_interval=100, backfill=3, clock=clock)
+                assert monitor.run_cycle() == 3, "the first poll only backfills the newest posts"
+                assert stored_ids(store) == ["p03", "p04", "p05"]
+                assert cursors.get_cursor(cursor_key("durham")) == "t3_p05"
+                assert services.stats()["calls"]["pages"] == 0, "Reddit bodies are qualified without fetching pages"
+
+                assert monitor.run_cycle() == 0, "not due yet"
+                clock.now = monitor.watches[0].next_poll
+                calls = services.stats()["calls"]
+                assert monitor.run_cycle() == 0
+                after = services.stats()["calls"]
+                assert after["reddit"] == calls["reddit"] + 1 and after["openai"] == calls["openai"], \
+                    "a quiet poll is one request and nothing else"
+                assert monitor.watches[0].interval == 15, "quiet polls back off"
+
+                services.published = 12
+                clock.now = monitor.watches[0].next_poll
+                assert monitor.run_cycle() == 7
+                checked = [post["id"] for post in services.posts[2:12]
+                           if not lead_finder.is_filtered_result({"title": post["title"], "snippet": post["body"]})]
+                assert stored_ids(store) == checked, "new posts go through the same filters as searches"
+                assert monitor.watches[0].interval == 10, "new posts speed polling back up"
+
+                restarted = RedditMonitor(["durham"], base_url=services.base_url, cursors=cursors, clock=clock)
+                assert restarted.watches[0].cursor == "t3_p12"
+                assert restarted.run_cycle() == 0, "the cursor survives a restart"
+
+                response = api_server.app.test_client().get("/api/monitor?since=0").get_json()
+                assert len(response["leads"]) == len(checked) and response["qualified_count"] > 0
+                assert response["subreddits"] == [{"subreddit": "durham", "cursor": "t3_p12"}]
+                seqs = [lead["seq"] for lead in response["leads"]]
+                assert seqs == sorted(seqs) and response["next_since"] == seqs[-1], "paged in commit (seq) order"
+                middle = api_server.app.test_client().get(f"/api/monitor?since={seqs[1]}").get_json()
+                assert [lead["seq"] for lead in middle["leads"]] == seqs[2:]
+                newer = api_server.app.test_client().get(f"/api/monitor?since={response['next_since']}").get_json()
+                assert newer["leads"] == [] and newer["next_since"] == response["next_since"]
+        finally:
+            store.close()
+            services.stop()
+
+def test_failed_verdicts_hold_the_cursor():
+    print("🧪 Testing polls while OpenAI is down...")
+    from openai import OpenAI
+    from fake_services import FakeServices, parse_rates
+    from search_cache import SearchCache
+    import lead_finder
+    import lead_store
+    import search_cache
+
+    services = FakeServices(latency=parse_rates("0"), errors=parse_rates("openai=1")).start()
+    env = services.env()
+    client = OpenAI(api_key=env["OPENAI_API_KEY"], base_url=env["OPENAI_BASE_URL"], max_retries=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = lead_store.LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0)
+        cursors = SearchCache(os.path.join(tmp, "search_cache.db"))
+        try:
+            with patched(lead_finder.get_config(), **OFFLINE_SETTINGS), patched(lead_finder, _openai_client=client), \
+                    patched(lead_store, _store=store), patched(search_cache, _cache=cursors):
+                clock = FakeClock()
+
+                services.published = 3
+                monitor = RedditMonitor(["durham"], base_url=services.base_url, cursors=cursors,
+                                        min_interval=10, max_interval=100, backfill=3, clock=clock)
+                assert monitor.run_cycle() == 3
+                assert stored_ids(store) == [], "failed verdicts aren't stored as rejections"
+                assert monitor.watches[0].cursor == "t3_p00", "the cursor doesn't pass posts without a verdict"
+                assert monitor.watches[0].interval == 15, "failed verdicts back off like a failed poll"
+
+                # More posts than the backfill arrive before the retry: the failed ones are still fetched
+                services.errors["openai"] = 0.0
+                services.published = 5
+                clock.now = monitor.watches[0].next_poll
+                assert monitor.run_cycle() == 5, "the failed posts are checked again"
+                assert stored_ids(store) == ["p01", "p02", "p03", "p04", "p05"]
+                assert cursors.get_cursor(cursor_key("durham")) == "t3_p05"
+                assert monitor.watches[0].interval == 10
+
+                # Only p07 fails: the cursor stops just below it and p08 isn't stored twice on the retry
+                unlucky = services.posts[6]["body"][:80]
+                ask_openai = lead_finder.ask_openai
+                flaky = lambda prompt, *args, **kwargs: None if unlucky in prompt else ask_openai(prompt, *args, **kwargs)
+                with patched(lead_finder, ask_openai=flaky):
+                    services.published = 8
+                    clock.now = monitor.watches[0].next_poll
+                    assert monitor.run_cycle() == 3
+                    assert stored_ids(store) == ["p01", "p02", "p03", "p04", "p05", "p06", "p08"]
+                    assert monitor.watches[0].cursor == "t3_p06"
+                    assert monitor.watches[0].interval == 15, "one poll adapts the interval once"
+
+                clock.now = monitor.watches[0].next_poll
+                assert monitor.run_cycle() == 2
+                assert stored_ids(store) == ["p01", "p02", "p03", "p04", "p05", "p06", "p07", "p08"]
+                assert monitor.watches[0].cursor == "t3_p08"
+        finally:
+            store.close()
+            services.stop()
+
+if __name__ == "__main__":
+    print("🚀 Testing the Reddit monitor\n")
+    test_names_and_cursor_order()
+    test_only_new_posts_are_processed()
+    test_failed_verdicts_hold_the_cursor()
+    print("\n✅ Monitor tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the concurrent search/scrape/qualify pipeline
+Uses local stand-in stage functions with simulated latency (no network)
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import LeadPipeline, PipelineConfig
+
+LATENCY = 0.05
+
+def fake_search(query):
+    time.sleep(LATENCY)
+    return [{"title": f"{query} post {i}", "link": f"https://reddit.com/{query}/{i}", "snippet": ""}
+            for i in range(5)]
+
+def fake_scrape(link):
+    time.sleep(LATENCY)
+    return f"need a painter for my kitchen {link}"
+
+def fake_qualify(text):
+    time.sleep(LATENCY)
+    return text.endswith("/0"), "Yes - test" if text.endswith("/0") else "No - test"
+
+def test_pipeline_overlaps_stages():
+    print("🧪 Testing concurrent pipeline...")
+    queries = [("reddit", f"q{i}") for i in range(12)]
+    results = []
+
+    pipeline = LeadPipeline(fake_search, fake_scrape, fake_qualify,
+                            PipelineConfig(search_concurrency=4, scrape_concurrency=16,
+                                           qualify_concurrency=16, queue_size=10))
+    start = time.perf_counter()
+    pipeline.run(queries, lambda site, result, is_lead, reason: results.append((result["link"], is_lead)))
+    elapsed = time.perf_counter() - start
+
+    # Sequentially this is 12 searches + 60 scrapes + 60 qualifications = 132 × LATENCY
+    sequential = (12 + 60 + 60) * LATENCY
+    print(f"   Processed {len(results)} results in {elapsed:.2f}s (sequential ≈ {sequential:.2f}s)")
+    assert len(results) == 60
+    assert sum(1 for _, is_lead in results if is_lead) == 12
+    assert elapsed < sequential / 3
+
+def test_pipeline_filters_and_cancels():
+    print("🧪 Testing accept filter and cancellation...")
+    results = []
+    pipeline = LeadPipeline(fake_search, fake_scrape, fake_qualify)
+    pipeline.run([("reddit", "a"), ("reddit", "b")],
+                 lambda site, result, is_lead, reason: results.append(result),
+                 accept=lambda site, result: result["link"].endswith("/1"))
+    assert len(results) == 2
+
+    cancelled = []
+    pipeline.run([("reddit", "a")], lambda *args: cancelled.append(args), is_cancelled=lambda: True)
+    assert cancelled == []
+
+def test_pipeline_batches_qualification():
+    print("🧪 Testing batched qualification...")
+    batch_sizes = []
+
+    def fake_batch(texts):
+        batch_sizes.append(len(texts))
+        time.sleep(LATENCY)
+        return [fake_qualify(text) for text in texts]
+
+    results = []
+    pipeline = LeadPipeline(fake_search, fake_scrape, fake_qualify, batch_qualify_fn=fake_batch,
+                            config=PipelineConfig(scrape_concurrency=16, qualify_concurrency=2,
+                                                  qualify_batch_size=8, qualify_batch_wait=0.2))
+    pipeline.run([("reddit", f"q{i}") for i in range(8)],
+                 lambda site, result, is_lead, reason: results.append(is_lead))
+
+    print(f"   Batch sizes: {batch_sizes}")
+    assert len(results) == 40 and sum(results) == 8
+    assert sum(batch_sizes) == 40
+    assert max(batch_sizes) <= 8
+    assert len(batch_sizes) < 40 / 2
+
+def test_parse_batch_reply():
+    print("🧪 Testing batch reply parsing...")
+    from lead_finder import parse_batch_reply
+
+    reply = "1. Yes - homeowner needs deck repair\n2) No - contractor advertisement\nItem 3: **No** – job posting"
+    assert parse_batch_reply(reply, 3) == [
+        (True, "Yes - homeowner needs deck repair"),
+        (False, "No - contractor advertisement"),
+        (False, "No - job posting"),
+    ]
+    assert parse_batch_reply("1. Yes - ok", 2) == [(True, "Yes - ok"), None]
+    assert parse_batch_reply(None, 2) == [None, None]
+
+if __name__ == "__main__":
+    print("🚀 Testing lead pipeline\n")
+    test_pipeline_overlaps_stages()
+    test_pipeline_filters_and_cancels()
+    test_pipeline_batches_qualification()
+    test_parse_batch_reply()
+    print("\n✅ Pipeline tests passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify query merging, de-duplication and result attribution
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from query_planner import plan_queries, plan_search, word_count
+
+QUERIES = [
+    ("reddit", '"need a painter" site:reddit.com/r/durham in Durham, NC'),
+    ("reddit", '"deck builder near me" site:reddit.com/r/durham in Durham, NC'),
+    ("reddit", '"need a painter" site:reddit.com/r/durham in Durham, NC'),  # duplicate after customization
+    ("nextdoor", '"need a painter" durham Durham, NC'),
+    ("nextdoor", 'plain query without a phrase'),
+]
+
+def test_plan_merges_and_dedupes():
+    print("🧪 Testing query merging...")
+    plan = plan_queries(QUERIES)
+    for planned in plan:
+        print(f"   [{planned.site}] {planned.query}")
+    assert [planned.site for planned in plan] == ["reddit", "nextdoor", "nextdoor"]
+    assert plan[0].query == '("need a painter" OR "deck builder near me") site:reddit.com/r/durham in Durham, NC'
+    assert plan[0].max_results == 10
+    assert plan[1].query == QUERIES[3][1]  # single phrase stays unchanged
+    assert plan[2].query == "plain query without a phrase"
+
+def test_plan_respects_word_limit():
+    print("🧪 Testing word limit...")
+    many = [("reddit", f'"service number {i} wanted" site:reddit.com/r/durham') for i in range(20)]
+    plan = plan_queries(many, max_words=20)
+    assert all(word_count(planned.query) <= 20 for planned in plan)
+    assert sum(len(planned.phrases) for planned in plan) == 20
+    assert len(plan) < 20
+
+def test_results_map_back_to_phrases():
+    print("🧪 Testing result attribution...")
+    calls = []
+
+    def fake_search(query, num=5):
+        calls.append((query, num))
+        return [{"title": "Deck builder recommendations?", "snippet": "Anyone know a deck builder near me", "link": "a"},
+                {"title": "Need a painter ASAP", "snippet": "walls", "link": "b"}]
+
+    queries, search = plan_search(QUERIES[:2], fake_search)
+    assert len(queries) == 1
+    results = search(queries[0][1])
+    assert calls == [(queries[0][1], 10)]
+    assert results[0]["term"] == QUERIES[1][1]
+    assert results[1]["term"] == QUERIES[0][1]
+
+if __name__ == "__main__":
+    print("🚀 Testing query planner\n")
+    test_plan_merges_and_dedupes()
+    test_plan_respects_word_limit()
+    test_results_map_back_to_phrases()
+    print("\n✅ Query planner tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared per-provider rate limiter
+Uses a fake clock so no real time passes
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import TokenBucket, ProviderLimit, RateLimiter, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def make_limit(clock, rate_per_minute, capacity, tokens_per_minute=None):
+    buckets = {"requests": TokenBucket(rate_per_minute / 60.0, capacity, clock=clock)}
+    if tokens_per_minute:
+        buckets["tokens"] = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute, clock=clock)
+    return ProviderLimit("test", buckets, sleep=clock.sleep)
+
+def test_waits_exactly_for_budget():
+    print("🧪 Testing token bucket waits...")
+    clock = FakeClock()
+    limit = make_limit(clock, rate_per_minute=60, capacity=2)
+
+    assert limit.acquire() and limit.acquire()
+    assert clock.slept == []  # burst within capacity is free
+    assert limit.acquire()
+    assert clock.slept == [1.0]  # 60/min → exactly one second for the next token
+    print(f"   ✅ slept {clock.slept}")
+
+def test_max_wait_rejects_without_spending():
+    print("🧪 Testing max_wait fallback...")
+    clock = FakeClock()
+    limit = make_limit(clock, rate_per_minute=1, capacity=1)
+    assert limit.acquire(max_wait=0)
+    assert not limit.acquire(max_wait=5)
+    clock.now += 60
+    assert limit.acquire(max_wait=0)
+
+def test_tokens_and_retry_after():
+    print("🧪 Testing token budget and Retry-After...")
+    clock = FakeClock()
+    limit = make_limit(clock, rate_per_minute=1000, capacity=1000, tokens_per_minute=600)
+    limiter = RateLimiter([limit])
+
+    assert limiter.acquire("test", tokens=600)
+    limiter.record_usage("test", 600, 300)  # only used half the estimate
+    assert limiter.acquire("test", tokens=300)
+    assert clock.slept == []
+
+    limiter.defer_from_headers("test", {"Retry-After": "7"})
+    assert limiter.acquire("test")
+    assert clock.slept == [7.0]
+
+    assert limiter.acquire("unknown-provider")
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("garbage") is None
+
+if __name__ == "__main__":
+    print("🚀 Testing rate limiter\n")
+    test_waits_exactly_for_budget()
+    test_max_wait_rejects_without_spending()
+    test_tokens_and_retry_after()
+    print("\n✅ Rate limiter tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script to verify relevance windows for lead qualification
+Checks passage selection and the token budget, then compares tokens and verdicts
+against the old first-1000-characters window on the labeled benchmark fixtures
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from relevance import RelevanceScorer, estimate_tokens, stem, vocabulary
+
+SCORER = RelevanceScorer(vocabulary(["need a painter", "deck builder near me"]), ["need", "looking for", "quote"],
+                         ["Durham"])
+
+def test_vocabulary_and_scores():
+    print("🧪 Testing vocabulary and passage scores...")
+    assert stem("painter") == stem("painting") == "paint"
+    assert vocabulary(["need a painter", "deck builder near me"]) == ["build", "deck", "paint"]
+    assert SCORER.score("Need someone to paint the deck in Durham") > SCORER.score("Need more coffee")
+    assert SCORER.score("Durham Bulls opening night") == 0, "a place name alone isn't relevant"
+
+def test_window_keeps_the_request_within_budget():
+    print("🧪 Testing window selection...")
+    chrome = "\n".join(["Skip to main content", "Log In", "Community rules: be civil, no spam."] * 20)
+    request = "Looking for a painter to repaint our deck this month. Happy to get a quote."
+    text = "Deck help in Durham\n" + chrome + "\n" + request + "\n" + chrome
+    window = SCORER.window(text, budget_tokens=50)
+    assert window.startswith("Deck help in Durham"), "the title always leads"
+    assert "Looking for a painter to repaint our deck this month." in window
+    assert "Skip to main content" not in window
+    assert estimate_tokens(window) <= 50
+
+    assert SCORER.window("Need a painter", budget_tokens=50) == "Need a painter", "short text is sent as is"
+    unrelated = "Title\n" + "Traffic was bad on the highway today.\n" * 40
+    assert SCORER.window(unrelated, budget_tokens=20) == unrelated[:80], "nothing relevant: keep the beginning"
+
+def test_fixture_tokens_and_verdicts():
+    print("🧪 Testing tokens and verdicts on the labeled fixtures...")
+    import lead_finder
+    from fake_services import FakeServices
+
+    services = FakeServices()
+    services.server.server_close()
+    old_tokens = new_tokens = old_correct = new_correct = 0
+    for post in services.posts:
+        text = lead_finder.extract_main_text(services.page_html(post))
+        old = text[:lead_finder.QUALIFY_WINDOW]
+        new = lead_finder.qualification_window(text)
+        old_tokens += estimate_tokens(old)
+        new_tokens += estimate_tokens(new)
+        old_correct += services.verdict(old).startswith("Yes") == post["lead"]
+        new_correct += services.verdict(new).startswith("Yes") == post["lead"]
+
+    count = len(services.posts)
+    print(f"   first {lead_finder.QUALIFY_WINDOW} chars: {old_tokens / count:.0f} tokens/page, "
+          f"{old_correct}/{count} correct")
+    print(f"   relevance window: {new_tokens / count:.0f} tokens/page, {new_correct}/{count} correct")
+    assert new_tokens < old_tokens * 0.7
+    assert new_correct == count >= old_correct
+
+def test_system_prompt_is_shared():
+    print("🧪 Testing the cache-friendly prompt split...")
+    import lead_finder
+    assert lead_finder.QUALIFY_INSTRUCTIONS in lead_finder.QUALIFY_SYSTEM
+    single = lead_finder.build_qualify_prompt("Need a painter")
+    batch = lead_finder.build_batch_prompt(["Need a painter", "Deck repair"])
+    assert lead_finder.QUALIFY_INSTRUCTIONS not in single and lead_finder.QUALIFY_INSTRUCTIONS not in batch
+    assert len(single) < 50 and "--- ITEM 2 START ---" in batch
+
+if __name__ == "__main__":
+    print("🚀 Testing relevance windows\n")
+    test_vocabulary_and_scores()
+    test_window_keeps_the_request_within_budget()
+    test_fixture_tokens_and_verdicts()
+    test_system_prompt_is_shared()
+    print("\n✅ Relevance window tests passed")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script to verify bounded page fetching and main-content extraction
+Serves pages from a local HTTP server (no internet needed)
+"""
+
+import sys
+import os
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+POST_PAGE = b"""<html><head><title>Need a painter for our kitchen : r/durham</title>
+<script>var tracking = "lots of javascript";</script><style>.nav { color: red }</style></head>
+<body><nav>Home Popular All Login Sign up Advertise Careers</nav>
+<header>reddit r/durham Join</header>
+<main><article><h1>Need a painter for our kitchen</h1>
+<p>We just bought a house near Duke Park and need someone to paint the kitchen cabinets. Can anyone recommend a painter? Looking for a quote this month.</p>
+</article></main>
+<footer>User Agreement Privacy Policy Content Policy</footer></body></html>"""
+
+HUGE_CHUNKS = 400
+SERVED = {"huge_bytes": 0, "huge_done": threading.Event()}
+
+class PageHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/post":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(POST_PAGE)
+        elif self.path == "/file.pdf":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.end_headers()
+            self.wfile.write(b"%PDF-1.4" + b"\0" * 10000)
+        elif self.path == "/huge":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            # A small send buffer, so bytes written ≈ bytes the client actually took
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 65536)
+            try:
+                self.wfile.write(b"<html><body><main><p>" + b"need a painter " * 10 + b"</p>")
+                for _ in range(HUGE_CHUNKS):  # ~25MB if fully downloaded
+                    self.wfile.write(b"<div>" + b"x" * 65536 + b"</div>")
+                    SERVED["huge_bytes"] += 65536
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                SERVED["huge_done"].set()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_scrape_extracts_post_body():
+    print("🧪 Testing main-content extraction...")
+    from lead_finder import scrape_text
+    server, base = start_server()
+    try:
+        text = scrape_text(f"{base}/post")
+        print(f"   {text[:80]!r}...")
+        assert text.startswith("Need a painter for our kitchen : r/durham")
+        assert "paint the kitchen cabinets" in text
+        for boilerplate in ("javascript", "color: red", "Sign up", "Privacy Policy"):
+            assert boilerplate not in text
+    finally:
+        server.shutdown()
+
+def test_scrape_skips_binaries_and_caps_size():
+    print("🧪 Testing content-type check and byte cap...")
+    import lead_finder
+    server, base = start_server()
+    try:
+        assert lead_finder.scrape_text(f"{base}/file.pdf") == ""
+        assert lead_finder.scrape_text(f"{base}/missing") == ""
+
+        text = lead_finder.scrape_text(f"{base}/huge")
+        assert "need a painter" in text
+        assert len(text) <= lead_finder.get_config().scrape_max_bytes
+        assert SERVED["huge_done"].wait(10), "the server stops writing once we hang up"
+        print(f"   Server wrote {SERVED['huge_bytes'] // 1024}KB of a ~25MB page before we hung up")
+        # Anything past the cap sat in socket buffers; reading the whole page would be 25MB
+        assert SERVED["huge_bytes"] < 4 * lead_finder.get_config().scrape_max_bytes, "the connection was closed early"
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    print("🚀 Testing bounded scraping\n")
+    test_scrape_extracts_post_body()
+    test_scrape_skips_binaries_and_caps_size()
+    print("\n✅ Scrape tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the search-result cache and incremental Reddit fetching
+Uses a local stand-in for Reddit's search.json (no internet needed)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from search_cache import SearchCache
+from testing import patched
+
+POSTS = []  # newest first, like sort=new
+REQUESTS = []
+
+def post(number):
+    return {"data": {"name": f"t3_{number}", "title": f"Need a painter #{number}",
+                     "permalink": f"/r/durham/comments/{number}/", "selftext": "kitchen walls"}}
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        REQUESTS.append(params)
+        children = POSTS
+        if "before" in params:
+            names = [child["data"]["name"] for child in POSTS]
+            before = params["before"][0]
+            children = POSTS[:names.index(before)] if before in names else []
+        body = json.dumps({"data": {"children": children[:int(params["limit"][0])]}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_search_cache_ttl():
+    print("🧪 Testing search cache TTL...")
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        cache = SearchCache(os.path.join(tmp, "search.db"), ttl_seconds=60, clock=clock)
+        cache.put("google_cse", '"Need a Painter"  durham', [{"link": "a"}])
+        assert cache.get("google_cse", '"need a painter" DURHAM') == [{"link": "a"}]
+        assert cache.get("reddit", '"need a painter" durham') is None
+        clock.now = 120
+        assert cache.get("google_cse", '"need a painter" durham') is None
+        assert cache.get("google_cse", '"need a painter" durham', allow_stale=True) == [{"link": "a"}]
+
+def test_reddit_incremental_fetch():
+    print("🧪 Testing incremental Reddit fetch with before= cursor...")
+    import lead_finder
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRedditHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    with tempfile.TemporaryDirectory() as tmp, patched(lead_finder.get_config(), reddit_base_url=base_url):
+        clock = FakeClock()
+        cache = SearchCache(os.path.join(tmp, "search.db"), ttl_seconds=60, clock=clock)
+        try:
+            with patched(lead_finder, get_search_cache=lambda: cache):
+                POSTS[:] = [post(3), post(2), post(1)]
+                first = lead_finder.search_reddit_directly('"need a painter" site:reddit.com/r/durham')
+                assert [r["title"] for r in first] == ["Need a painter #3", "Need a painter #2", "Need a painter #1"]
+
+                # Within the TTL nothing is fetched at all
+                assert lead_finder.search_reddit_directly('"need a painter" site:reddit.com/r/durham') == first
+                assert len(REQUESTS) == 1
+
+                # After the TTL only newer posts are requested, then merged with what we had
+                clock.now = 120
+                POSTS[:0] = [post(5), post(4)]
+                second = lead_finder.search_reddit_directly('"need a painter" site:reddit.com/r/durham')
+                assert REQUESTS[-1]["before"] == ["t3_3"]
+                assert [r["title"] for r in second][:3] == ["Need a painter #5", "Need a painter #4", "Need a painter #3"]
+                assert cache.get_cursor("r/durham: need a painter") == "t3_5"
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    print("🚀 Testing search cache\n")
+    test_search_cache_ttl()
+    test_reddit_incremental_fetch()
+    print("\n✅ Search cache tests passed")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script to verify incremental search results
+Checks ?since=<seq> on /results, ETag/304 responses and the Server-Sent Events stream (no network needed)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import api_server
+import lead_store
+from testing import patched
+
+def temp_lead_store(tmp):
+    """Keep test leads out of the real leads.db"""
+    return patched(lead_store, _store=lead_store.LeadStore(os.path.join(tmp, "leads.db"), flush_seconds=0))
+
+def start_job(search_id):
+    search_job = api_server.SearchJob(search_id, "", "Durham")
+    api_server.active_searches[search_id] = search_job
+    return search_job
+
+def add_results(search_job, count):
+    for _ in range(count):
+        number = len(search_job.results)
+        api_server.record_result(search_job, "reddit", {"title": f"Need a painter #{number}",
+                                                        "link": f"https://reddit.com/r/durham/{number}"},
+                                 number % 2 == 0, "Homeowner asking for a painter")
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return events
+
+def test_results_since():
+    print("🧪 Testing ?since= on /results...")
+    with tempfile.TemporaryDirectory() as tmp, temp_lead_store(tmp):
+        client = api_server.app.test_client()
+        search_job = start_job("since-test")
+        add_results(search_job, 5)
+
+        page = client.get("/api/search/since-test/results").get_json()
+        assert len(page["results"]) == 5 and page["next_since"] == 5
+
+        add_results(search_job, 3)
+        page = client.get(f"/api/search/since-test/results?since={page['next_since']}").get_json()
+        assert [r["title"] for r in page["results"]] == ["Need a painter #5", "Need a painter #6", "Need a painter #7"]
+        assert page["next_since"] == 8 and page["total_results"] == 8 and page["qualified_results"] == 4
+
+        page = client.get("/api/search/since-test/results?since=8").get_json()
+        assert page["results"] == [] and page["next_since"] == 8
+        assert client.get("/api/search/since-test/status").get_json()["qualified_count"] == 4
+
+def test_conditional_responses():
+    print("🧪 Testing ETags and 304s...")
+    with tempfile.TemporaryDirectory() as tmp, temp_lead_store(tmp):
+        client = api_server.app.test_client()
+        search_job = start_job("etag-test")
+        add_results(search_job, 3)
+
+        for path in ("/api/search/etag-test/status", "/api/search/etag-test/results?since=1"):
+            first = client.get(path)
+            etag = first.headers["ETag"]
+            again = client.get(path, headers={"If-None-Match": etag})
+            assert again.status_code == 304 and again.get_data() == b"" and again.headers["ETag"] == etag
+
+            add_results(search_job, 1)
+            changed = client.get(path, headers={"If-None-Match": etag})
+            assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+        other_view = client.get("/api/search/etag-test/results?since=1&qualified_only=true",
+                                headers={"If-None-Match": etag})
+        assert other_view.status_code == 200, "the ETag covers the query parameters too"
+
+        versions = [search_job.version]
+        search_job.update(progress=40)
+        versions.append(search_job.version)
+        add_results(search_job, 1)
+        versions.append(search_job.version)
+        assert versions == sorted(set(versions)), "every mutation bumps the version"
+
+def test_event_stream():
+    print("🧪 Testing the SSE stream...")
+    with tempfile.TemporaryDirectory() as tmp, temp_lead_store(tmp):
+        client = api_server.app.test_client()
+        search_job = start_job("sse-test")
+        add_results(search_job, 2)
+
+        def finish_later():
+            time.sleep(0.2)
+            add_results(search_job, 2)
+            search_job.update(progress=50, current_query="Searching reddit")
+            time.sleep(0.1)
+            search_job.update(status="completed", progress=100)
+
+        threading.Thread(target=finish_later, daemon=True).start()
+        response = client.get("/api/search/sse-test/events?since=1")
+        assert response.mimetype == "text/event-stream"
+        events = parse_events(response.get_data(as_text=True))
+
+        leads = [(event_id, data["title"]) for event, event_id, data in events if event == "lead"]
+        assert leads == [("2", "Need a painter #1"), ("3", "Need a painter #2"), ("4", "Need a painter #3")]
+        assert events[-1][0] == "done" and events[-1][2]["status"] == "completed"
+        assert events[-1][2]["results_count"] == 4
+
+        resumed = client.get("/api/search/sse-test/events", headers={"Last-Event-ID": "3"})
+        assert [event for event, _, _ in parse_events(resumed.get_data(as_text=True))] == ["lead", "progress", "done"]
+
+if __name__ == "__main__":
+    print("🚀 Testing incremental search results\n")
+    test_results_since()
+    test_conditional_responses()
+    test_event_stream()
+    print("\n✅ Search event tests passed")
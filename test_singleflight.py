@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script to verify in-flight request deduplication
+Runs overlapping "jobs" against a local page server and counts the external calls saved
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from singleflight import SingleFlight
+from testing import patched
+
+HITS = {}
+HITS_LOCK = threading.Lock()
+
+class SlowPageHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with HITS_LOCK:
+            HITS[self.path] = HITS.get(self.path, 0) + 1
+        time.sleep(0.2)  # a slow origin, so overlapping jobs really overlap
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write(f"Need a painter for {self.path}".encode())
+
+def test_concurrent_callers_share_one_call():
+    print("🧪 Testing shared results...")
+    flight = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return ["result"]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(flight.do, "same-query", slow) for _ in range(8)]
+        while flight.stats()["shared"] < 7:
+            time.sleep(0.01)
+        gate.set()
+        results = [future.result() for future in futures]
+    assert len(calls) == 1 and all(result == ["result"] for result in results)
+    assert flight.stats() == {"executed": 1, "shared": 7, "in_flight": 0, "saved_rate": 0.875}
+
+    assert flight.do("same-query", lambda: "fresh") == "fresh", "finished calls are not cached"
+
+def test_errors_reach_every_waiter():
+    print("🧪 Testing error propagation...")
+    flight = SingleFlight()
+    gate = threading.Event()
+
+    def failing():
+        gate.wait(2)
+        raise RuntimeError("provider down")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flight.do, "key", failing) for _ in range(3)]
+        while flight.stats()["shared"] < 2:
+            time.sleep(0.01)
+        gate.set()
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except RuntimeError as e:
+                errors.append(str(e))
+    assert errors == ["provider down"] * 3
+
+def test_batches_share_keys_in_flight():
+    print("🧪 Testing batches with overlapping keys...")
+    flight = SingleFlight()
+    gate = threading.Event()
+    asked = []
+
+    def batch(owned):
+        asked.append(sorted(owned))
+        if "a" in owned:
+            gate.wait(2)
+        return {key: key.upper() for key in owned}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(flight.do_many, ["a", "b"], batch)
+        while flight.stats()["in_flight"] < 2:
+            time.sleep(0.01)
+        second = executor.submit(flight.do_many, ["b", "c", "c"], batch)
+        while flight.stats()["shared"] < 1:
+            time.sleep(0.01)
+        gate.set()
+        assert first.result() == {"a": "A", "b": "B"}
+        assert second.result() == {"b": "B", "c": "C"}
+    assert asked == [["a", "b"], ["c"]], "each key is asked once"
+
+def test_concurrent_qualify_batches_share_verdicts():
+    print("🧪 Testing overlapping qualification batches...")
+    import lead_finder
+    from singleflight import get_flight
+
+    started, gate = threading.Event(), threading.Event()
+    sent = []
+
+    def fake_ask(prompt, reply_tokens=60, **kwargs):
+        items = prompt.count("START ---") or 1
+        sent.append(items)
+        if not started.is_set():
+            started.set()
+            gate.wait(2)  # the first batch is still in flight when the second arrives
+        if items == 1:
+            return "Yes - Homeowner needs a painter"
+        return "\n".join(f"{number}. Yes - Homeowner needs a painter" for number in range(1, items + 1))
+
+    texts = [f"Need a painter for room {number} of our house in Durham" for number in range(4)]
+    before = get_flight("qualify").stats()["shared"]
+    offline = patched(lead_finder.get_config(), use_verdict_cache=False, use_lead_classifier=False,
+                      record_lead_labels=False)
+    with offline, patched(lead_finder, ask_openai=fake_ask), ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(lead_finder.qualify_leads_batch, texts[:3])
+        started.wait(2)
+        second = executor.submit(lead_finder.qualify_leads_batch, texts[1:])
+        while get_flight("qualify").stats()["shared"] - before < 2:
+            time.sleep(0.01)
+        gate.set()
+        verdicts = first.result() + second.result()
+
+    print(f"   items per OpenAI request: {sent}")
+    assert sent == [3, 1], "the second batch only sends the window nobody else is qualifying"
+    assert all(verdict == (True, "Yes - Homeowner needs a painter") for verdict in verdicts)
+
+def test_overlapping_jobs_save_fetches():
+    print("🧪 Testing overlapping scrape load...")
+    import lead_finder
+    from singleflight import get_flight
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/post/{i}" for i in range(5)]
+    before = get_flight("scrape").stats()
+    try:
+        jobs = 4
+        with ThreadPoolExecutor(max_workers=jobs * len(urls)) as executor:
+            texts = list(executor.map(lead_finder.scrape_text, urls * jobs))
+    finally:
+        server.shutdown()
+
+    after = get_flight("scrape").stats()
+    saved = after["shared"] - before["shared"]
+    print(f"   {jobs} jobs × {len(urls)} pages: {sum(HITS.values())} fetches, {saved} duplicates saved")
+    assert all(text.startswith("Need a painter") for text in texts)
+    assert sum(HITS.values()) < jobs * len(urls)
+    assert saved == jobs * len(urls) - sum(HITS.values())
+
+if __name__ == "__main__":
+    print("🚀 Testing singleflight\n")
+    test_concurrent_callers_share_one_call()
+    test_errors_reach_every_waiter()
+    test_batches_share_keys_in_flight()
+    test_concurrent_qualify_batches_share_verdicts()
+    test_overlapping_jobs_save_fetches()
+    print("\n✅ Singleflight tests passed")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script to verify snippet-first qualification
+Checks which search results carry their full post body, that the pipeline skips the
+page fetch for them, escalates through the scrape and qualify stages when the model is unsure,
+and counts scrapes avoided per job
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import lead_finder
+from pipeline import LeadPipeline, PipelineConfig
+from testing import patched
+
+BODY = "Looking for someone to repaint our kitchen cabinets next month, can anyone recommend a painter?"
+
+def fake_search(query):
+    return [
+        {"title": "Cabinet painter?", "link": "https://reddit.com/r/durham/1", "snippet": "", "body": BODY},
+        {"title": "Painter recs", "link": "https://reddit.com/r/durham/2", "snippet": "", "body": "See title"},
+        {"title": "Deck help", "link": "https://example.com/3", "snippet": "Need a deck ..."},
+        {"title": "Vague post", "link": "https://reddit.com/r/durham/4", "snippet": "", "body": "x" * 60},
+    ]
+
+def fake_qualify(text):
+    if "x" * 60 in text:
+        return False, "Unsure - The post doesn't say what work is needed"
+    return "painter" in text.lower() or "deck" in text.lower(), "Yes - test"
+
+def test_provider_text():
+    print("🧪 Testing which results can skip the page fetch...")
+    assert lead_finder.is_truncated("Need a painter for the deck ...")
+    assert lead_finder.is_truncated("… and then the drywall cracked")
+    assert not lead_finder.is_truncated("Need a painter for the deck.")
+
+    config = lead_finder.get_config()
+    with patched(config, use_snippet_first=True):
+        assert lead_finder.provider_text({"title": "Cabinet painter?", "body": BODY}) == f"Cabinet painter?\n{BODY}"
+        assert lead_finder.provider_text({"title": "Painter recs", "body": "See title"}) is None, "too short to judge"
+        assert lead_finder.provider_text({"title": "Deck help", "snippet": "Need a deck ..."}) is None
+        config.use_snippet_first = False
+        assert lead_finder.provider_text({"title": "Cabinet painter?", "body": BODY}) is None
+
+def test_unsure_replies():
+    print("🧪 Testing Unsure verdicts...")
+    verdicts = lead_finder.parse_batch_reply("1. Yes - Wants a painter\n2. Unsure - Only a title\n3. No - Ad", 3)
+    assert verdicts[0] == (True, "Yes - Wants a painter")
+    assert verdicts[1] == (False, "Unsure - Only a title") and lead_finder.is_uncertain(verdicts[1])
+    assert not lead_finder.is_uncertain(verdicts[2]) and not lead_finder.is_uncertain((False, ""))
+    assert lead_finder.is_uncertain((False, "**Unsure** - cut off"))
+
+def run_tiered(config):
+    scraped, results = [], []
+
+    def fake_scrape(link):
+        scraped.append(link)
+        return f"Page for {link}: need a painter"
+
+    def batch_qualify(texts):
+        return [fake_qualify(text) for text in texts]
+
+    pipeline = LeadPipeline(fake_search, fake_scrape, fake_qualify, config,
+                            batch_qualify_fn=batch_qualify,
+                            snippet_fn=lead_finder.provider_text, uncertain_fn=lead_finder.is_uncertain)
+    tiers = pipeline.run([("reddit", "painter")],
+                         lambda site, result, is_lead, reason: results.append((result["link"], result["tier"])))
+    return tiers, sorted(scraped), dict(results)
+
+def test_pipeline_skips_and_escalates():
+    print("🧪 Testing the pipeline's snippet, escalated and page tiers...")
+    expected_scrapes = ["https://example.com/3", "https://reddit.com/r/durham/2", "https://reddit.com/r/durham/4"]
+    expected_tiers = {"https://reddit.com/r/durham/1": "snippet", "https://reddit.com/r/durham/2": "page",
+                      "https://example.com/3": "page", "https://reddit.com/r/durham/4": "escalated"}
+    for batch_size in (1, 8):
+        config = PipelineConfig(qualify_batch_size=batch_size, qualify_batch_wait=0.05)
+        tiers, scraped, results = run_tiered(config)
+        print(f"   batch size {batch_size}: {tiers}")
+        assert scraped == expected_scrapes, "only results without a usable body, or an unsure one, are fetched"
+        assert results == expected_tiers
+        assert tiers == {"snippet": 1, "escalated": 1, "page": 2}
+
+def test_escalations_go_through_the_scrape_stage():
+    print("🧪 Testing that escalated pages share the scrape limit and qualify batches...")
+    import threading
+    import time
+
+    vague = [{"title": f"Vague post {number}", "link": f"https://reddit.com/r/durham/{number}", "snippet": "",
+              "body": "x" * 60} for number in range(6)]
+    lock = threading.Lock()
+    fetching, peak, batches = [0], [0], []
+
+    def fake_scrape(link):
+        with lock:
+            fetching[0] += 1
+            peak[0] = max(peak[0], fetching[0])
+        time.sleep(0.05)
+        with lock:
+            fetching[0] -= 1
+        return f"Page for {link}: need a painter"
+
+    def batch_qualify(texts):
+        batches.append(len(texts))
+        return [fake_qualify(text) for text in texts]
+
+    def single_qualify(text):
+        raise AssertionError("pages are qualified in batches too")
+
+    config = PipelineConfig(scrape_concurrency=2, qualify_concurrency=1, qualify_batch_size=8, qualify_batch_wait=0.2)
+    pipeline = LeadPipeline(lambda query: vague, fake_scrape, single_qualify, config, batch_qualify_fn=batch_qualify,
+                            snippet_fn=lead_finder.provider_text, uncertain_fn=lead_finder.is_uncertain)
+    verdicts = []
+    tiers = pipeline.run([("reddit", "painter")], lambda site, result, *verdict: verdicts.append(verdict),
+                         max_results=6)
+    print(f"   peak concurrent fetches: {peak[0]}, batch sizes: {batches}")
+    assert tiers == {"snippet": 0, "escalated": 6, "page": 0}
+    assert all(verdict == (True, "Yes - test") for verdict in verdicts) and len(verdicts) == 6
+    assert peak[0] <= 2, "escalated fetches stay within scrape_concurrency"
+    assert batches[0] == 6 and sum(batches) == 12 and len(batches) < 7, "post bodies, then pages, in batches"
+
+def test_sequential_qualify_result():
+    print("🧪 Testing qualify_result for the sequential modes...")
+    scraped = []
+    with patched(lead_finder, scrape_text=lambda link: scraped.append(link) or "Page text: need a painter",
+                 is_good_lead=fake_qualify):
+        results = fake_search("painter")
+        verdicts = [lead_finder.qualify_result(result) for result in results]
+    assert [result["tier"] for result in results] == ["snippet", "page", "page", "escalated"]
+    assert verdicts[0] == (True, "Yes - test") and verdicts[3] == (True, "Yes - test")
+    assert len(scraped) == 3
+
+def test_job_queue_gains_scrape_counts():
+    print("🧪 Testing per-job scrape counts in an existing job queue database...")
+    import sqlite3
+    from job_queue import JobQueue
+    from job_scheduler import job_key
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.db")
+        old = sqlite3.connect(path)  # created before the scrape counts existed
+        old.execute("CREATE TABLE jobs (search_id TEXT PRIMARY KEY, search_terms TEXT NOT NULL, "
+                    "location TEXT NOT NULL, mode TEXT, priority INTEGER NOT NULL, job_key TEXT NOT NULL, "
+                    "status TEXT NOT NULL, progress INTEGER NOT NULL DEFAULT 0, "
+                    "current_query TEXT NOT NULL DEFAULT '', worker_id TEXT, lease_until REAL, "
+                    "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, "
+                    "finished_at REAL)")
+        old.close()
+
+        queue = JobQueue(path)
+        queue.enqueue("job-1", "painter", "Durham, NC", None, "normal", job_key("painter", "Durham, NC"))
+        queue.claim("worker-1")
+        queue.report("job-1", "worker-1", progress=50, scrapes_avoided=7, pages_fetched=3)
+        row = queue.get("job-1")
+        assert (row["progress"], row["scrapes_avoided"], row["pages_fetched"]) == (50, 7, 3)
+
+if __name__ == "__main__":
+    print("🚀 Testing snippet-first qualification\n")
+    test_provider_text()
+    test_unsure_replies()
+    test_pipeline_skips_and_escalates()
+    test_escalations_go_through_the_scrape_stage()
+    test_sequential_qualify_result()
+    test_job_queue_gains_scrape_counts()
+    print("\n✅ Snippet-first qualification tests passed")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test script to verify yield-aware query scheduling
+Checks per-term counting (including merged queries and searches no provider answered), the UCB ranking and budget over
+repeated runs, skipping of platforms that can't or don't return results, and /api/yield
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import lead_finder
+import term_stats
+from term_stats import (RunTally, TermStats, query_phrases, schedule_queries, term_phrase,
+                        yield_report)
+from testing import patched
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def query(phrase, site="reddit"):
+    return site, f'"{phrase}" site:{site}.com in Durham, NC'
+
+def test_tally_counts_terms():
+    print("🧪 Testing per-term counts...")
+    assert term_phrase('"Need  a Painter" site:reddit.com/r/durham in Durham, NC') == "need a painter"
+    assert term_phrase("r/durham/new") is None
+    assert query_phrases('("a b" OR "c") site:facebook.com/groups "durham" in Durham, NC') == ["a b", "c"]
+    assert query_phrases('"need a painter" site:facebook.com/groups "durham" in Durham, NC') == ["need a painter"]
+
+    merged = '("need a painter" OR "deck repair") site:reddit.com/r/durham in Durham, NC'
+    tally = RunTally()
+
+    def fake_search(text, num=5):
+        return [{"title": "Painter?", "link": "https://reddit.com/1", "term": query("need a painter")[1]},
+                {"title": "Deck", "link": "https://reddit.com/2", "term": query("deck repair")[1]},
+                {"title": "Deck again", "link": "https://reddit.com/3", "term": query("deck repair")[1]}]
+
+    search = tally.track_search([("reddit", merged)], fake_search)
+    results = search(merged)
+    accept = tally.track_accept(lambda site, result: result["link"] != "https://reddit.com/3")
+    kept = [result for result in results if accept("reddit", result)]
+    tally.verdict("reddit", kept[0], True)
+    tally.verdict("reddit", dict(kept[1], tier="escalated"), False)
+
+    painter, deck = tally.counts[("reddit", "need a painter")], tally.counts[("reddit", "deck repair")]
+    assert painter == {"queries": 0.5, "results": 1, "kept": 1, "checked": 1, "qualified": 1, "qualify_calls": 1}
+    assert deck == {"queries": 0.5, "results": 2, "kept": 1, "checked": 1, "qualified": 0, "qualify_calls": 2}
+
+    untagged = tally.track_search([("reddit", 'plain "query"')], lambda text: [{"link": "x"}])('plain "query"')
+    assert untagged[0]["term"] == 'plain "query"', "results without a planner still carry their query"
+
+def test_only_answered_queries_count():
+    print("🧪 Testing queries no provider answered...")
+    import search_cache
+    from fake_services import FakeServices, parse_rates
+    from search_cache import SearchCache
+
+    services = FakeServices(latency=parse_rates("0"), errors=parse_rates("reddit=1")).start()
+    planned = query("need a painter")
+    key = ("reddit", "need a painter")
+    with tempfile.TemporaryDirectory() as tmp, \
+            patched(lead_finder.get_config(), reddit_base_url=services.base_url, use_google_search=False,
+                    use_search_cache=True), \
+            patched(search_cache, _cache=SearchCache(os.path.join(tmp, "search_cache.db"))):
+        try:
+            tally = RunTally()
+            search = tally.track_search([planned], lead_finder.google_search)
+            counts = lambda field="queries": tally.counts.get(key, {}).get(field, 0)
+
+            assert search(planned[1]) == [] and counts() == 0, "a failed search isn't an empty one"
+            skipped = tally.track_search([query("x")], lambda text: lead_finder.SearchResults())
+            skipped(query("x")[1])
+            assert ("reddit", "x") not in tally.counts, "a skipped quota isn't an empty query either"
+
+            services.errors["reddit"] = 0.0
+            results = search(planned[1])
+            assert results and results.reached and counts() == 1 and counts("results") == len(results)
+            cached = search(planned[1])
+            assert [result["link"] for result in cached] == [result["link"] for result in results]
+            assert not cached.reached and counts() == 1, "cache hits spend no quota"
+            tally.track_accept(lambda site, result: True)("reddit", cached[0])
+            tally.verdict("reddit", cached[0], True)
+            assert counts("results") == len(results) and counts("kept") == 0 and counts("qualified") == 0, \
+                "leads from a cache hit aren't credited to a query that cost nothing"
+        finally:
+            services.stop()
+
+def test_shared_search_is_charged_once():
+    print("🧪 Testing a search shared by two jobs...")
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    started = threading.Event()
+
+    def slow_providers(text, num=5):
+        started.set()
+        time.sleep(0.2)
+        return lead_finder.SearchResults([{"title": "Painter?", "link": "https://reddit.com/1"}], reached=True)
+
+    tallies = [RunTally(), RunTally()]
+    searches = [tally.track_search([query("need a painter")], lead_finder.google_search) for tally in tallies]
+    with patched(lead_finder, search_providers=slow_providers), ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(searches[0], query("need a painter")[1])
+        started.wait(2)
+        second = executor.submit(searches[1], query("need a painter")[1])
+        assert first.result() and second.result()
+    counts = [tally.counts.get(("reddit", "need a painter"), {}) for tally in tallies]
+    assert counts[0] == {"queries": 1, "results": 1, "kept": 0, "checked": 0, "qualified": 0, "qualify_calls": 0}
+    assert counts[1] == {}, "the job that joined the search in flight spent nothing"
+
+def test_bandit_spends_budget_on_yield():
+    print("🧪 Testing the UCB schedule over repeated runs...")
+    yields = {"need a painter": 3, "deck repair": 1, "stucco repair": 0, "siding repair": 0}
+    queries = [query(phrase) for phrase in yields]
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = TermStats(os.path.join(tmp, "term_stats.db"), clock=FakeClock())
+        picks = {phrase: 0 for phrase in yields}
+        for run in range(30):
+            scheduled, skipped = schedule_queries(queries, stats, budget=2)
+            assert len(scheduled) == 2 and skipped == {}
+            tally = RunTally()
+            for site, text in scheduled:
+                phrase = term_phrase(text)
+                picks[phrase] += 1
+                tally.add(site, phrase, queries=1, results=5, kept=4, checked=4, qualified=yields[phrase],
+                          qualify_calls=4)
+            tally.save(stats)
+            if run == 1:
+                assert all(picks.values()), "every phrase is tried once before any is repeated"
+        print(f"   picks over 30 runs: {picks}")
+        assert picks["need a painter"] >= 25, "the best phrase gets most of the budget"
+        assert picks["need a painter"] > picks["deck repair"] > picks["stucco repair"]
+        assert picks["stucco repair"] >= 2 and picks["siding repair"] >= 2, "weak phrases are still explored"
+
+        # Without a budget every query is sent, best first
+        scheduled, _ = schedule_queries(queries, stats, budget=0)
+        assert len(scheduled) == len(queries) and term_phrase(scheduled[0][1]) == "need a painter"
+
+        report = yield_report(stats)
+        best = report["terms"][0]
+        assert best["phrase"] == "need a painter" and best["leads_per_query"] == 3.0
+        assert best["qualified_rate"] == 0.75 and best["scrape_success"] == 1.0
+        assert best["estimated_cost_usd"] > 0 and best["cost_per_lead_usd"] > 0
+
+def test_empty_platforms_are_skipped():
+    print("🧪 Testing skipped platforms...")
+    config = lead_finder.get_config()
+    queries = [query("need a painter"), query("need a painter", "facebook"), query("need a painter", "nextdoor")]
+    with tempfile.TemporaryDirectory() as tmp, patched(config, use_google_search=False), \
+            patched(term_stats, YIELD_EMPTY_AFTER=3):
+        clock = FakeClock()
+        stats = TermStats(os.path.join(tmp, "term_stats.db"), clock=clock)
+        scheduled, skipped = schedule_queries(queries, stats)
+        assert scheduled == [query("need a painter")]
+        assert set(skipped) == {"facebook", "nextdoor"}, "no Google CSE: only Reddit can answer"
+
+        config.use_google_search = True
+        for _ in range(3):
+            tally = RunTally()
+            tally.add("reddit", "need a painter", queries=1, results=5)
+            tally.add("nextdoor", "need a painter", queries=1)
+            tally.add("facebook", "need a painter", queries=1, results=1)
+            tally.save(stats)
+        scheduled, skipped = schedule_queries(queries, stats)
+        assert list(skipped) == ["nextdoor"] and "3 queries" in skipped["nextdoor"]
+        assert len(scheduled) == 2
+
+        clock.now += term_stats.YIELD_EMPTY_RETRY_DAYS * 86400
+        scheduled, skipped = schedule_queries(queries, stats)
+        assert skipped == {} and len(scheduled) == 3, "an empty platform is probed again later"
+        assert yield_report(stats)["platforms"][-1]["skipped"] is None
+
+def test_yield_endpoint():
+    print("🧪 Testing GET /api/yield...")
+    import api_server
+
+    with tempfile.TemporaryDirectory() as tmp, patched(term_stats, _stats=TermStats(os.path.join(tmp, "term_stats.db"))):
+        tally = RunTally()
+        tally.add("reddit", "need a painter", queries=2, results=6, kept=5, checked=4, qualified=2)
+        tally.add("reddit", "deck repair", queries=1, results=2, kept=2, checked=2, qualified=0)
+        tally.save()
+        report = api_server.app.test_client().get("/api/yield").get_json()
+        assert [term["phrase"] for term in report["terms"]] == ["need a painter", "deck repair"]
+        assert report["terms"][0]["leads_per_query"] == 1.0
+        assert report["platforms"] == [{"platform": "reddit", "queries": 3.0, "results": 8, "qualified": 2,
+                                        "skipped": None}]
+
+if __name__ == "__main__":
+    print("🚀 Testing yield-aware query scheduling\n")
+    test_tally_counts_terms()
+    test_only_answered_queries_count()
+    test_shared_search_is_charged_once()
+    test_bandit_spends_budget_on_yield()
+    test_empty_platforms_are_skipped()
+    test_yield_endpoint()
+    print("\n✅ Yield scheduling tests passed")
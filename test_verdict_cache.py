@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the persistent is_good_lead verdict cache
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from verdict_cache import VerdictCache, verdict_key
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_key_normalization():
+    print("🧪 Testing cache keys...")
+    key = verdict_key("Need a  PAINTER\nin Durham", "1", "gpt-3.5-turbo")
+    assert key == verdict_key("need a painter in durham", "1", "gpt-3.5-turbo")
+    assert key != verdict_key("need a painter in durham", "2", "gpt-3.5-turbo")
+    assert key != verdict_key("need a painter in durham", "1", "gpt-4o-mini")
+
+def test_ttl_lru_and_persistence():
+    print("🧪 Testing TTL, LRU eviction and persistence...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "verdicts.db")
+        clock = FakeClock()
+        cache = VerdictCache(path, ttl_seconds=100, max_entries=2, clock=clock)
+
+        assert cache.get("a") is None
+        cache.put("a", True, "Yes - homeowner needs painter")
+        clock.now += 1
+        cache.put("b", False, "No - contractor ad")
+        clock.now += 1
+        assert cache.get("a") == (True, "Yes - homeowner needs painter")  # a is now most recent
+        clock.now += 1
+        cache.put("c", False, "No - job posting")  # evicts b
+        assert cache.get("b") is None
+        assert cache.get("c") == (False, "No - job posting")
+
+        stats = cache.stats()
+        print(f"   📊 {stats}")
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        assert stats["entries"] == 2 and stats["evictions"] == 1
+
+        reopened = VerdictCache(path, ttl_seconds=100, max_entries=2, clock=clock)
+        assert reopened.get("a") == (True, "Yes - homeowner needs painter")
+        clock.now += 500
+        assert reopened.get("a") is None  # expired
+        assert reopened.stats()["entries"] == 1
+
+if __name__ == "__main__":
+    print("🚀 Testing verdict cache\n")
+    test_key_normalization()
+    test_ttl_lru_and_persistence()
+    print("\n✅ Verdict cache tests passed")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the test scripts
+patched() swaps module singletons (lead_store._store, search_cache._cache, ...) and config
+settings for one test and always puts the originals back, under pytest and when a test
+script is run directly.
+"""
+
+from contextlib import contextmanager
+
+
+@contextmanager
+def patched(target, **values):
+    """Set attributes of a module or object for the length of a with block, then restore them"""
+    originals = {name: getattr(target, name) for name in values}
+    try:
+        for name, value in values.items():
+            setattr(target, name, value)
+        yield target
+    finally:
+        for name, value in originals.items():
+            setattr(target, name, value)
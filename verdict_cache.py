@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of is_good_lead verdicts for LeadGeneratorAI
+Keyed by a hash of the normalized text window sent to the model, the prompt
+version and the model name, so the same thread is only ever paid for once.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# === CONFIGURATION ===
+VERDICT_CACHE_PATH = os.getenv("VERDICT_CACHE_PATH", "verdict_cache.db")
+VERDICT_CACHE_TTL_DAYS = float(os.getenv("VERDICT_CACHE_TTL_DAYS", "30"))
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "50000"))
+
+
+def verdict_key(text_window, prompt_version, model):
+    """Content address for a qualification request"""
+    normalized = ' '.join(text_window.lower().split())
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """SQLite-backed verdict cache with a TTL and size-bounded LRU eviction"""
+
+    def __init__(self, path=VERDICT_CACHE_PATH, ttl_seconds=VERDICT_CACHE_TTL_DAYS * 86400,
+                 max_entries=VERDICT_CACHE_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                is_lead INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts(last_used)")
+        self.conn.commit()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def get(self, key):
+        """Return (is_lead, reason) for a fresh entry, or None"""
+        with self.lock:
+            now = self.clock()
+            row = self.conn.execute(
+                "SELECT is_lead, reason, created_at FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self.conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                    self.conn.commit()
+                    self.size -= 1
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE verdicts SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return bool(row[0]), row[1]
+
+    def put(self, key, is_lead, reason):
+        with self.lock:
+            now = self.clock()
+            existed = self.conn.execute("SELECT 1 FROM verdicts WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, is_lead, reason, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, int(bool(is_lead)), reason, now, now),
+            )
+            if not existed:
+                self.size += 1
+            if self.size > self.max_entries:
+                overflow = self.size - self.max_entries
+                self.conn.execute(
+                    "DELETE FROM verdicts WHERE key IN "
+                    "(SELECT key FROM verdicts ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self.size -= overflow
+                self.evictions += overflow
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": self.size,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_verdict_cache():
+    """Process-wide cache, opened on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache()
+        return _cache
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Search worker for LeadGeneratorAI (JOB_BACKEND=queue)
+Claims searches from the durable job queue and runs them with the same code as
+the API server, reporting progress to the queue and leads to lead_store. Run as
+many as you like, on one machine or on several that share the database files.
+
+Usage:
+    python worker.py                  # one worker process
+    python worker.py --processes 4    # four worker processes
+    python worker.py --drain          # exit once the queue is empty
+    python worker.py --processes 4 --metrics-port 9100   # Prometheus metrics on ports 9100-9103
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+if __name__ == "__main__":
+    # Run as a script: load .env before this and the sibling modules read their settings
+    from dotenv import load_dotenv
+    load_dotenv()
+
+from api_server import SearchJob, active_searches, background_search
+from job_queue import get_job_queue
+from lead_store import get_lead_store
+from metrics import serve as serve_metrics
+
+# === CONFIGURATION ===
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "5"))
+
+
+class WorkerSearchJob(SearchJob):
+    """SearchJob whose status and progress are reported back to the job queue"""
+
+    def __init__(self, row, worker_id, queue):
+        super().__init__(row["search_id"], row["search_terms"], row["location"], row["mode"])
+        self.attempt = row["attempts"]
+        self.worker_id = worker_id
+        self.queue = queue
+
+    def update(self, **fields):
+        super().update(**fields)
+        # Scrape counts ride along with every progress report
+        self.queue.report(self.search_id, self.worker_id, scrapes_avoided=self.scrapes_avoided,
+                          pages_fetched=self.pages_fetched, **fields)
+
+
+def keep_lease(search_job, stop):
+    """Renew the job's lease; a failed renewal means it was cancelled (or reassigned), so stop it"""
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        if not search_job.queue.heartbeat(search_job.search_id, search_job.worker_id):
+            print(f"🛑 Search {search_job.search_id} was cancelled, stopping")
+            active_searches.pop(search_job.search_id, None)
+            return
+
+
+def run_job(row, worker_id, queue):
+    search_job = WorkerSearchJob(row, worker_id, queue)
+    if search_job.attempt > 1:
+        # The earlier worker lost its lease part-way; its leads would be counted twice
+        removed = get_lead_store().delete_attempts_before(search_job.search_id, search_job.attempt)
+        print(f"🔁 Retrying search {search_job.search_id} (attempt {search_job.attempt}), "
+              f"removed {removed} leads of the earlier attempt")
+    # background_search treats a job missing from active_searches as cancelled
+    active_searches[search_job.search_id] = search_job
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=keep_lease, args=(search_job, stop), daemon=True)
+    heartbeat.start()
+    print(f"👷 {worker_id} running search {search_job.search_id}: {search_job.search_terms or 'default terms'}"
+          f" in {search_job.location}")
+    try:
+        background_search(search_job)
+    finally:
+        stop.set()
+        heartbeat.join()
+        active_searches.pop(search_job.search_id, None)
+    print(f"✅ {worker_id} finished search {search_job.search_id} ({search_job.status}, "
+          f"{len(search_job.results)} results)")
+    return search_job
+
+
+def work_loop(drain=False, metrics_port=None):
+    """Claim and run jobs until stopped (or, with drain, until the queue is empty)"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    queue = get_job_queue()
+    if metrics_port:
+        serve_metrics(metrics_port)
+        print(f"📈 Worker {worker_id} metrics on http://localhost:{metrics_port}/metrics")
+    print(f"👷 Worker {worker_id} waiting for searches")
+    while True:
+        row = queue.claim(worker_id)
+        if row is None:
+            if drain:
+                return
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        run_job(row, worker_id, queue)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued lead searches")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--drain", action="store_true", help="exit once no queued searches are left")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics; process N uses port + N - 1")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        work_loop(args.drain, args.metrics_port)
+        return
+
+    processes = [multiprocessing.Process(target=work_loop,
+                                         args=(args.drain, args.metrics_port and args.metrics_port + index),
+                                         name=f"search-worker-{index + 1}")
+                 for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()